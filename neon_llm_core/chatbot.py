@@ -24,6 +24,7 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+from functools import partial
 from typing import List, Optional
 from uuid import uuid4
 
@@ -41,7 +42,12 @@ from neon_utils.logger import LOG
 from neon_data_models.models.api.llm import LLMPersona
 
 from neon_llm_core.utils.config import LLMMQConfig
-from neon_llm_core.utils.constants import DEFAULT_RESPONSE, DEFAULT_VOTE
+from neon_llm_core.utils.constants import DEFAULT_RESPONSE, DEFAULT_VOTE, \
+    TOP_K_KEY
+from neon_llm_core.utils.deadline import set_deadline
+from neon_llm_core.utils.local_transport import local_transport
+from neon_llm_core.utils.rpc import get_rpc_client
+from neon_llm_core.utils.streaming import send_mq_stream_request
 
 
 class LLMBot(ChatBot):
@@ -54,6 +60,10 @@ class LLMBot(ChatBot):
         self.persona = LLMPersona(**self.persona) if \
             isinstance(self.persona, dict) else self.persona
         self.mq_queue_config = self.get_llm_mq_config(self.base_llm)
+        self.stream_responses = kwargs.get("stream_responses", False)
+        self.use_rpc_client = kwargs.get("use_rpc_client", True)
+        self.use_local_transport = kwargs.get("use_local_transport", False)
+        self.request_timeout = kwargs.get("request_timeout", 30)
         LOG.info(f'Initialised config for llm={self.base_llm}|'
                  f'persona={self._bot_id}')
         self.prompt_id_to_shout = dict()
@@ -75,9 +85,23 @@ class LLMBot(ChatBot):
         if prompt_id:
             self.prompt_id_to_shout[prompt_id] = shout
         LOG.debug(f"Getting response to {shout}")
-        response = self._get_llm_api_response(shout=shout)
+        if self.stream_responses:
+            response = self._get_llm_api_response_stream(shout=shout,
+                                                         prompt_id=prompt_id)
+        else:
+            response = self._get_llm_api_response(shout=shout)
         return response.response if response else DEFAULT_RESPONSE
 
+    def on_response_chunk(self, chunk: str, prompt_id: Optional[str] = None):
+        """
+        Handles one chunk of a streamed response as it arrives. Override this
+        to forward partial responses; chunks are always assembled into the
+        complete response returned by `ask_chatbot`.
+        :param chunk: received response text
+        :param prompt_id: ID of the prompt being responded to, if known
+        """
+        pass
+
     def ask_discusser(self, options: dict, context: dict = None) -> str:
         """
         Provides one discussion response based on the given options
@@ -122,6 +146,9 @@ class LLMBot(ChatBot):
 
         if prompt_sentence and options:
             bots = list(options)
+            if len(bots) == 1:
+                LOG.debug(f"Only one option to vote for: {bots[0]}")
+                return bots[0]
             bot_responses = list(options.values())
             LOG.info(f'bots={bots}, len(bot_responses)={len(bot_responses)}')
             answer_data = self._get_llm_api_choice(prompt=prompt_sentence,
@@ -130,7 +157,8 @@ class LLMBot(ChatBot):
             if not answer_data:
                 LOG.warning("No response to vote request")
                 return DEFAULT_VOTE
-            if len(answer_data.sorted_answer_indexes) != len(bots):
+            # Services may return only the top choice or a full ranking
+            if len(answer_data.sorted_answer_indexes) not in (1, len(bots)):
                 LOG.error(f"Invalid vote response! "
                           f"len(bot_responses)={len(bot_responses)}|"
                           f"response_idxs={answer_data.sorted_answer_indexes}")
@@ -146,23 +174,19 @@ class LLMBot(ChatBot):
         :returns response from LLM API
         """
         queue = self.mq_queue_config.ask_response_queue
-        response_queue = f"{queue}.response.{uuid4().hex}"
         try:
             LOG.info(f"Sending to {self.mq_queue_config.vhost}/{queue} for "
-                     f"persona={self.persona.name}|response_q={response_queue}")
+                     f"persona={self.persona.name}")
 
             request_data = LLMProposeRequest(model=self.base_llm,
                                              persona=self.persona,
                                              query=shout,
                                              history=[],
                                              message_id="")
-            resp_data = send_mq_request(vhost=self.mq_queue_config.vhost,
-                                        request_data=request_data.model_dump(),
-                                        target_queue=queue,
-                                        response_queue=response_queue)
+            resp_data = self._send_request(
+                queue=queue, request_data=request_data.model_dump())
             if not resp_data:
-                LOG.warning(f"Timed out waiting for response on "
-                            f"{response_queue}")
+                LOG.warning(f"Timed out waiting for response from {queue}")
                 return None
             LOG.info(f"Got response for persona={self.persona}")
             return LLMProposeResponse.model_validate(obj=resp_data)
@@ -170,6 +194,52 @@ class LLMBot(ChatBot):
             LOG.exception(f"Failed to get response on "
                           f"{self.mq_queue_config.vhost}/{queue}: {e}")
 
+    def _get_llm_api_response_stream(self, shout: str,
+                                     prompt_id: Optional[str] = None) -> \
+            Optional[LLMProposeResponse]:
+        """
+        Requests LLM API for a streamed response on provided shout
+        :param shout: Input prompt to respond to
+        :param prompt_id: ID of the prompt being responded to, if known
+        :returns complete response from LLM API
+        """
+        queue = self.mq_queue_config.ask_response_queue
+        try:
+            LOG.info(f"Sending stream request to {self.mq_queue_config.vhost}/"
+                     f"{queue} for persona={self.persona.name}")
+
+            request_data = LLMProposeRequest(model=self.base_llm,
+                                             persona=self.persona,
+                                             query=shout,
+                                             history=[],
+                                             message_id="")
+            # The service must start responding before the first chunk times out
+            request_data = set_deadline(request_data.model_dump(),
+                                        self.request_timeout)
+            on_chunk = partial(self.on_response_chunk, prompt_id=prompt_id)
+            if self._is_local(queue):
+                resp_data = local_transport.stream_request(
+                    queue=queue, request_data=request_data,
+                    on_chunk=on_chunk, timeout=self.request_timeout)
+            elif self.use_rpc_client:
+                resp_data = get_rpc_client(
+                    self.mq_queue_config.vhost).stream_request(
+                    target_queue=queue, request_data=request_data,
+                    on_chunk=on_chunk, timeout=self.request_timeout)
+            else:
+                resp_data = send_mq_stream_request(
+                    vhost=self.mq_queue_config.vhost,
+                    request_data=request_data,
+                    target_queue=queue, on_chunk=on_chunk,
+                    timeout=self.request_timeout)
+            if not resp_data:
+                LOG.warning(f"Incomplete streamed response from {queue}")
+                return None
+            return LLMProposeResponse.model_validate(obj=resp_data)
+        except Exception as e:
+            LOG.exception(f"Failed to get streamed response on "
+                          f"{self.mq_queue_config.vhost}/{queue}: {e}")
+
     def _get_llm_api_opinion(self, prompt: str, options: dict) -> Optional[LLMDiscussResponse]:
         """
         Requests LLM API for discussion of provided submind responses
@@ -178,11 +248,10 @@ class LLMBot(ChatBot):
         :returns response data from LLM API
         """
         queue = self.mq_queue_config.ask_discusser_queue
-        response_queue = f"{queue}.response.{uuid4().hex}"
 
         try:
             LOG.info(f"Sending to {self.mq_queue_config.vhost}/{queue} for "
-                     f"persona={self.persona.name}|response_q={response_queue}")
+                     f"persona={self.persona.name}")
 
             request_data = LLMDiscussRequest(model=self.base_llm,
                                              persona=self.persona,
@@ -190,33 +259,30 @@ class LLMBot(ChatBot):
                                              options=options,
                                              history=[],
                                              message_id="")
-            resp_data = send_mq_request(vhost=self.mq_queue_config.vhost,
-                                        request_data=request_data.model_dump(),
-                                        target_queue=queue,
-                                        response_queue=response_queue)
+            resp_data = self._send_request(
+                queue=queue, request_data=request_data.model_dump())
             if not resp_data:
-                LOG.warning(f"Timed out waiting for response on "
-                            f"{response_queue}")
+                LOG.warning(f"Timed out waiting for response from {queue}")
                 return None
             return LLMDiscussResponse.model_validate(obj=resp_data)
         except Exception as e:
             LOG.exception(f"Error getting response on "
                           f"{self.mq_queue_config.vhost}/{queue}: {e}")
 
-    def _get_llm_api_choice(self, prompt: str,
-                            responses: List[str]) -> Optional[LLMVoteResponse]:
+    def _get_llm_api_choice(self, prompt: str, responses: List[str],
+                            k: Optional[int] = 1) -> Optional[LLMVoteResponse]:
         """
         Requests LLM API for choice among provided message list
         :param prompt: incoming prompt text
         :param responses: list of answers to select from
+        :param k: number of best answers to select; None for a full ranking
         :returns response data from LLM API
         """
         queue = self.mq_queue_config.ask_appraiser_queue
-        response_queue = f"{queue}.response.{uuid4().hex}"
 
         try:
             LOG.info(f"Sending to {self.mq_queue_config.vhost}/{queue} for "
-                     f"persona={self.persona.name}|response_q={response_queue}")
+                     f"persona={self.persona.name}")
 
             request_data = LLMVoteRequest(model=self.base_llm,
                                           persona=self.persona,
@@ -224,19 +290,50 @@ class LLMBot(ChatBot):
                                           responses=responses,
                                           history=[],
                                           message_id="")
-            resp_data = send_mq_request(vhost=self.mq_queue_config.vhost,
-                                        request_data=request_data.model_dump(),
-                                        target_queue=queue,
-                                        response_queue=response_queue)
+            request_data = request_data.model_dump()
+            if k:
+                request_data[TOP_K_KEY] = k
+            resp_data = self._send_request(queue=queue,
+                                           request_data=request_data)
             if not resp_data:
-                LOG.warning(f"Timed out waiting for response on "
-                            f"{response_queue}")
+                LOG.warning(f"Timed out waiting for response from {queue}")
                 return None
             return LLMVoteResponse.model_validate(obj=resp_data)
         except Exception as e:
             LOG.exception(f"Failed to get response on "
                           f"{self.mq_queue_config.vhost}/{queue}: {e}")
 
+    def _send_request(self, queue: str, request_data: dict) -> dict:
+        """
+        Sends a request to the LLM service and waits for the response
+        :param queue: LLM service queue to send the request to
+        :param request_data: serialized request
+        :returns response data, or an empty dict if no response was received
+        """
+        # Let the service skip requests that are no longer waited on
+        set_deadline(request_data, self.request_timeout)
+        if self._is_local(queue):
+            return local_transport.request(queue=queue,
+                                           request_data=request_data,
+                                           timeout=self.request_timeout)
+        if self.use_rpc_client:
+            return get_rpc_client(self.mq_queue_config.vhost).request(
+                target_queue=queue, request_data=request_data,
+                timeout=self.request_timeout)
+        return send_mq_request(vhost=self.mq_queue_config.vhost,
+                               request_data=request_data,
+                               target_queue=queue,
+                               response_queue=f"{queue}.response."
+                                              f"{uuid4().hex}",
+                               timeout=self.request_timeout)
+
+    def _is_local(self, queue: str) -> bool:
+        """
+        Check if requests to `queue` can be passed directly to an LLM service
+        running in this process
+        """
+        return self.use_local_transport and local_transport.has_handler(queue)
+
     @staticmethod
     def get_llm_mq_config(llm_name: str) -> LLMMQConfig:
         """
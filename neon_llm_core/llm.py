@@ -23,14 +23,46 @@
 # LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
+import inspect
+
 from abc import ABC, abstractmethod
-from typing import List
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from neon_utils.logger import LOG
+
+from neon_llm_core.utils.cache import ResponseCache, make_cache_key
+from neon_llm_core.utils.cancellation import CancellationToken
+
+
+@dataclass
+class PersonaPrefix:
+    key: str
+    text: str
+    tokens: List[str]
 
 
 class NeonLLM(ABC):
 
     mq_to_llm_role = {}
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Abstract classes may leave ranking to their subclasses
+        if any(getattr(getattr(cls, name, None), "__isabstractmethod__", False)
+               for name in dir(cls)):
+            return
+        if cls.get_sorted_answer_indexes is \
+                NeonLLM.get_sorted_answer_indexes and \
+                cls._score_answers_batch is NeonLLM._score_answers_batch:
+            raise TypeError(f"{cls.__name__} must implement "
+                            f"`get_sorted_answer_indexes` or "
+                            f"`_score_answers_batch`")
+
     def __init__(self, config: dict):
         """
         @param config: Dict LLM configuration for this specific LLM
@@ -38,6 +70,21 @@ class NeonLLM(ABC):
         self._llm_config = config
         self._tokenizer = None
         self._model = None
+        self.response_cache = self._init_response_cache()
+        self._persona_prefixes = ResponseCache(
+            max_size=(config or {}).get("persona_prefix_cache_size", 256),
+            ttl=None, on_evict=self._on_persona_prefix_evicted)
+        self._persona_prefix_keys: Dict[str, Set[str]] = {}
+        self._persona_prefix_lock = Lock()
+        self._turn_token_counts = ResponseCache(
+            max_size=(config or {}).get("token_count_cache_size", 4096),
+            ttl=None)
+        self.truncated_requests = 0
+        self.truncated_turns = 0
+        self._accepts_cancel_token = {
+            name: "cancel_token" in inspect.signature(
+                getattr(self, name)).parameters
+            for name in ("_call_model", "_acall_model", "_call_model_stream")}
 
     @property
     def llm_config(self):
@@ -71,13 +118,327 @@ class NeonLLM(ABC):
     def _system_prompt(self) -> str:
         pass
 
-    def ask(self, message: str, chat_history: List[List[str]], persona: dict) -> str:
-        """ Generates llm response based on user message and (user, llm) chat history """
-        prompt = self._assemble_prompt(message, chat_history, persona)
-        llm_text_output = self._call_model(prompt)
+    @property
+    def _response_cache_config(self) -> dict:
+        return (self._llm_config or {}).get("response_cache") or {}
+
+    def _init_response_cache(self) -> Optional[ResponseCache]:
+        """
+        Creates a cache for `ask` responses if enabled in the `response_cache`
+        section of the LLM configuration. Override to provide another cache
+        implementation with the same `get`/`put` interface.
+        """
+        cache_config = self._response_cache_config
+        if not cache_config.get("enabled"):
+            return None
+        return ResponseCache(max_size=cache_config.get("max_size", 1024),
+                             ttl=cache_config.get("ttl", 300))
+
+    def _get_response_cache_key(self, message: str,
+                                chat_history: List[List[str]],
+                                persona: dict) -> Optional[str]:
+        """
+            Gets the response cache key for a request
+            :returns key or None if responses for this request are not cached
+        """
+        if self.response_cache is None or \
+                self.is_response_cache_excluded(persona):
+            return None
+        return make_cache_key(persona or {}, message, chat_history)
+
+    def is_response_cache_excluded(self, persona: dict) -> bool:
+        """
+            Checks if a persona is listed in `response_cache.excluded_personas`
+            :returns True if responses for this persona must not be reused
+        """
+        excluded_personas = self._response_cache_config.get(
+            "excluded_personas", [])
+        persona = persona or {}
+        return persona.get("name") in excluded_personas or \
+            self._get_persona_id(persona) in excluded_personas
+
+    @property
+    def history_token_budget(self) -> Optional[int]:
+        """
+            Maximum number of tokens for the prompt, after reserving
+            `max_output_tokens` of `context_window` for the response.
+            None if `context_window` is not configured.
+        """
+        context_window = (self._llm_config or {}).get("context_window")
+        if not context_window:
+            return None
+        return context_window - self._llm_config.get("max_output_tokens", 0)
+
+    def _count_tokens(self, role: str, text: str) -> int:
+        """
+            Counts the tokens in one turn of a conversation. Counts are cached
+            so each turn of a growing conversation is only tokenized once.
+        """
+        key = (role, text)
+        count = self._turn_token_counts.get(key)
+        if count is None:
+            count = len(self._tokenize(text))
+            self._turn_token_counts.put(key, count)
+        return count
+
+    def _fit_history(self, message: str, chat_history: List[List[str]],
+                     persona: dict) -> List[List[str]]:
+        """
+            Drops the oldest turns of :param chat_history that do not fit in
+            `history_token_budget` along with the persona prefix and
+            :param message
+            :returns chat history that fits the token budget
+        """
+        budget = self.history_token_budget
+        if budget is None or not chat_history:
+            return chat_history
+        budget -= len(self.get_persona_prefix(persona).tokens)
+        budget -= self._count_tokens("user", message)
+        kept = 0
+        for role, text in reversed(chat_history):
+            budget -= self._count_tokens(role, text)
+            if budget < 0:
+                break
+            kept += 1
+        if kept == len(chat_history):
+            return chat_history
+        dropped = len(chat_history) - kept
+        self.truncated_requests += 1
+        self.truncated_turns += dropped
+        LOG.debug(f"Dropped {dropped} of {len(chat_history)} history turns "
+                  f"to fit {self.history_token_budget} tokens")
+        return chat_history[dropped:]
+
+    def _prepare_prompt(self, message: str, chat_history: List[List[str]],
+                        persona: dict):
+        """
+            Assembles a prompt after fitting :param chat_history to the
+            configured token budget
+        """
+        chat_history = self._fit_history(message, chat_history, persona)
+        return self._assemble_prompt(message, chat_history, persona)
+
+    @staticmethod
+    def _get_persona_id(persona: dict) -> Optional[str]:
+        """
+            Gets the ID of a persona, matching `LLMPersona.id`
+        """
+        persona_name = persona.get("name") or persona.get("persona_name")
+        if persona_name and persona.get("user_id"):
+            return f"{persona_name}_{persona['user_id']}"
+        return persona_name
+
+    def get_persona_prefix(self, persona: dict) -> PersonaPrefix:
+        """
+            Gets the assembled system prefix for a persona and its tokens.
+            The prefix is computed once per persona definition and reused
+            until the persona is updated or deleted, so `_assemble_prompt`
+            implementations should use this rather than re-tokenizing the
+            persona on every request.
+            :param persona: persona included in a request
+            :returns PersonaPrefix for :param persona
+        """
+        persona = persona or {}
+        key = make_cache_key(persona)
+        prefix = self._persona_prefixes.get(key)
+        if prefix is None:
+            text = self._assemble_persona_prefix(persona)
+            prefix = PersonaPrefix(key=key, text=text,
+                                   tokens=self._tokenize(text))
+            self._persona_prefixes.put(key, prefix)
+            with self._persona_prefix_lock:
+                self._persona_prefix_keys.setdefault(
+                    self._get_persona_id(persona), set()).add(key)
+            self._pin_persona_prefix(prefix)
+        return prefix
+
+    def update_persona_prefix(self, persona: dict) -> PersonaPrefix:
+        """
+            Replaces any prefixes computed for a previous definition of
+            :param persona with one for the current definition
+        """
+        self.invalidate_persona_prefix(persona)
+        return self.get_persona_prefix(persona)
+
+    def invalidate_persona_prefix(self, persona: dict):
+        """
+            Drops all prefixes computed for the persona with the same ID as
+            :param persona
+        """
+        with self._persona_prefix_lock:
+            keys = self._persona_prefix_keys.pop(
+                self._get_persona_id(persona or {}), set())
+        for key in keys:
+            prefix = self._persona_prefixes.pop(key)
+            if prefix is not None:
+                self._unpin_persona_prefix(prefix)
+
+    def _on_persona_prefix_evicted(self, key: str, prefix: PersonaPrefix):
+        """
+            Unpins a prefix dropped from the cache of persona prefixes to make
+            room for another one
+        """
+        with self._persona_prefix_lock:
+            for persona_id, keys in list(self._persona_prefix_keys.items()):
+                keys.discard(key)
+                if not keys:
+                    self._persona_prefix_keys.pop(persona_id)
+        self._unpin_persona_prefix(prefix)
+
+    def _assemble_persona_prefix(self, persona: dict) -> str:
+        """
+            Assembles the system prefix for a persona. By default this is the
+            persona's system prompt or description, falling back to
+            `_system_prompt`.
+        """
+        return persona.get("system_prompt") or persona.get("description") or \
+            self._system_prompt
+
+    def _pin_persona_prefix(self, prefix: PersonaPrefix):
+        """
+            Called when a persona prefix is computed. Backends that support
+            prompt or prefix caching may override this to keep the prefix
+            cached on the inference server.
+        """
+        pass
+
+    def _unpin_persona_prefix(self, prefix: PersonaPrefix):
+        """
+            Called when a persona prefix is dropped after its persona was
+            updated or deleted, or to make room for other prefixes
+        """
+        pass
+
+    def preload(self):
+        """
+            Loads the tokenizer and model, which are otherwise loaded when
+            first used
+        """
+        _ = self.tokenizer
+        _ = self.model
+
+    def warmup(self, prompts: List[str]):
+        """
+            Generates a response to each of the prompts so that the first
+            requests do not pay one-time costs like kernel compilation.
+            Responses are not cached.
+            :param prompts: list of warmup messages
+        """
+        for message in prompts:
+            self._call_model(self._prepare_prompt(message, [], {}))
+
+    def _get_cancel_kwargs(self, method: str,
+                           cancel_token: Optional[CancellationToken]) -> dict:
+        """
+            Get the keyword arguments to pass `cancel_token` to `method`, if
+            it accepts one. Models that do not accept a token still stop
+            before calling the model once the request is cancelled.
+        """
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+            if self._accepts_cancel_token.get(method):
+                return {"cancel_token": cancel_token}
+        return {}
+
+    def ask(self, message: str, chat_history: List[List[str]], persona: dict,
+            cancel_token: Optional[CancellationToken] = None) -> str:
+        """
+            Generates llm response based on user message and (user, llm) chat
+            history
+            :param cancel_token: optional token signalling that the response
+                is no longer needed
+            :raises RequestCancelled: if the request is cancelled
+        """
+        cache_key = self._get_response_cache_key(message, chat_history, persona)
+        if cache_key:
+            cached_output = self.response_cache.get(cache_key)
+            if cached_output is not None:
+                return cached_output
+        prompt = self._prepare_prompt(message, chat_history, persona)
+        llm_text_output = self._call_model(
+            prompt, **self._get_cancel_kwargs("_call_model", cancel_token))
+        if cache_key and llm_text_output is not None:
+            self.response_cache.put(cache_key, llm_text_output)
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
         return llm_text_output
 
-    @abstractmethod
+    async def aask(self, message: str, chat_history: List[List[str]],
+                   persona: dict,
+                   cancel_token: Optional[CancellationToken] = None) -> str:
+        """
+            Asynchronously generates llm response based on user message and
+            (user, llm) chat history
+        """
+        cache_key = self._get_response_cache_key(message, chat_history, persona)
+        if cache_key:
+            cached_output = self.response_cache.get(cache_key)
+            if cached_output is not None:
+                return cached_output
+        prompt = self._prepare_prompt(message, chat_history, persona)
+        llm_text_output = await self._acall_model(
+            prompt, **self._get_cancel_kwargs("_acall_model", cancel_token))
+        if cache_key and llm_text_output is not None:
+            self.response_cache.put(cache_key, llm_text_output)
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        return llm_text_output
+
+    def ask_stream(self, message: str, chat_history: List[List[str]],
+                   persona: dict,
+                   cancel_token: Optional[CancellationToken] = None) \
+            -> Iterator[str]:
+        """
+            Generates llm response chunks based on user message and
+            (user, llm) chat history. A cancelled request stops after the
+            current chunk.
+            :returns iterator of response chunks
+        """
+        cache_key = self._get_response_cache_key(message, chat_history, persona)
+        if cache_key:
+            cached_output = self.response_cache.get(cache_key)
+            if cached_output is not None:
+                yield cached_output
+                return
+        prompt = self._prepare_prompt(message, chat_history, persona)
+        chunks = []
+        for chunk in self._call_model_stream(
+                prompt, **self._get_cancel_kwargs("_call_model_stream",
+                                                  cancel_token)):
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            chunks.append(chunk)
+            yield chunk
+        if cache_key:
+            self.response_cache.put(cache_key, "".join(chunks))
+
+    def ask_batch(self, requests: List[Tuple[str, List[List[str]], dict]]) -> List[str]:
+        """
+            Generates llm responses for several requests at once
+            :param requests: list of (message, chat_history, persona) tuples
+            :returns list of responses in the same order as :param requests
+        """
+        responses = [None] * len(requests)
+        cache_keys = [None] * len(requests)
+        uncached_idx = []
+        for idx, (message, chat_history, persona) in enumerate(requests):
+            cache_keys[idx] = self._get_response_cache_key(message,
+                                                           chat_history,
+                                                           persona)
+            if cache_keys[idx]:
+                responses[idx] = self.response_cache.get(cache_keys[idx])
+            if responses[idx] is None:
+                uncached_idx.append(idx)
+        if uncached_idx:
+            prompts = [self._prepare_prompt(*requests[idx])
+                       for idx in uncached_idx]
+            outputs = self._call_model_batch(prompts)
+            for idx, output in zip(uncached_idx, outputs):
+                responses[idx] = output
+                if cache_keys[idx] and output is not None:
+                    self.response_cache.put(cache_keys[idx], output)
+        return responses
+
     def get_sorted_answer_indexes(self, question: str, answers: List[str], persona: dict) -> List[int]:
         """
             Creates sorted list of answer indexes with respect to order provided in :param answers
@@ -86,19 +447,224 @@ class NeonLLM(ABC):
             :param answers: list of answers to rank
             :returns list of indexes
         """
-        pass
+        if not answers:
+            return []
+        scores = self._score_answers_batch(question, answers, persona)
+        return self._sort_scores(scores, len(answers))
+
+    def get_top_answer_indexes(self, question: str, answers: List[str],
+                               persona: dict, k: int = 1) -> List[int]:
+        """
+            Selects the best :param k answers without ordering the others.
+            If the answers do not fit in one ranking call, they are ranked in
+            chunks and the best of each chunk advance to the next round
+            until the remaining answers can be ranked together. If chunks
+            are too small to narrow down, the ranked chunks are merged instead.
+            :param question: incoming question
+            :param answers: list of answers to rank
+            :param persona: persona ranking the answers
+            :param k: number of answers to select
+            :returns list of up to :param k indexes, best first
+        """
+        candidates = list(range(len(answers)))
+        if len(candidates) <= 1:
+            return candidates[:k]
+        while True:
+            chunks = [[candidates[idx] for idx in chunk] for chunk in
+                      self._chunk_answers(question,
+                                          [answers[idx] for idx in candidates])]
+            if len(chunks) == 1:
+                return self._rank_answers(question, answers, chunks[0],
+                                          persona)[:k]
+            if all(len(chunk) <= k for chunk in chunks):
+                return self._merge_ranked_answers(
+                    question, answers,
+                    [self._rank_answers(question, answers, chunk, persona)
+                     for chunk in chunks], persona, k)
+            winners = []
+            for chunk in chunks:
+                if len(chunk) <= k:
+                    # Every answer in this chunk advances
+                    winners.extend(chunk)
+                else:
+                    winners.extend(self._rank_answers(question, answers, chunk,
+                                                      persona)[:k])
+            candidates = sorted(winners)
+
+    def _rank_answers(self, question: str, answers: List[str],
+                      indexes: List[int], persona: dict) -> List[int]:
+        """
+            Ranks a subset of answers in one call
+            :param indexes: indexes of :param answers to rank
+            :returns :param indexes sorted from best to worst
+        """
+        if len(indexes) <= 1:
+            return list(indexes)
+        ranked = self.get_sorted_answer_indexes(
+            question, [answers[idx] for idx in indexes], persona)
+        return [indexes[idx] for idx in ranked]
+
+    def _merge_ranked_answers(self, question: str, answers: List[str],
+                              ranked_chunks: List[List[int]], persona: dict,
+                              k: int) -> List[int]:
+        """
+            Merges ranked chunks of answers into the best :param k answers.
+            Chunks are merged in pairs by ranking the best remaining answer of
+            each, so no call ranks more than two answers.
+            :param ranked_chunks: lists of answer indexes, each best first
+            :returns list of up to :param k indexes, best first
+        """
+        while len(ranked_chunks) > 1:
+            merged_chunks = []
+            for first, second in zip(ranked_chunks[::2], ranked_chunks[1::2]):
+                first, second = list(first), list(second)
+                merged = []
+                while first and second and len(merged) < k:
+                    best = self._rank_answers(question, answers,
+                                              [first[0], second[0]], persona)
+                    merged.append(first.pop(0) if best[0] == first[0]
+                                  else second.pop(0))
+                merged_chunks.append((merged + first + second)[:k])
+            if len(ranked_chunks) % 2:
+                merged_chunks.append(ranked_chunks[-1][:k])
+            ranked_chunks = merged_chunks
+        return ranked_chunks[0][:k]
+
+    def _chunk_answers(self, question: str,
+                       answers: List[str]) -> List[List[int]]:
+        """
+            Splits answers into groups that can be ranked in one call, limited
+            by `max_answers_per_ranking` and `history_token_budget`
+            :param question: incoming question
+            :param answers: list of answers to split
+            :returns list of groups of answer indexes
+        """
+        # Answers are only compared if at least two are ranked at once
+        max_answers = max((self._llm_config or {}).get(
+            "max_answers_per_ranking") or len(answers), 2)
+        budget = self.history_token_budget
+        if budget is not None:
+            budget -= self._count_tokens("user", question)
+        chunks = [[]]
+        chunk_tokens = 0
+        for idx, answer in enumerate(answers):
+            tokens = self._count_tokens("llm", answer) \
+                if budget is not None else 0
+            if chunks[-1] and (len(chunks[-1]) >= max_answers or
+                               (budget is not None and
+                                chunk_tokens + tokens > budget)):
+                chunks.append([])
+                chunk_tokens = 0
+            chunks[-1].append(idx)
+            chunk_tokens += tokens
+        return chunks
+
+    async def aget_top_answer_indexes(self, question: str,
+                                      answers: List[str], persona: dict,
+                                      k: int = 1) -> List[int]:
+        """
+            Asynchronous `get_top_answer_indexes`, run in a separate thread
+            by default
+        """
+        return await asyncio.to_thread(self.get_top_answer_indexes,
+                                       question, answers, persona, k)
+
+    @staticmethod
+    def _sort_scores(scores: np.ndarray, num_answers: int) -> List[int]:
+        """
+            Sorts answer indexes by score from best to worst. Equal scores keep
+            the order of the answers and missing (NaN) scores are ranked last.
+            :param scores: one score per answer, higher is better
+            :param num_answers: number of answers that were scored
+            :returns list of indexes
+        """
+        scores = np.asarray(scores, dtype=float).reshape(-1)
+        if scores.shape[0] != num_answers:
+            raise ValueError(f"Expected {num_answers} scores, "
+                             f"got {scores.shape[0]}")
+        scores = np.nan_to_num(scores, nan=-np.inf)
+        return np.argsort(-scores, kind="stable").tolist()
+
+    def _score_answers_batch(self, question: str, answers: List[str],
+                             persona: dict) -> np.ndarray:
+        """
+            Scores all answers to a question in one pass. Backends that do not
+            override `get_sorted_answer_indexes` must implement this.
+            :param question: incoming question
+            :param answers: list of answers to score
+            :param persona: persona ranking the answers
+            :returns array with one score per answer; higher is better
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not "
+                                  f"implement answer scoring")
+
+    async def aget_sorted_answer_indexes(self, question: str,
+                                         answers: List[str],
+                                         persona: dict) -> List[int]:
+        """
+            Asynchronous `get_sorted_answer_indexes`. Backends with a
+            non-blocking ranking implementation should override this; by
+            default the synchronous method is run in a separate thread.
+        """
+        return await asyncio.to_thread(self.get_sorted_answer_indexes,
+                                       question, answers, persona)
 
     @abstractmethod
-    def _call_model(self, prompt: str) -> str:
+    def _call_model(self, prompt: str,
+                    cancel_token: Optional[CancellationToken] = None) -> str:
         """
         Wrapper for Model generation logic. This method may be called
         asynchronously, so it is up to the extending class to use locks or
         queue inputs as necessary.
         :param prompt: Input text sequence
+        :param cancel_token: Token to poll between decode steps, or to abort
+            a remote call with `add_callback`. Implementations may omit this
+            parameter if generation cannot be interrupted.
         :returns: Output text sequence generated by model
+        :raises RequestCancelled: if generation is abandoned
         """
         pass
 
+    async def _acall_model(self, prompt: str,
+                           cancel_token: Optional[CancellationToken] = None
+                           ) -> str:
+        """
+        Asynchronous wrapper for Model generation logic. Backends that call
+        remote inference servers should override this with a non-blocking
+        implementation; by default `_call_model` is run in a separate thread.
+        :param prompt: Input text sequence
+        :param cancel_token: Token signalling that the output is not needed
+        :returns: Output text sequence generated by model
+        """
+        return await asyncio.to_thread(
+            self._call_model, prompt,
+            **self._get_cancel_kwargs("_call_model", cancel_token))
+
+    def _call_model_stream(self, prompt: str,
+                           cancel_token: Optional[CancellationToken] = None
+                           ) -> Iterator[str]:
+        """
+        Wrapper for incremental Model generation logic. Backends that can
+        generate output incrementally should override this to yield chunks
+        as they are generated; by default the complete output of
+        `_call_model` is yielded as a single chunk.
+        :param prompt: Input text sequence
+        :param cancel_token: Token signalling that the output is not needed
+        :returns: Iterator of output text chunks
+        """
+        yield self._call_model(
+            prompt, **self._get_cancel_kwargs("_call_model", cancel_token))
+
+    def _call_model_batch(self, prompts: List[str]) -> List[str]:
+        """
+        Wrapper for batched Model generation logic. Backends that can generate
+        for several prompts in one pass should override this; by default each
+        prompt is passed to `_call_model` in turn.
+        :param prompts: Input text sequences
+        :returns: Output text sequences, in the same order as `prompts`
+        """
+        return [self._call_model(prompt) for prompt in prompts]
+
     @abstractmethod
     def _assemble_prompt(self, message: str, chat_history: List[List[str]], persona: dict):
         """
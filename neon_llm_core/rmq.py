@@ -24,10 +24,16 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import asyncio
+
 from abc import abstractmethod, ABC
-from threading import Thread, Lock
+from concurrent.futures import Future
+from contextlib import contextmanager, nullcontext
+from functools import partial, wraps
+from threading import Event, Lock, Thread
 from time import time
-from typing import Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from uuid import uuid4
 
 from neon_mq_connector.connector import MQConnector
 from neon_mq_connector.utils.rabbit_utils import create_mq_callback
@@ -41,16 +47,52 @@ from neon_data_models.models.api.mq import (
 
 from neon_llm_core.utils.config import load_config
 from neon_llm_core.llm import NeonLLM
-from neon_llm_core.utils.constants import LLM_VHOST
+from neon_llm_core.utils.batching import BatchCollector
+from neon_llm_core.utils.cache import ResponseCache, make_cache_key
+from neon_llm_core.utils.cancellation import (
+    CancellationRegistry,
+    CancellationToken,
+    RequestCancelled,
+)
+from neon_llm_core.utils.deadline import DEADLINE_KEY, get_remaining_time
+from neon_llm_core.utils.executor import BoundedExecutor
+from neon_llm_core.utils.local_transport import local_transport
+from neon_llm_core.utils.process_pool import ProcessModel
+from neon_llm_core.utils.replicas import ReplicaPool
+from neon_llm_core.utils.rpc import stop_rpc_clients
+from neon_llm_core.utils.scheduler import PriorityScheduler
+from neon_llm_core.utils.singleflight import SingleFlight
+from neon_llm_core.utils.streaming import (
+    STREAM_REQUEST_KEY,
+    build_stream_message,
+)
+from neon_llm_core.utils.constants import LLM_VHOST, TOP_K_KEY
 from neon_llm_core.utils.personas.provider import PersonasProvider
 
 
+def _reject_on_failure(callback: Callable) -> Callable:
+    """
+    Rejects (without requeue) messages consumed with `auto_ack=False` that
+    could not be submitted for handling, e.g. because the body could not be
+    parsed or the request could not be queued. `create_mq_callback` logs and
+    discards these errors, so the message would otherwise never be settled.
+    """
+    @wraps(callback)
+    def wrapped(self, channel, method, properties, body):
+        future = callback(self, channel, method, properties, body)
+        if future is None and channel and method:
+            self._nack_message(channel, method)
+        return future
+    return wrapped
+
+
 class NeonLLMMQConnector(MQConnector, ABC):
     """
         Module for processing MQ requests to Fast Chat LLM
     """
 
     async_consumers_enabled = True
+    default_num_workers = 8
 
     def __init__(self, config: Optional[dict] = None):
         self.service_name = f'neon_llm_{self.name}'
@@ -63,10 +105,127 @@ class NeonLLMMQConnector(MQConnector, ABC):
         self.register_consumers()
         self._model = None
         self._bots = list()
-        self._persona_update_lock = Lock()
         self._last_persona_update = time()
         self._personas_provider = PersonasProvider(service_name=self.name,
                                                    ovos_config=self.ovos_config)
+        self._ask_batcher = self._init_ask_batcher()
+        self._executors = self._init_executors()
+        self._scheduler = self._init_scheduler()
+        self._ranking_cache = self._init_ranking_cache()
+        self._coalesce_requests = self.model_config.get("coalesce_requests",
+                                                        True)
+        self._ask_flights = SingleFlight()
+        self._ranking_flights = SingleFlight()
+        self._event_loop = self._init_event_loop()
+        # Created on the event loop thread, so they are bound to that loop
+        self._async_limits: Dict[str, asyncio.Semaphore] = dict()
+        self._preload_model = self.model_config.get("preload_model", True)
+        self._model_ready = Event()
+        self._model_load_stats = dict()
+        self._model_pool: Optional[ReplicaPool] = None
+        self._model_pool_lock = Lock()
+        self._expired_requests = {request_type: 0 for request_type
+                                  in self._executors}
+        self._expired_lock = Lock()
+        self._cancellations = CancellationRegistry(
+            name=f"neon_llm_{self.name}_deadlines")
+
+    def _init_event_loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """
+        Start an event loop to handle requests with coroutines if
+        `async_handlers` is enabled in `model_config`. Each request queue is
+        then limited to `<queue>_workers` concurrent requests on the loop
+        instead of a pool of threads.
+        """
+        if not self.model_config.get("async_handlers"):
+            return None
+        loop = asyncio.new_event_loop()
+        Thread(target=loop.run_forever, name=f"neon_llm_{self.name}_loop",
+               daemon=True).start()
+        LOG.info("Handling requests on an event loop")
+        return loop
+
+    def _init_ranking_cache(self) -> Optional[ResponseCache]:
+        """
+        Create a short-lived cache of answer rankings shared by score and
+        discussion requests, configured by `ranking_cache` in `model_config`
+        """
+        cache_config = self.model_config.get("ranking_cache") or {}
+        if not cache_config.get("enabled", True):
+            return None
+        return ResponseCache(max_size=cache_config.get("max_size", 256),
+                             ttl=cache_config.get("ttl", 60))
+
+    def _init_executors(self) -> Dict[str, BoundedExecutor]:
+        """
+        Create a bounded worker pool for each request queue. Pool sizes are
+        read from `ask_workers`, `score_workers` and `discussion_workers` in
+        `model_config`.
+        """
+        executors = dict()
+        for request_type in ("ask", "score", "discussion"):
+            max_workers = self.model_config.get(f"{request_type}_workers",
+                                                self.default_num_workers)
+            executors[request_type] = BoundedExecutor(
+                max_workers=max_workers,
+                name=f"neon_llm_{self.name}_{request_type}")
+        return executors
+
+    def _init_scheduler(self) -> Optional[PriorityScheduler]:
+        """
+        Create a scheduler that gives score and discussion requests priority
+        over ask requests if `priority_scheduling` is enabled in
+        `model_config`. If ask requests are batched, the default number of
+        slots is scaled by `max_batch_size` so that full batches can form.
+        """
+        config = self.model_config.get("priority_scheduling") or {}
+        if not config.get("enabled"):
+            return None
+        max_batch_size = max(self.model_config.get("max_batch_size", 1), 1)
+        max_concurrent = config.get("max_concurrent")
+        if not max_concurrent:
+            max_concurrent = (self.model_config.get("model_processes") or
+                              self.model_config.get("model_replicas", 1)) * \
+                max_batch_size
+        elif max_concurrent < max_batch_size:
+            LOG.warning(f"priority_scheduling.max_concurrent="
+                        f"{max_concurrent} limits ask batches to "
+                        f"{max_concurrent} of max_batch_size="
+                        f"{max_batch_size} requests")
+        weights = {"ask": 1, "score": 4, "discussion": 2}
+        weights.update(config.get("weights") or {})
+        max_wait_ms = config.get("max_wait_ms", 5000)
+        LOG.info(f"Scheduling requests by priority: "
+                 f"max_concurrent={max_concurrent}|weights={weights}|"
+                 f"max_wait_ms={max_wait_ms}")
+        return PriorityScheduler(max_concurrent=max_concurrent,
+                                 weights=weights,
+                                 max_wait=max_wait_ms / 1000)
+
+    def _init_ask_batcher(self) -> Optional[BatchCollector]:
+        """
+        Create a collector for batching concurrent ask requests if
+        `max_batch_size` is configured greater than 1
+        """
+        max_batch_size = self.model_config.get("max_batch_size", 1)
+        if max_batch_size <= 1:
+            return None
+        max_wait_ms = self.model_config.get("max_batch_wait_ms", 10)
+        LOG.info(f"Batching ask requests: max_batch_size={max_batch_size}|"
+                 f"max_batch_wait_ms={max_wait_ms}")
+        return BatchCollector(batch_handler=self._ask_model_batch,
+                              max_batch_size=max_batch_size,
+                              max_wait_ms=max_wait_ms,
+                              name=f"neon_llm_{self.name}_ask_batcher")
+
+    @property
+    def request_consumer_names(self) -> List[str]:
+        """
+        Names of the consumers of ask, score and discussion requests
+        """
+        return [f"neon_llm_{self.name}_ask_{idx}" for idx in
+                range(self.model_config.get("num_parallel_processes", 1))] + \
+            [f"neon_llm_{self.name}_score", f"neon_llm_{self.name}_discussion"]
 
     def register_consumers(self):
         for idx in range(self.model_config.get("num_parallel_processes", 1)):
@@ -74,17 +233,20 @@ class NeonLLMMQConnector(MQConnector, ABC):
                                    vhost=self.vhost,
                                    queue=self.queue_ask,
                                    callback=self.handle_request,
-                                   on_error=self.default_error_handler,)
+                                   on_error=self.default_error_handler,
+                                   auto_ack=False)
         self.register_consumer(name=f'neon_llm_{self.name}_score',
                                vhost=self.vhost,
                                queue=self.queue_score,
                                callback=self.handle_score_request,
-                               on_error=self.default_error_handler,)
+                               on_error=self.default_error_handler,
+                               auto_ack=False)
         self.register_consumer(name=f'neon_llm_{self.name}_discussion',
                                vhost=self.vhost,
                                queue=self.queue_opinion,
                                callback=self.handle_opinion_request,
-                               on_error=self.default_error_handler,)
+                               on_error=self.default_error_handler,
+                               auto_ack=False)
         self.register_subscriber(name=f'neon_llm_{self.name}_update_persona',
                                  vhost=self.vhost,
                                  exchange=self.exchange_persona_updated,
@@ -95,6 +257,11 @@ class NeonLLMMQConnector(MQConnector, ABC):
                                  exchange=self.exchange_persona_deleted,
                                  callback=self.handle_persona_delete,
                                  on_error=self.default_error_handler)
+        self.register_subscriber(name=f'neon_llm_{self.name}_cancel',
+                                 vhost=self.vhost,
+                                 exchange=self.exchange_cancel,
+                                 callback=self.handle_cancel_request,
+                                 on_error=self.default_error_handler)
 
     @property
     @abstractmethod
@@ -128,49 +295,296 @@ class NeonLLMMQConnector(MQConnector, ABC):
     def exchange_persona_deleted(self):
         return f"{self.name}_persona_deleted"
 
+    @property
+    def exchange_cancel(self):
+        return f"{self.name}_cancel"
+
     @property
     @abstractmethod
     def model(self) -> NeonLLM:
         pass
 
-    @create_mq_callback()
-    def handle_request(self, body: dict) -> Thread:
+    def create_model(self) -> NeonLLM:
+        """
+        Create another instance of `model` to use as a replica. Override if
+        the model class takes arguments other than its configuration.
+        """
+        return self.model.__class__(self.model.llm_config)
+
+    @property
+    def model_pool(self) -> ReplicaPool:
+        """
+        Pool of `model_replicas` model instances that requests are dispatched
+        to, the first of which is `model`
+        """
+        if self._model_pool is None:
+            with self._model_pool_lock:
+                if self._model_pool is None:
+                    self._model_pool = self._init_model_pool()
+        return self._model_pool
+
+    def _init_model_pool(self) -> ReplicaPool:
+        num_processes = self.model_config.get("model_processes", 0)
+        if num_processes > 0:
+            # Models run in worker processes; this process only dispatches
+            LOG.info(f"Dispatching requests to {num_processes} model "
+                     f"worker processes")
+            return ReplicaPool([ProcessModel(model_class=type(self.model),
+                                             config=self.model.llm_config)
+                                for _ in range(num_processes)])
+        replicas = [self.model]
+        for _ in range(self.model_config.get("model_replicas", 1) - 1):
+            replica = self.create_model()
+            # Replicas share cached responses
+            replica.response_cache = self.model.response_cache
+            replicas.append(replica)
+        if len(replicas) > 1:
+            LOG.info(f"Dispatching requests to {len(replicas)} model replicas")
+        return ReplicaPool(replicas)
+
+    @_reject_on_failure
+    @create_mq_callback(include_callback_props=('channel', 'method', 'body'))
+    def handle_request(self, channel, method, body: dict) -> Future:
         """
         Handles ask requests (response to prompt) from MQ to LLM
+        :param channel: MQ channel the request was received on
+        :param method: MQ delivery method of the request
         :param body: request body (dict)
         """
-        # Handle this asynchronously so multiple subminds can be handled
-        # concurrently
-        t = Thread(target=self._handle_request_async, args=(body,),
-                   daemon=True)
-        t.start()
-        return t
+        return self._submit_request("ask", self._handle_request_async, body,
+                                    channel, method)
 
-    @create_mq_callback()
-    def handle_score_request(self, body: dict):
+    @_reject_on_failure
+    @create_mq_callback(include_callback_props=('channel', 'method', 'body'))
+    def handle_score_request(self, channel, method, body: dict) -> Future:
         """
         Handles score requests (vote) from MQ to LLM
+        :param channel: MQ channel the request was received on
+        :param method: MQ delivery method of the request
         :param body: request body (dict)
         """
-        # Handle this asynchronously so multiple subminds can be handled
-        # concurrently
-        t = Thread(target=self._handle_score_async, args=(body,),
-                   daemon=True)
-        t.start()
-        return t
+        return self._submit_request("score", self._handle_score_async, body,
+                                    channel, method)
 
-    @create_mq_callback()
-    def handle_opinion_request(self, body: dict):
+    @_reject_on_failure
+    @create_mq_callback(include_callback_props=('channel', 'method', 'body'))
+    def handle_opinion_request(self, channel, method, body: dict) -> Future:
         """
         Handles opinion requests (discuss) from MQ to LLM
+        :param channel: MQ channel the request was received on
+        :param method: MQ delivery method of the request
         :param body: request body (dict)
         """
-        # Handle this asynchronously so multiple subminds can be handled
-        # concurrently
-        t = Thread(target=self._handle_opinion_async, args=(body,),
-                   daemon=True)
-        t.start()
-        return t
+        return self._submit_request("discussion", self._handle_opinion_async,
+                                    body, channel, method)
+
+    def _submit_request(self, request_type: str, handler: Callable[[dict], None],
+                        body: dict, channel=None, method=None) -> Future:
+        """
+        Queues a request on the worker pool for `request_type`. The MQ message
+        is acknowledged when a worker picks up the request, so requests beyond
+        the pool's capacity remain unacknowledged and are held by the broker
+        (up to the consumer prefetch limit). If the request cannot be queued,
+        the exception is raised and the message is rejected by the consumer.
+        :param request_type: one of `ask`, `score` or `discussion`
+        :param handler: method to handle the request body
+        :param body: request body (dict)
+        :param channel: MQ channel the request was received on
+        :param method: MQ delivery method of the request
+        :returns: Future resolved when the request has been handled
+        """
+        on_start = partial(self._ack_message, channel, method) \
+            if channel and method else None
+        self._personas_provider.touch_persona(body.get("persona"))
+        if self._event_loop:
+            return asyncio.run_coroutine_threadsafe(
+                self._run_coroutine_handler(request_type, body, on_start),
+                self._event_loop)
+        if self._scheduler:
+            handler = partial(self._run_scheduled, request_type, handler)
+        return self._executors[request_type].submit(handler, body,
+                                                    on_start=on_start)
+
+    def _run_scheduled(self, request_type: str,
+                       handler: Callable[[dict], None], body: dict):
+        """
+        Handles a request once the scheduler gives it a slot
+        """
+        with self._scheduler.slot(request_type):
+            handler(body)
+
+    async def _run_coroutine_handler(self, request_type: str, body: dict,
+                                     on_start: Optional[Callable[[], None]]):
+        """
+        Handles a request on the event loop once fewer than the configured
+        number of requests of `request_type` are in progress
+        """
+        handlers = {"ask": self._ahandle_request,
+                    "score": self._ahandle_score,
+                    "discussion": self._ahandle_opinion}
+        async with self._get_async_limit(request_type):
+            if on_start:
+                on_start()
+            if self._scheduler:
+                async with self._scheduler.aslot(request_type):
+                    await handlers[request_type](body)
+            else:
+                await handlers[request_type](body)
+
+    def _get_async_limit(self, request_type: str) -> asyncio.Semaphore:
+        """
+        Get the semaphore limiting concurrent requests of `request_type` on
+        the event loop. This must be called from the loop thread; on
+        Python < 3.10 a semaphore is bound to the loop it is created on.
+        """
+        if request_type not in self._async_limits:
+            self._async_limits[request_type] = asyncio.Semaphore(
+                self._executors[request_type].max_workers)
+        return self._async_limits[request_type]
+
+    @staticmethod
+    def _settle_message(channel, method, ack: bool = True):
+        """
+        Acknowledges or rejects (without requeue) a consumed message from any
+        thread, including the one running the channel's connection
+        """
+        if ack:
+            settle = partial(channel.basic_ack,
+                             delivery_tag=method.delivery_tag)
+        else:
+            settle = partial(channel.basic_nack,
+                             delivery_tag=method.delivery_tag, requeue=False)
+        connection = channel.connection
+        try:
+            if hasattr(connection, "ioloop"):
+                connection.ioloop.add_callback_threadsafe(settle)
+            else:
+                connection.add_callback_threadsafe(settle)
+        except Exception as e:
+            LOG.error(f"Failed to {'ack' if ack else 'nack'} message "
+                      f"{method.delivery_tag}: {e}")
+
+    def _ack_message(self, channel, method):
+        """
+        Acknowledges a message once its request has started
+        """
+        self._settle_message(channel, method)
+
+    def _nack_message(self, channel, method):
+        """
+        Rejects a message whose request could not be started
+        """
+        LOG.warning(f"Rejecting message {method.delivery_tag}")
+        self._settle_message(channel, method, ack=False)
+
+    def _send_response(self, response: dict, routing_key: str):
+        """
+        Sends a response to the requester, directly if the request was
+        received through the local transport and via MQ otherwise
+        :param response: response data
+        :param routing_key: `routing_key` of the request being responded to
+        """
+        if local_transport.deliver(routing_key, response):
+            return
+        self.send_message(request_data=response, queue=routing_key)
+
+    def _register_local_handlers(self):
+        """
+        Accept requests from persona bots in this process through the local
+        transport if `local_transport` is enabled in `model_config`
+        """
+        if not self.model_config.get("local_transport"):
+            return
+        for queue, request_type, handler in (
+                (self.queue_ask, "ask", self._handle_request_async),
+                (self.queue_score, "score", self._handle_score_async),
+                (self.queue_opinion, "discussion",
+                 self._handle_opinion_async)):
+            local_transport.register_handler(
+                queue, partial(self._submit_request, request_type, handler))
+        LOG.info("Accepting local requests from persona bots")
+
+    def _unregister_local_handlers(self):
+        for queue in (self.queue_ask, self.queue_score, self.queue_opinion):
+            local_transport.unregister_handler(queue)
+
+    @property
+    def model_ready(self) -> bool:
+        """
+        True once the model is loaded and warmed up
+        """
+        return self._model_ready.is_set()
+
+    def _load_model(self, consumer_names: Optional[tuple] = None,
+                    daemon: bool = False):
+        """
+        Load the model and tokenizer and run the `warmup_prompts` configured
+        in `model_config`, then start accepting requests
+        :param consumer_names: names of request consumers to start once ready
+        :param daemon: to kill consumer threads once main thread is over
+        """
+        start = time()
+        try:
+            for model in self.model_pool.replicas:
+                model.preload()
+        except Exception as e:
+            LOG.exception(f"Failed to preload model: {e}")
+        self._model_load_stats["load_time"] = time() - start
+        start = time()
+        warmup_prompts = self.model_config.get("warmup_prompts") or []
+        try:
+            for model in self.model_pool.replicas:
+                model.warmup(warmup_prompts)
+        except Exception as e:
+            LOG.exception(f"Model warmup failed: {e}")
+        self._model_load_stats["warmup_time"] = time() - start
+        self._model_ready.set()
+        LOG.info(f"Model ready: {self._model_load_stats}")
+        if not self.started:
+            LOG.warning("Connector stopped before the model was ready")
+            return
+        if consumer_names:
+            self.run_consumers(names=consumer_names, daemon=daemon)
+        self._register_local_handlers()
+
+    def check_health(self) -> bool:
+        if not self.model_ready:
+            LOG.info("Waiting for model to load")
+            return False
+        return super().check_health()
+
+    def get_metrics(self) -> dict:
+        """
+        Get runtime metrics for this service
+        """
+        metrics = {"executors": {request_type: executor.get_metrics()
+                                 for request_type, executor
+                                 in self._executors.items()}}
+        metrics["model"] = {"ready": self.model_ready,
+                            **self._model_load_stats}
+        replicas = self.model_pool.replicas
+        response_cache = getattr(replicas[0], "response_cache", None)
+        if response_cache is not None:
+            metrics["response_cache"] = response_cache.get_metrics()
+        if getattr(replicas[0], "history_token_budget", None):
+            metrics["history_truncation"] = {
+                "requests": replicas[0].truncated_requests,
+                "turns": replicas[0].truncated_turns}
+            for model in replicas[1:]:
+                metrics["history_truncation"]["requests"] += \
+                    model.truncated_requests
+                metrics["history_truncation"]["turns"] += model.truncated_turns
+        metrics["replicas"] = self.model_pool.get_metrics()
+        if self._ranking_cache is not None:
+            metrics["ranking_cache"] = self._ranking_cache.get_metrics()
+        metrics["coalesced"] = {"ask": self._ask_flights.get_metrics(),
+                                "ranking": self._ranking_flights.get_metrics()}
+        if self._scheduler:
+            metrics["scheduler"] = self._scheduler.get_metrics()
+        metrics["expired"] = dict(self._expired_requests)
+        metrics["cancellation"] = self._cancellations.get_metrics()
+        metrics["personas"] = self._personas_provider.get_metrics()
+        return metrics
 
     @create_mq_callback()
     def handle_persona_update(self, body: dict):
@@ -179,8 +593,11 @@ class NeonLLMMQConnector(MQConnector, ABC):
         for this LLM
         :param body: MQ message body containing persona data for update
         """
-        with self._persona_update_lock:
-            self._personas_provider.apply_persona_data(persona_data=body)
+        self._personas_provider.apply_persona_data(persona_data=body)
+        # Prefixes for the new definition are computed on first use by each
+        # replica that handles a request for the persona
+        for model in self.model_pool.replicas:
+            model.invalidate_persona_prefix(body)
 
     @create_mq_callback()
     def handle_persona_delete(self, body: dict):
@@ -189,10 +606,61 @@ class NeonLLMMQConnector(MQConnector, ABC):
         for this LLM
         :param body: MQ message body containing persona data for deletion
         """
-        with self._persona_update_lock:
-            self._personas_provider.remove_persona(body)
+        self._personas_provider.remove_persona(body)
+        for model in self.model_pool.replicas:
+            model.invalidate_persona_prefix(body)
+
+    @create_mq_callback()
+    def handle_cancel_request(self, body: dict):
+        """
+        Handles an emitted message cancelling an in-flight request
+        :param body: MQ message body containing the `message_id` to cancel
+        """
+        message_id = body.get("message_id")
+        if self._cancellations.cancel(message_id,
+                                      reason=body.get("reason") or
+                                      "cancel requested"):
+            LOG.info(f"Cancelled request {message_id}")
+
+    @contextmanager
+    def _track_cancellation(self, body: dict, use_deadline: bool = True) -> \
+            Iterator[CancellationToken]:
+        """
+        Get a token for a request that is cancelled at the request's deadline
+        or by a message on `exchange_cancel`
+        :param body: request body (dict)
+        :param use_deadline: if False, the request is only cancelled by a
+            message on `exchange_cancel`
+        """
+        key = body.get("message_id") or uuid4().hex
+        deadline = body.get(DEADLINE_KEY) if use_deadline else None
+        token = self._cancellations.register(key, deadline=deadline)
+        try:
+            yield token
+        finally:
+            self._cancellations.unregister(key)
+
+    def _drop_expired(self, request_type: str, body: dict) -> bool:
+        """
+        Check if the requester has stopped waiting for a response to a
+        request. Expired requests are counted and should not be handled.
+        :param request_type: one of `ask`, `score` or `discussion`
+        :param body: request body (dict)
+        :returns: True if the request is past its deadline
+        """
+        remaining = get_remaining_time(body)
+        if remaining is None or remaining > 0:
+            return False
+        with self._expired_lock:
+            self._expired_requests[request_type] += 1
+        LOG.warning(f"Dropping {request_type} request "
+                    f"{body.get('message_id')} {-remaining:.3f}s past its "
+                    f"deadline")
+        return True
 
     def _handle_request_async(self, request: dict):
+        if self._drop_expired("ask", request):
+            return
         message_id = request["message_id"]
         routing_key = request["routing_key"]
 
@@ -203,39 +671,104 @@ class NeonLLMMQConnector(MQConnector, ABC):
         # Default response if the model fails to respond
         response = 'Sorry, but I cannot respond to your message at the '\
                    'moment; please, try again later'
-        try:
-            response = self.model.ask(message=query, chat_history=history,
-                                      persona=persona)
-        except ValueError as err:
-            LOG.error(f'ValueError={err}')
-        except Exception as e:
-            LOG.exception(e)
+        # A stream's deadline applies to its start; the requester keeps
+        # waiting as long as chunks arrive, so only a cancel message stops it
+        is_stream = bool(request.get(STREAM_REQUEST_KEY))
+        with self._track_cancellation(request,
+                                      use_deadline=not is_stream) \
+                as cancel_token:
+            if is_stream:
+                self._stream_response(message_id=message_id,
+                                      routing_key=routing_key, query=query,
+                                      history=history, persona=persona,
+                                      default_response=response,
+                                      cancel_token=cancel_token)
+                LOG.info(f"Handled streamed ask request for query={query}")
+                return
+            try:
+                response = self._ask_model(message=query, chat_history=history,
+                                           persona=persona,
+                                           cancel_token=cancel_token)
+            except RequestCancelled as e:
+                LOG.info(f"Ask request {message_id} cancelled: {e}")
+                return
+            except ValueError as err:
+                LOG.error(f'ValueError={err}')
+            except Exception as e:
+                LOG.exception(e)
         api_response = LLMProposeResponse(message_id=message_id,
                                           response=response,
                                           routing_key=routing_key)
         LOG.debug(f"Sending response: {response}")
-        self.send_message(request_data=api_response.model_dump(),
-                          queue=routing_key)
+        self._send_response(api_response.model_dump(), routing_key)
         LOG.info(f"Handled ask request for query={query}")
 
+    def _stream_response(self, message_id: str, routing_key: str, query: str,
+                         history: List[List[str]], persona: dict,
+                         default_response: str,
+                         cancel_token: Optional[CancellationToken] = None):
+        """
+        Publishes response chunks to `routing_key` as the model generates
+        them, followed by a final message with the complete response. A
+        cancelled response is not completed.
+        """
+        chunks = []
+        is_local = local_transport.is_local_routing_key(routing_key)
+        with nullcontext() if is_local else \
+                self.create_mq_connection(vhost=self.vhost) as mq_conn:
+            def _publish(response: str, final: bool):
+                message = build_stream_message(message_id=message_id,
+                                               routing_key=routing_key,
+                                               response=response,
+                                               seq=len(chunks), final=final)
+                if is_local:
+                    local_transport.deliver(routing_key, message)
+                else:
+                    self.emit_mq_message(mq_conn, queue=routing_key,
+                                         request_data=message)
+
+            try:
+                with self.model_pool.acquire() as model:
+                    for chunk in model.ask_stream(message=query,
+                                                  chat_history=history,
+                                                  persona=persona,
+                                                  cancel_token=cancel_token):
+                        if not chunk:
+                            continue
+                        _publish(chunk, final=False)
+                        chunks.append(chunk)
+            except RequestCancelled as e:
+                LOG.info(f"Streamed request {message_id} cancelled after "
+                         f"{len(chunks)} chunks: {e}")
+                return
+            except ValueError as err:
+                LOG.error(f'ValueError={err}')
+            except Exception as e:
+                LOG.exception(e)
+            _publish("".join(chunks) or default_response, final=True)
+        LOG.debug(f"Sent {len(chunks)} response chunks to {routing_key}")
+
     def _handle_score_async(self, body: dict):
         """
         Handles score requests (vote) from MQ to LLM
         :param body: request body (dict)
         """
+        if self._drop_expired("score", body):
+            return
         message_id = body["message_id"]
         routing_key = body["routing_key"]
 
         query = body["query"]
         responses = body["responses"]
         persona = body.get("persona", {})
+        k = body.get(TOP_K_KEY)
 
         if not responses:
             sorted_answer_idx = []
         else:
             try:
-                sorted_answer_idx = self.model.get_sorted_answer_indexes(
-                    question=query, answers=responses, persona=persona)
+                sorted_answer_idx = self._get_sorted_answer_indexes(
+                    question=query, answers=responses, persona=persona, k=k)
             except ValueError as err:
                 LOG.error(f'ValueError={err}')
                 sorted_answer_idx = []
@@ -246,8 +779,7 @@ class NeonLLMMQConnector(MQConnector, ABC):
         api_response = LLMVoteResponse(message_id=message_id,
                                        routing_key=routing_key,
                                        sorted_answer_indexes=sorted_answer_idx)
-        self.send_message(request_data=api_response.model_dump(),
-                          queue=routing_key)
+        self._send_response(api_response.model_dump(), routing_key)
         LOG.info(f"Handled score request for query={query}")
 
     def _handle_opinion_async(self, body: dict):
@@ -255,6 +787,126 @@ class NeonLLMMQConnector(MQConnector, ABC):
         Handles opinion requests (discuss) from MQ to LLM
         :param body: request body (dict)
         """
+        if self._drop_expired("discussion", body):
+            return
+        message_id = body["message_id"]
+        routing_key = body["routing_key"]
+
+        query = body["query"]
+        options = body["options"]
+        persona = body.get("persona", {})
+        responses = list(options.values())
+
+        if not responses:
+            opinion = "Sorry, but I got no options to choose from."
+        else:
+            # Default opinion if the model fails to respond
+            opinion = "Sorry, but I experienced an issue trying to form "\
+                      "an opinion on this topic"
+            try:
+                sorted_answer_indexes = self._get_sorted_answer_indexes(
+                    question=query, answers=responses, persona=persona, k=1)
+                best_respondent_nick, best_response = list(options.items())[
+                    sorted_answer_indexes[0]]
+                with self._track_cancellation(body) as cancel_token:
+                    opinion = self._ask_model_for_opinion(
+                        respondent_nick=best_respondent_nick,
+                        question=query, answer=best_response, persona=persona,
+                        cancel_token=cancel_token)
+            except RequestCancelled as e:
+                LOG.info(f"Discuss request {message_id} cancelled: {e}")
+                return
+            except ValueError as err:
+                LOG.error(f'ValueError={err}')
+            except IndexError as err:
+                # Failed response will return an empty list
+                LOG.error(f'IndexError={err}')
+            except Exception as e:
+                LOG.exception(e)
+
+        api_response = LLMDiscussResponse(message_id=message_id,
+                                          routing_key=routing_key,
+                                          opinion=opinion)
+        self._send_response(api_response.model_dump(), routing_key)
+        LOG.info(f"Handled discuss request for query={query}")
+
+    async def _ahandle_request(self, request: dict):
+        """
+        Coroutine equivalent of `_handle_request_async`
+        """
+        if self._drop_expired("ask", request):
+            return
+        if request.get(STREAM_REQUEST_KEY):
+            await asyncio.to_thread(self._handle_request_async, request)
+            return
+        message_id = request["message_id"]
+        routing_key = request["routing_key"]
+
+        query = request["query"]
+        history = request["history"]
+        persona = request.get("persona", {})
+        LOG.debug(f"Request persona={persona}|key={routing_key}")
+        # Default response if the model fails to respond
+        response = 'Sorry, but I cannot respond to your message at the '\
+                   'moment; please, try again later'
+        try:
+            with self._track_cancellation(request) as cancel_token, \
+                    self.model_pool.acquire() as model:
+                response = await model.aask(message=query,
+                                            chat_history=history,
+                                            persona=persona,
+                                            cancel_token=cancel_token)
+        except RequestCancelled as e:
+            LOG.info(f"Ask request {message_id} cancelled: {e}")
+            return
+        except ValueError as err:
+            LOG.error(f'ValueError={err}')
+        except Exception as e:
+            LOG.exception(e)
+        api_response = LLMProposeResponse(message_id=message_id,
+                                          response=response,
+                                          routing_key=routing_key)
+        await asyncio.to_thread(self._send_response,
+                                api_response.model_dump(), routing_key)
+        LOG.info(f"Handled ask request for query={query}")
+
+    async def _ahandle_score(self, body: dict):
+        """
+        Coroutine equivalent of `_handle_score_async`
+        """
+        if self._drop_expired("score", body):
+            return
+        message_id = body["message_id"]
+        routing_key = body["routing_key"]
+
+        query = body["query"]
+        responses = body["responses"]
+        persona = body.get("persona", {})
+        k = body.get(TOP_K_KEY)
+
+        sorted_answer_idx = []
+        if responses:
+            try:
+                sorted_answer_idx = await self._aget_sorted_answer_indexes(
+                    question=query, answers=responses, persona=persona, k=k)
+            except ValueError as err:
+                LOG.error(f'ValueError={err}')
+            except Exception as e:
+                LOG.exception(e)
+
+        api_response = LLMVoteResponse(message_id=message_id,
+                                       routing_key=routing_key,
+                                       sorted_answer_indexes=sorted_answer_idx)
+        await asyncio.to_thread(self._send_response,
+                                api_response.model_dump(), routing_key)
+        LOG.info(f"Handled score request for query={query}")
+
+    async def _ahandle_opinion(self, body: dict):
+        """
+        Coroutine equivalent of `_handle_opinion_async`
+        """
+        if self._drop_expired("discussion", body):
+            return
         message_id = body["message_id"]
         routing_key = body["routing_key"]
 
@@ -270,13 +922,23 @@ class NeonLLMMQConnector(MQConnector, ABC):
             opinion = "Sorry, but I experienced an issue trying to form "\
                       "an opinion on this topic"
             try:
-                sorted_answer_indexes = self.model.get_sorted_answer_indexes(
-                    question=query, answers=responses, persona=persona)
+                sorted_answer_indexes = await self._aget_sorted_answer_indexes(
+                    question=query, answers=responses, persona=persona, k=1)
                 best_respondent_nick, best_response = list(options.items())[
                     sorted_answer_indexes[0]]
-                opinion = self._ask_model_for_opinion(
-                    respondent_nick=best_respondent_nick,
-                    question=query, answer=best_response, persona=persona)
+                prompt = self.compose_opinion_prompt(
+                    respondent_nick=best_respondent_nick, question=query,
+                    answer=best_response)
+                with self._track_cancellation(body) as cancel_token, \
+                        self.model_pool.acquire() as model:
+                    opinion = await model.aask(message=prompt,
+                                               chat_history=[],
+                                               persona=persona,
+                                               cancel_token=cancel_token)
+                LOG.info(f'Received LLM opinion={opinion}, prompt={prompt}')
+            except RequestCancelled as e:
+                LOG.info(f"Discuss request {message_id} cancelled: {e}")
+                return
             except ValueError as err:
                 LOG.error(f'ValueError={err}')
             except IndexError as err:
@@ -288,20 +950,157 @@ class NeonLLMMQConnector(MQConnector, ABC):
         api_response = LLMDiscussResponse(message_id=message_id,
                                           routing_key=routing_key,
                                           opinion=opinion)
-        self.send_message(request_data=api_response.model_dump(),
-                          queue=routing_key)
+        await asyncio.to_thread(self._send_response,
+                                api_response.model_dump(), routing_key)
         LOG.info(f"Handled discuss request for query={query}")
 
+    async def _aget_sorted_answer_indexes(self, question: str,
+                                          answers: List[str],
+                                          persona: dict,
+                                          k: Optional[int] = None) -> List[int]:
+        """
+        Coroutine equivalent of `_get_sorted_answer_indexes`. Rankings are
+        cached, but concurrent identical requests are not coalesced.
+        """
+        sorted_answer_indexes = self._get_cached_ranking(question, answers,
+                                                         persona, k)
+        if sorted_answer_indexes is not None:
+            return sorted_answer_indexes
+        with self.model_pool.acquire() as model:
+            if k:
+                sorted_answer_indexes = await model.aget_top_answer_indexes(
+                    question=question, answers=answers, persona=persona, k=k)
+            else:
+                sorted_answer_indexes = await model.aget_sorted_answer_indexes(
+                    question=question, answers=answers, persona=persona)
+        if self._ranking_cache is not None and sorted_answer_indexes:
+            self._ranking_cache.put(
+                self._get_ranking_cache_key(question, answers, persona, k),
+                list(sorted_answer_indexes))
+        return sorted_answer_indexes
+
     def _ask_model_for_opinion(self, respondent_nick: str, question: str,
-                               answer: str, persona: dict) -> str:
+                               answer: str, persona: dict,
+                               cancel_token: Optional[CancellationToken] = None
+                               ) -> str:
         prompt = self.compose_opinion_prompt(respondent_nick=respondent_nick,
                                              question=question,
                                              answer=answer)
-        opinion = self.model.ask(message=prompt, chat_history=[],
-                                 persona=persona)
+        opinion = self._ask_model(message=prompt, chat_history=[],
+                                  persona=persona, cancel_token=cancel_token)
         LOG.info(f'Received LLM opinion={opinion}, prompt={prompt}')
         return opinion
 
+    def _ask_model(self, message: str, chat_history: List[List[str]],
+                   persona: dict,
+                   cancel_token: Optional[CancellationToken] = None) -> str:
+        """
+        Get a response from the model. Identical concurrent requests share one
+        model call if `coalesce_requests` is enabled, unless the persona is
+        excluded from response caching.
+        """
+        if self._coalesce_requests and \
+                not self.model.is_response_cache_excluded(persona):
+            try:
+                return self._ask_flights.do(
+                    make_cache_key(persona, message, chat_history),
+                    self._call_model_ask, message, chat_history, persona,
+                    cancel_token)
+            except RequestCancelled:
+                if cancel_token is not None and cancel_token.cancelled:
+                    raise
+                # The shared call was cancelled by another request
+                LOG.debug("Shared model call cancelled; retrying")
+        return self._call_model_ask(message, chat_history, persona,
+                                    cancel_token)
+
+    def _call_model_ask(self, message: str, chat_history: List[List[str]],
+                        persona: dict,
+                        cancel_token: Optional[CancellationToken] = None
+                        ) -> str:
+        """
+        Get a response from the model, batching with other concurrent requests
+        if batching is enabled. Batched requests are only cancelled before
+        they are submitted.
+        """
+        if self._ask_batcher:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            return self._ask_batcher.submit((message, chat_history,
+                                             persona)).result()
+        with self.model_pool.acquire() as model:
+            return model.ask(message=message, chat_history=chat_history,
+                             persona=persona, cancel_token=cancel_token)
+
+    @staticmethod
+    def _get_ranking_cache_key(question: str, answers: List[str],
+                               persona: dict, k: Optional[int] = None) -> str:
+        if k:
+            return make_cache_key(persona, question, answers, k)
+        return make_cache_key(persona, question, answers)
+
+    def _get_cached_ranking(self, question: str, answers: List[str],
+                            persona: dict,
+                            k: Optional[int] = None) -> Optional[List[int]]:
+        """
+        Get a cached ranking of the same answers to the same question by the
+        same persona. A top-`k` request may use a cached full ranking.
+        """
+        if self._ranking_cache is None:
+            return None
+        sorted_answer_indexes = self._ranking_cache.get(
+            self._get_ranking_cache_key(question, answers, persona))
+        if sorted_answer_indexes is not None:
+            LOG.debug(f"Using cached ranking for question={question}")
+            return list(sorted_answer_indexes)[:k] if k else \
+                list(sorted_answer_indexes)
+        if k:
+            sorted_answer_indexes = self._ranking_cache.get(
+                self._get_ranking_cache_key(question, answers, persona, k))
+            if sorted_answer_indexes is not None:
+                return list(sorted_answer_indexes)
+        return None
+
+    def _get_sorted_answer_indexes(self, question: str, answers: List[str],
+                                   persona: dict,
+                                   k: Optional[int] = None) -> List[int]:
+        """
+        Get answer indexes sorted from best to worst, reusing a recent or
+        in-progress ranking of the same answers to the same question by the
+        same persona. If `k` is set, only the best `k` indexes are selected.
+        """
+        sorted_answer_indexes = self._get_cached_ranking(question, answers,
+                                                         persona, k)
+        if sorted_answer_indexes is not None:
+            return sorted_answer_indexes
+        cache_key = self._get_ranking_cache_key(question, answers, persona, k)
+        if self._coalesce_requests:
+            return self._ranking_flights.do(cache_key,
+                                            self._call_model_ranking,
+                                            question, answers, persona,
+                                            cache_key, k)
+        return self._call_model_ranking(question, answers, persona, cache_key,
+                                        k)
+
+    def _call_model_ranking(self, question: str, answers: List[str],
+                            persona: dict, cache_key: str,
+                            k: Optional[int] = None) -> List[int]:
+        with self.model_pool.acquire() as model:
+            if k:
+                sorted_answer_indexes = model.get_top_answer_indexes(
+                    question=question, answers=answers, persona=persona, k=k)
+            else:
+                sorted_answer_indexes = model.get_sorted_answer_indexes(
+                    question=question, answers=answers, persona=persona)
+        if self._ranking_cache is not None and sorted_answer_indexes:
+            self._ranking_cache.put(cache_key, list(sorted_answer_indexes))
+        return sorted_answer_indexes
+
+    def _ask_model_batch(self, requests: List[Tuple[str, List[List[str]],
+                                                    dict]]) -> List[str]:
+        with self.model_pool.acquire() as model:
+            return model.ask_batch(requests)
+
     @staticmethod
     @abstractmethod
     def compose_opinion_prompt(respondent_nick: str, question: str,
@@ -316,12 +1115,45 @@ class NeonLLMMQConnector(MQConnector, ABC):
 
     def run(self, run_consumers: bool = True, run_sync: bool = False,
             run_observer: Optional[bool] = None, **kwargs):
+        gated_consumers = tuple()
+        if self._preload_model and run_consumers:
+            # Request consumers are started once the model is ready
+            consumer_names = kwargs.get("consumer_names") or \
+                tuple(self.consumers)
+            gated_consumers = tuple(name for name in consumer_names
+                                    if name in self.request_consumer_names)
+            kwargs["consumer_names"] = tuple(
+                name for name in consumer_names
+                if name not in gated_consumers)
+            run_consumers = bool(kwargs["consumer_names"])
         MQConnector.run(self, run_consumers=run_consumers, run_sync=run_sync,
                         run_observer=run_observer, **kwargs)
         if not self.started:
             raise RuntimeError(f'Failed to connect to MQ. config={self.config}')
+        if self._preload_model:
+            Thread(target=self._load_model,
+                   kwargs={"consumer_names": gated_consumers,
+                           "daemon": kwargs.get("daemonize_consumers",
+                                                False)},
+                   name=f"neon_llm_{self.name}_preload", daemon=True).start()
+        else:
+            self._model_ready.set()
+            self._register_local_handlers()
         self._personas_provider.start_sync()
 
     def stop(self):
+        self._unregister_local_handlers()
         super().stop()
         self._personas_provider.stop_sync()
+        # Persona bots in this process share RPC clients
+        stop_rpc_clients()
+        if self._ask_batcher:
+            self._ask_batcher.shutdown()
+        for executor in self._executors.values():
+            executor.shutdown()
+        if self._model_pool is not None:
+            for model in self._model_pool.replicas:
+                if isinstance(model, ProcessModel):
+                    model.shutdown()
+        if self._event_loop:
+            self._event_loop.call_soon_threadsafe(self._event_loop.stop)
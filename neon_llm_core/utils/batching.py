@@ -0,0 +1,135 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from concurrent.futures import Future
+from queue import Queue, Empty
+from threading import Thread, Event, Lock
+from time import monotonic
+from typing import Any, Callable, List, Optional, Tuple
+
+from neon_utils.logger import LOG
+
+
+class BatchCollector:
+    """
+    Gathers items submitted concurrently from multiple threads into batches
+    and passes each batch to a single handler. A batch is dispatched once it
+    holds `max_batch_size` items or `max_wait_ms` have passed since its first
+    item arrived, whichever comes first.
+    """
+
+    def __init__(self, batch_handler: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 8, max_wait_ms: float = 10,
+                 name: Optional[str] = None):
+        """
+        @param batch_handler: Callable accepting a list of items and returning
+            a list of results in the same order
+        @param max_batch_size: Maximum number of items to dispatch at once
+        @param max_wait_ms: Maximum time to wait for a batch to fill
+        @param name: Optional name of the collector thread
+        """
+        self.batch_handler = batch_handler
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self.max_wait = max(float(max_wait_ms), 0) / 1000
+        self.name = name or self.__class__.__name__
+        self._queue: Queue[Tuple[Any, Future]] = Queue()
+        self._stopping = Event()
+        self._thread: Optional[Thread] = None
+        self._thread_lock = Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def submit(self, item: Any) -> Future:
+        """
+        Queue an item for the next batch
+        @param item: Item to pass to the batch handler
+        @returns: Future resolved with the handler result for `item`
+        """
+        future = Future()
+        if self._stopping.is_set():
+            future.set_exception(RuntimeError(f"{self.name} is stopped"))
+            return future
+        self._queue.put((item, future))
+        self._ensure_running()
+        return future
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """
+        Stop collecting batches. Items not yet dispatched are failed with a
+        `RuntimeError`.
+        @param timeout: Max seconds to wait for the collector thread to exit
+        """
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        while True:
+            try:
+                _, future = self._queue.get_nowait()
+            except Empty:
+                break
+            future.set_exception(RuntimeError(f"{self.name} is stopped"))
+
+    def _ensure_running(self):
+        with self._thread_lock:
+            if not self.is_running:
+                self._thread = Thread(target=self._run, name=self.name,
+                                      daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                batch = [self._queue.get(timeout=0.5)]
+            except Empty:
+                continue
+            deadline = monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - monotonic()
+                try:
+                    if remaining > 0:
+                        batch.append(self._queue.get(timeout=remaining))
+                    else:
+                        batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[Tuple[Any, Future]]):
+        items = [item for item, _ in batch]
+        LOG.debug(f"{self.name} dispatching batch of {len(items)}")
+        try:
+            results = self.batch_handler(items)
+            if len(results) != len(items):
+                raise ValueError(f"Expected {len(items)} results, got "
+                                 f"{len(results)}")
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
@@ -0,0 +1,132 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import json
+
+from collections import OrderedDict
+from hashlib import sha256
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Hashable, Optional
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    Build a stable key from JSON-serializable parts. Dict keys are sorted so
+    that equivalent inputs always produce the same key.
+    :param parts: values to include in the key
+    :returns: hex digest of the serialized parts
+    """
+    serialized = json.dumps(parts, sort_keys=True, default=str,
+                            separators=(",", ":"))
+    return sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache with optional time-to-live for cached values
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = 300,
+                 on_evict: Optional[Callable[[Hashable, Any], None]] = None):
+        """
+        @param max_size: maximum number of entries to keep
+        @param ttl: seconds an entry stays valid; None or 0 disables expiry
+        @param on_evict: optional callback with the key and value of each
+            entry dropped because the cache is full or the entry expired
+        """
+        self.max_size = max(int(max_size), 1)
+        self.ttl = ttl or None
+        self.on_evict = on_evict
+        self._entries: OrderedDict[Hashable, tuple] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a cached value and mark it as recently used
+        :param key: cache key
+        :param default: value to return if `key` is missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+        if entry is not None:
+            self._evicted([(key, entry)])
+        return default
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Cache a value, evicting the least recently used entry if full
+        :param key: cache key
+        :param value: value to cache
+        """
+        expires = monotonic() + self.ttl if self.ttl else None
+        evicted = list()
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                evicted.append(self._entries.popitem(last=False))
+                self.evictions += 1
+        self._evicted(evicted)
+
+    def _evicted(self, entries: list):
+        """
+        Pass dropped entries to `on_evict`, outside of the cache lock
+        """
+        if not self.on_evict:
+            return
+        for key, (value, _) in entries:
+            self.on_evict(key, value)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return entry[0] if entry else default
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_metrics(self) -> dict:
+        return {"size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions}
@@ -0,0 +1,194 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import heapq
+
+from threading import Condition, Event, Lock, Thread
+from time import time
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from neon_utils.logger import LOG
+
+
+class RequestCancelled(Exception):
+    """
+    Raised when work is abandoned because its request was cancelled
+    """
+
+
+class CancellationToken:
+    """
+    Signals that the result of a request is no longer needed. Models may poll
+    `cancelled` between steps, or register a callback to abort a call in
+    progress.
+    """
+
+    def __init__(self):
+        self._event = Event()
+        self._lock = Lock()
+        self._callbacks: List[Callable[[], None]] = list()
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: Optional[str] = None):
+        """
+        Cancel the request and run any registered callbacks
+        @param reason: optional description of why the request was cancelled
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, list()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                LOG.exception(f"Cancellation callback failed: {e}")
+
+    def add_callback(self, callback: Callable[[], None]):
+        """
+        Call `callback` when the request is cancelled, or immediately if it
+        already has been
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def raise_if_cancelled(self):
+        """
+        @raises RequestCancelled: if the request has been cancelled
+        """
+        if self._event.is_set():
+            raise RequestCancelled(self.reason)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the request to be cancelled
+        @param timeout: maximum seconds to wait
+        @returns: True if the request was cancelled
+        """
+        return self._event.wait(timeout)
+
+
+class CancellationRegistry:
+    """
+    Tracks tokens of in-flight requests so they can be cancelled by key or
+    when their deadline passes
+    """
+
+    def __init__(self, name: str = "cancellation"):
+        """
+        @param name: Name of the deadline thread
+        """
+        self.name = name
+        self._tokens: Dict[Hashable, CancellationToken] = dict()
+        self._deadlines: List[Tuple[float, int, Hashable,
+                                    CancellationToken]] = list()
+        self._counter = 0
+        self._condition = Condition()
+        self._thread: Optional[Thread] = None
+        self.cancelled = 0
+        self.expired = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tokens)
+
+    def register(self, key: Hashable,
+                 deadline: Optional[float] = None) -> CancellationToken:
+        """
+        Create a token for a request
+        @param key: identifies the request, e.g. its `message_id`
+        @param deadline: optional time (seconds since the epoch) at which the
+            request is cancelled
+        @returns: token for the request
+        """
+        token = CancellationToken()
+        with self._condition:
+            self._tokens[key] = token
+            if deadline is not None:
+                self._counter += 1
+                heapq.heappush(self._deadlines,
+                               (deadline, self._counter, key, token))
+                if self._thread is None:
+                    self._thread = Thread(target=self._expire_deadlines,
+                                          name=self.name, daemon=True)
+                    self._thread.start()
+                self._condition.notify()
+        return token
+
+    def unregister(self, key: Hashable):
+        """
+        Stop tracking a request that has completed
+        """
+        with self._condition:
+            self._tokens.pop(key, None)
+
+    def cancel(self, key: Hashable, reason: Optional[str] = None) -> bool:
+        """
+        Cancel a tracked request
+        @param key: identifies the request
+        @param reason: optional description of why the request was cancelled
+        @returns: True if a request with `key` was in flight
+        """
+        with self._condition:
+            token = self._tokens.pop(key, None)
+            if token is None:
+                return False
+            self.cancelled += 1
+        token.cancel(reason)
+        return True
+
+    def _expire_deadlines(self):
+        while True:
+            expired = list()
+            with self._condition:
+                while not self._deadlines:
+                    self._condition.wait()
+                now = time()
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    _, _, key, token = heapq.heappop(self._deadlines)
+                    # Completed requests have already been unregistered
+                    if self._tokens.get(key) is token:
+                        self._tokens.pop(key)
+                        self.expired += 1
+                        expired.append(token)
+                if not expired and self._deadlines:
+                    self._condition.wait(self._deadlines[0][0] - now)
+            for token in expired:
+                token.cancel("deadline exceeded")
+
+    def get_metrics(self) -> dict:
+        return {"in_flight": self.in_flight,
+                "cancelled": self.cancelled,
+                "expired": self.expired}
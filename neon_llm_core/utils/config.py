@@ -72,6 +72,20 @@ def load_config() -> Union[dict, None]:
             return config
 
 
+def load_mq_handler_config() -> dict:
+    """
+    Load the MQ configuration used for client requests, falling back to
+    default `mq_handler` credentials if none are configured
+    """
+    config = load_ovos_config().get("MQ") or \
+        mq_connector_client_utils._default_mq_config
+    if not config["users"].get("mq_handler"):
+        LOG.warning("mq_handler not configured, using default credentials")
+        config["users"]["mq_handler"] = \
+            mq_connector_client_utils._default_mq_config["users"]["mq_handler"]
+    return config
+
+
 @dataclass
 class LLMMQConfig:
     ask_response_queue: str
@@ -27,3 +27,4 @@
 LLM_VHOST = '/llm'
 DEFAULT_RESPONSE = "I have nothing to say here..."
 DEFAULT_VOTE = "abstain"
+TOP_K_KEY = "k"
@@ -0,0 +1,65 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from time import time
+from typing import Optional
+
+# Request field holding the time (seconds since the epoch) after which the
+# requester no longer waits for a response
+DEADLINE_KEY = "deadline"
+
+
+def set_deadline(request_data: dict, timeout: float) -> dict:
+    """
+    Set the deadline of a request that will be waited on for `timeout`
+    :param request_data: serialized request to update
+    :param timeout: seconds the requester will wait for a response
+    :returns: `request_data`
+    """
+    request_data[DEADLINE_KEY] = time() + timeout
+    return request_data
+
+
+def get_remaining_time(request: dict) -> Optional[float]:
+    """
+    Get the seconds until a request's deadline
+    :param request: serialized request
+    :returns: seconds remaining (negative if expired), or None if the request
+        has no deadline
+    """
+    deadline = request.get(DEADLINE_KEY)
+    if deadline is None:
+        return None
+    return deadline - time()
+
+
+def is_expired(request: dict) -> bool:
+    """
+    Check if the requester is no longer waiting for a response to `request`
+    :param request: serialized request
+    """
+    remaining = get_remaining_time(request)
+    return remaining is not None and remaining <= 0
@@ -0,0 +1,113 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from time import monotonic
+from typing import Callable, Optional
+
+from neon_utils.logger import LOG
+
+from neon_llm_core.utils.metrics import TimingStats
+
+
+class BoundedExecutor:
+    """
+    Runs tasks on a fixed number of worker threads and records how long each
+    task waited for a worker and how long it took to execute.
+    """
+
+    def __init__(self, max_workers: int, name: str):
+        """
+        @param max_workers: Maximum number of tasks to run concurrently
+        @param name: Name used as the worker thread prefix and in logs
+        """
+        self.max_workers = max(int(max_workers), 1)
+        self.name = name
+        self.queue_wait = TimingStats()
+        self.execution = TimingStats()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix=name)
+        self._lock = Lock()
+        self._pending = 0
+        self._active = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of submitted tasks waiting for a worker"""
+        return self._pending
+
+    @property
+    def active(self) -> int:
+        """Number of tasks currently executing"""
+        return self._active
+
+    def submit(self, fn: Callable, *args,
+               on_start: Optional[Callable[[], None]] = None,
+               **kwargs) -> Future:
+        """
+        Schedule `fn(*args, **kwargs)` to run on a worker thread.
+        @param fn: Callable to execute
+        @param on_start: Optional callback run by the worker right before `fn`
+        @returns: Future resolved with the return value of `fn`
+        """
+        submitted = monotonic()
+        with self._lock:
+            self._pending += 1
+
+        def _run():
+            started = monotonic()
+            with self._lock:
+                self._pending -= 1
+                self._active += 1
+            self.queue_wait.record(started - submitted)
+            try:
+                if on_start:
+                    on_start()
+                return fn(*args, **kwargs)
+            except Exception as e:
+                LOG.exception(f"{self.name} task failed: {e}")
+                raise e
+            finally:
+                self.execution.record(monotonic() - started)
+                with self._lock:
+                    self._active -= 1
+
+        return self._executor.submit(_run)
+
+    def get_metrics(self) -> dict:
+        return {"max_workers": self.max_workers,
+                "pending": self._pending,
+                "active": self._active,
+                "queue_wait": self.queue_wait.as_dict(),
+                "execution": self.execution.as_dict()}
+
+    def shutdown(self, wait: bool = False):
+        """
+        Stop accepting tasks and cancel any that have not started
+        @param wait: If True, block until running tasks complete
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,164 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from concurrent.futures import Future
+from queue import Queue, Empty
+from threading import Lock
+from typing import Callable, Dict, Optional
+from uuid import uuid4
+
+from neon_utils.logger import LOG
+
+from neon_llm_core.utils.streaming import STREAM_REQUEST_KEY, StreamAssembler
+
+LOCAL_ROUTING_KEY_PREFIX = "neon_llm_local."
+
+
+class LocalTransport:
+    """
+    In-memory request path between persona bots and an LLM connector running
+    in the same process. A connector registers a handler for each of its
+    request queues; requests to those queues are passed directly to the
+    handler and responses are returned through an in-memory queue instead of
+    being routed through the MQ broker.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, Callable[[dict], Future]] = dict()
+        self._responses: Dict[str, Queue] = dict()
+        self._lock = Lock()
+
+    def register_handler(self, queue: str,
+                         handler: Callable[[dict], Future]):
+        """
+        Register a handler for requests to `queue`
+        :param queue: name of the MQ queue the handler consumes
+        :param handler: method accepting a request body
+        """
+        with self._lock:
+            self._handlers[queue] = handler
+        LOG.debug(f"Registered local handler for {queue}")
+
+    def unregister_handler(self, queue: str):
+        """
+        Remove the handler for `queue`; later requests use MQ
+        :param queue: name of the MQ queue the handler consumes
+        """
+        with self._lock:
+            self._handlers.pop(queue, None)
+
+    def has_handler(self, queue: str) -> bool:
+        return queue in self._handlers
+
+    def is_local_routing_key(self, routing_key: str) -> bool:
+        return routing_key in self._responses
+
+    def deliver(self, routing_key: str, response: dict) -> bool:
+        """
+        Deliver a response to a local caller
+        :param routing_key: `routing_key` of the request being responded to
+        :param response: response data
+        :returns: True if the response was delivered locally
+        """
+        with self._lock:
+            responses = self._responses.get(routing_key)
+        if responses is None:
+            return False
+        responses.put(response)
+        return True
+
+    def request(self, queue: str, request_data: dict,
+                timeout: int = 30) -> dict:
+        """
+        Pass a request to the local handler for `queue` and wait for the
+        response
+        :param queue: MQ queue the request is addressed to
+        :param request_data: request data
+        :param timeout: seconds to wait for a response
+        :returns: response data, or an empty dict on timeout
+        """
+        routing_key, responses = self._send(queue, request_data)
+        try:
+            return responses.get(timeout=timeout)
+        except Empty:
+            LOG.error(f"Timeout waiting for local response from {queue}")
+            return dict()
+        finally:
+            self._release(routing_key)
+
+    def stream_request(self, queue: str, request_data: dict,
+                       on_chunk: Optional[Callable[[str], None]] = None,
+                       timeout: int = 30) -> Optional[dict]:
+        """
+        Pass a request for a streamed response to the local handler for
+        `queue` and collect all chunks
+        :param queue: MQ queue the request is addressed to
+        :param request_data: request data
+        :param on_chunk: optional callback for each chunk as it arrives
+        :param timeout: seconds to wait for the next message
+        :returns: final response message, or None if incomplete
+        """
+        request_data = dict(request_data)
+        request_data[STREAM_REQUEST_KEY] = True
+        routing_key, responses = self._send(queue, request_data)
+        assembler = StreamAssembler()
+        try:
+            while not assembler.complete:
+                for chunk in assembler.add(responses.get(timeout=timeout)):
+                    if on_chunk:
+                        on_chunk(chunk)
+            return assembler.final_message
+        except Empty:
+            LOG.error(f"Timeout waiting for local stream from {queue}")
+            return None
+        finally:
+            self._release(routing_key)
+
+    def _send(self, queue: str, request_data: dict):
+        handler = self._handlers.get(queue)
+        if not handler:
+            raise KeyError(f"No local handler for {queue}")
+        request_data = dict(request_data)
+        request_data['message_id'] = request_data.get('message_id') or \
+            uuid4().hex
+        routing_key = f"{LOCAL_ROUTING_KEY_PREFIX}{uuid4().hex}"
+        request_data['routing_key'] = routing_key
+        responses = Queue()
+        with self._lock:
+            self._responses[routing_key] = responses
+        try:
+            handler(request_data)
+        except Exception:
+            self._release(routing_key)
+            raise
+        return routing_key, responses
+
+    def _release(self, routing_key: str):
+        with self._lock:
+            self._responses.pop(routing_key, None)
+
+
+local_transport = LocalTransport()
@@ -0,0 +1,130 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from bisect import bisect_left
+from threading import Lock
+from typing import Optional, Sequence
+
+
+class TimingStats:
+    """
+    Thread-safe accumulator of durations for reporting service metrics
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def record(self, duration: float):
+        """
+        Add one measurement
+        @param duration: measured duration in seconds
+        """
+        with self._lock:
+            self.count += 1
+            self.total += duration
+            self.max = max(self.max, duration)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {"count": self.count,
+                    "total": round(self.total, 6),
+                    "mean": round(self.mean, 6),
+                    "max": round(self.max, 6)}
+
+
+class LatencyHistogram:
+    """
+    Thread-safe histogram of durations with fixed bucket bounds, for
+    estimating latency percentiles
+    """
+
+    default_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                       5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, buckets: Optional[Sequence[float]] = None):
+        """
+        @param buckets: Increasing upper bounds (seconds) of the buckets
+        """
+        self.buckets = tuple(buckets or self.default_buckets)
+        self._lock = Lock()
+        # The last bucket counts durations above the largest bound
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, duration: float):
+        """
+        Add one measurement
+        @param duration: measured duration in seconds
+        """
+        with self._lock:
+            self._counts[bisect_left(self.buckets, duration)] += 1
+            self.count += 1
+            self.max = max(self.max, duration)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile as the upper bound of the bucket containing it
+        @param q: quantile between 0 and 1
+        @returns: estimated duration in seconds, at most the largest recorded
+        """
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for idx, count in enumerate(self._counts):
+                seen += count
+                if seen >= rank and count:
+                    if idx < len(self.buckets):
+                        return min(self.buckets[idx], self.max)
+                    break
+            return self.max
+
+    def as_dict(self) -> dict:
+        """
+        Get cumulative counts of durations less than or equal to each bucket
+        bound, with estimated median and 99th percentile
+        """
+        with self._lock:
+            cumulative = dict()
+            seen = 0
+            for bound, count in zip(self.buckets, self._counts):
+                seen += count
+                cumulative[str(bound)] = seen
+            cumulative["+Inf"] = self.count
+            metrics = {"count": self.count, "max": round(self.max, 6),
+                       "buckets": cumulative}
+        metrics["p50"] = round(self.quantile(0.5), 6)
+        metrics["p99"] = round(self.quantile(0.99), 6)
+        return metrics
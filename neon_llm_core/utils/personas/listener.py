@@ -0,0 +1,282 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+
+from dataclasses import dataclass, field
+from functools import partial
+from threading import Event, Lock, Thread, current_thread
+from time import time
+from typing import Callable, Dict, List, Optional
+
+from neon_mq_connector.utils.client_utils import NeonMQHandler
+from neon_mq_connector.utils.network_utils import b64_to_dict, dict_to_b64
+from neon_utils.logger import LOG
+from pika.exchange_type import ExchangeType
+
+
+@dataclass
+class ListenedPersona:
+    """
+    Queues consumed on behalf of a hibernated persona
+    """
+    service_name: str
+    nick: str
+    conversations: dict
+    consumer_tags: List[str] = field(default_factory=list)
+
+
+class PersonaListener:
+    """
+    Listens for chat activity addressed to hibernated personas of an LLM
+    service, so that their `LLMBot`s can be started on demand. For each
+    persona, the listener consumes the queues its bot would consume under the
+    same nick, so the persona remains available to conversations while its
+    bot is not running. All personas share one connection and I/O thread;
+    other threads hand it work with `add_callback_threadsafe`.
+    """
+
+    # Queues of a persona's bot and the `LLMBot` handler for their messages
+    PERSONA_QUEUES = (("invite", "handle_invite"),
+                      ("kick_out", None),
+                      ("shout", "_on_mentioned_user_message"))
+    # Exchanges for messages to all bots and the `LLMBot` handler for messages
+    # in a persona's conversations
+    CONVERSATION_EXCHANGES = (("proctor_shout", "_on_mentioned_user_message"),
+                              ("proctor_ping", "handle_proctor_ping"))
+
+    def __init__(self, config: dict, vhost: str,
+                 on_activity: Callable[[str, str, dict], None],
+                 mq_user: str = "neon_llm_submind"):
+        """
+        @param config: MQ configuration
+        @param vhost: MQ vhost of the personas' `LLMBot`s
+        @param on_activity: called with a persona ID, the name of the `LLMBot`
+            handler and the message body for each message the persona's bot
+            should handle
+        @param mq_user: configured MQ user to connect as
+        """
+        self.config = config
+        self.vhost = vhost
+        self.mq_user = mq_user
+        self._on_activity = on_activity
+        self._handler: Optional[NeonMQHandler] = None
+        self._channel = None
+        self._thread: Optional[Thread] = None
+        self._stopping = Event()
+        self._personas: Dict[str, ListenedPersona] = dict()
+        self._personas_lock = Lock()
+
+    @property
+    def is_alive(self) -> bool:
+        return bool(self._thread and self._thread.is_alive() and
+                    not self._stopping.is_set())
+
+    @property
+    def persona_ids(self) -> List[str]:
+        with self._personas_lock:
+            return list(self._personas)
+
+    def start(self):
+        """
+        Connect to MQ, subscribe to conversation messages and start the I/O
+        thread. Queues of personas that are already registered are consumed
+        again, so a stopped listener can be restarted.
+        """
+        self._stopping.clear()
+        self._handler = NeonMQHandler(config=self.config,
+                                      service_name=self.mq_user,
+                                      vhost=self.vhost)
+        self._channel = self._handler.connection.channel()
+        for exchange, handler_name in self.CONVERSATION_EXCHANGES:
+            self._channel.exchange_declare(
+                exchange=exchange, exchange_type=ExchangeType.fanout.value,
+                auto_delete=False)
+            queue = self._channel.queue_declare(
+                queue='', exclusive=True).method.queue
+            self._channel.queue_bind(queue=queue, exchange=exchange)
+            self._channel.basic_consume(
+                queue=queue, auto_ack=True,
+                on_message_callback=partial(self._on_conversation_message,
+                                            handler_name))
+        for persona_id in self.persona_ids:
+            self._listen(persona_id)
+        self._thread = Thread(target=self._run, daemon=True,
+                              name=f"persona_listener_{self.vhost}")
+        self._thread.start()
+        LOG.info(f"Started persona listener on {self.vhost}")
+
+    def stop(self):
+        """
+        Stop the I/O thread and close the connection. Personas stay
+        registered until the listener is started again.
+        """
+        self._stopping.set()
+        if self._thread and self._thread is not current_thread():
+            self._thread.join(timeout=5)
+        if self._handler:
+            try:
+                self._handler.shutdown()
+            except Exception as e:
+                LOG.warning(f"Failed to cleanly stop persona listener: {e}")
+            self._handler = None
+        with self._personas_lock:
+            for persona in self._personas.values():
+                persona.consumer_tags.clear()
+
+    def add_persona(self, persona_id: str, service_name: str, service_id: str,
+                    conversations: Optional[dict] = None):
+        """
+        Start consuming the queues of a persona's bot
+        @param persona_id: ID of the persona
+        @param service_name: service name of the persona's `LLMBot`
+        @param service_id: service ID of the persona's `LLMBot`
+        @param conversations: conversations the persona's bot was part of,
+            keyed by `cid`
+        """
+        with self._personas_lock:
+            self._personas[persona_id] = ListenedPersona(
+                service_name=service_name, nick=f"{service_name}-{service_id}",
+                conversations=dict(conversations or {}))
+        self._call(self._listen, persona_id)
+
+    def remove_persona(self, persona_id: str, disconnect: bool = True):
+        """
+        Stop consuming the queues of a persona's bot. Returns once the
+        listener no longer receives messages for the persona.
+        @param persona_id: ID of the persona
+        @param disconnect: announce the persona as disconnected; this should be
+            False when the persona's bot takes over its nick
+        """
+        with self._personas_lock:
+            persona = self._personas.pop(persona_id, None)
+        if persona:
+            self._call(self._unlisten, persona, disconnect)
+
+    def get_conversations(self, persona_id: str) -> dict:
+        """
+        Get the conversations a persona is part of, keyed by `cid`
+        @param persona_id: ID of the persona
+        """
+        with self._personas_lock:
+            persona = self._personas.get(persona_id)
+            return dict(persona.conversations) if persona else {}
+
+    def _call(self, fn: Callable, *args):
+        """
+        Run `fn` on the I/O thread and wait for it to complete. Nothing is
+        run while the listener is stopped; `start` consumes the queues of
+        registered personas.
+        """
+        if not self.is_alive:
+            return
+        if current_thread() is self._thread:
+            fn(*args)
+            return
+        done = Event()
+
+        def _run():
+            try:
+                fn(*args)
+            except Exception as e:
+                LOG.error(f"Persona listener call failed: {e}")
+            finally:
+                done.set()
+
+        self._handler.connection.add_callback_threadsafe(_run)
+        if not done.wait(timeout=10):
+            LOG.warning(f"Timed out waiting for persona listener: {fn}")
+
+    def _listen(self, persona_id: str):
+        with self._personas_lock:
+            persona = self._personas.get(persona_id)
+        if persona is None or persona.consumer_tags:
+            return
+        for suffix, handler_name in self.PERSONA_QUEUES:
+            queue = f"{persona.nick}_{suffix}"
+            self._channel.queue_declare(queue=queue, auto_delete=False)
+            persona.consumer_tags.append(self._channel.basic_consume(
+                queue=queue, auto_ack=True,
+                on_message_callback=partial(self._on_persona_message,
+                                            persona_id, handler_name)))
+        self._announce(persona, 'connection')
+
+    def _unlisten(self, persona: ListenedPersona, disconnect: bool):
+        for consumer_tag in persona.consumer_tags:
+            self._channel.basic_cancel(consumer_tag)
+        persona.consumer_tags.clear()
+        if disconnect:
+            self._announce(persona, 'disconnection')
+
+    def _announce(self, persona: ListenedPersona, exchange: str):
+        self._channel.exchange_declare(
+            exchange=exchange, exchange_type=ExchangeType.fanout.value,
+            auto_delete=False)
+        self._channel.basic_publish(
+            exchange=exchange, routing_key='',
+            body=dict_to_b64({'nick': persona.nick,
+                              'service_name': persona.service_name,
+                              'time': int(time())}))
+
+    def _on_persona_message(self, persona_id: str,
+                            handler_name: Optional[str], _channel, _method,
+                            _properties, body: bytes):
+        """
+        Pass a message from one of a persona's queues on to be handled by the
+        persona's bot; kick outs are handled by the listener
+        @param persona_id: ID of the persona the queue belongs to
+        @param handler_name: name of the `LLMBot` method to handle the message
+        """
+        message = b64_to_dict(body)
+        if handler_name is None:
+            with self._personas_lock:
+                persona = self._personas.get(persona_id)
+                if persona:
+                    persona.conversations.pop(message.get('cid'), None)
+            return
+        LOG.debug(f"{persona_id} received message for {handler_name}")
+        self._on_activity(persona_id, handler_name, message)
+
+    def _on_conversation_message(self, handler_name: str, _channel, _method,
+                                 _properties, body: bytes):
+        """
+        Pass a message sent to all bots on to the bots of personas that are
+        part of the message's conversation
+        @param handler_name: name of the `LLMBot` method to handle the message
+        """
+        message = b64_to_dict(body)
+        with self._personas_lock:
+            persona_ids = [persona_id for persona_id, persona
+                           in self._personas.items()
+                           if message.get('cid') in persona.conversations]
+        for persona_id in persona_ids:
+            LOG.debug(f"{persona_id} received message for {handler_name}")
+            self._on_activity(persona_id, handler_name, message)
+
+    def _run(self):
+        try:
+            while not self._stopping.is_set():
+                self._handler.connection.process_data_events(time_limit=0.5)
+        except Exception as e:
+            LOG.error(f"Persona listener connection failed: {e}")
+            self._stopping.set()
@@ -23,9 +23,12 @@
 # LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import json
 import os
+from random import uniform
+from threading import Event, Thread
 from time import time
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from neon_data_models.models.api.llm import (
     LLMPersona,
@@ -49,6 +52,12 @@ class PersonasProvider:
 
     PERSONA_STATE_TTL = int(os.getenv("PERSONA_STATE_TTL", 15 * 60))
     PERSONA_SYNC_INTERVAL = int(os.getenv("PERSONA_SYNC_INTERVAL", 0))
+    PERSONA_SYNC_JITTER = float(os.getenv("PERSONA_SYNC_JITTER", 0.1))
+    PERSONA_SNAPSHOT_DIR = os.getenv(
+        "PERSONA_SNAPSHOT_DIR",
+        os.path.join(os.getenv("XDG_CACHE_HOME",
+                               os.path.expanduser("~/.cache")),
+                     "neon", "llm_personas"))
     GET_CONFIGURED_PERSONAS_QUEUE = "get_configured_personas"
 
     def __init__(self, service_name: str, ovos_config: dict):
@@ -57,18 +66,47 @@ class PersonasProvider:
                                                             ovos_config=ovos_config)
         self._personas = []  # list of personas available for given service
         self._persona_last_sync = 0
+        self._persona_restore_time = 0
         self._persona_sync_thread = None
+        self.last_sync_stats = {}
+        self._persona_version = None
+        self._sync_stopped = Event()
 
     @property
     def persona_sync_thread(self) -> RepeatingTimer:
         """Creates new synchronization thread which fetches Klat personas"""
         if not (isinstance(self._persona_sync_thread, RepeatingTimer) and
                 self._persona_sync_thread.is_alive()):
-            self._persona_sync_thread = RepeatingTimer(self.PERSONA_SYNC_INTERVAL,
+            self._persona_sync_thread = RepeatingTimer(self._get_sync_interval(),
                                                        self._fetch_persona_config)
             self._persona_sync_thread.daemon = True
         return self._persona_sync_thread
 
+    def _get_sync_interval(self) -> float:
+        """
+        Get the time until the next sync, randomized by up to
+        PERSONA_SYNC_JITTER of PERSONA_SYNC_INTERVAL so that replicas do not
+        all request personas at the same time
+        """
+        jitter = self.PERSONA_SYNC_INTERVAL * self.PERSONA_SYNC_JITTER
+        return max(self.PERSONA_SYNC_INTERVAL + uniform(-jitter, jitter), 1)
+
+    @property
+    def snapshot_path(self) -> Optional[str]:
+        """Path to the snapshot of the last synced personas, if enabled"""
+        if not self.PERSONA_SNAPSHOT_DIR:
+            return None
+        return os.path.join(self.PERSONA_SNAPSHOT_DIR,
+                            f"{self.service_name}.json")
+
+    def get_metrics(self) -> dict:
+        """
+        Get persona bot lifecycle metrics and the result of the last sync
+        """
+        metrics = self._persona_handlers_state.get_metrics()
+        metrics["last_sync"] = dict(self.last_sync_stats)
+        return metrics
+
     @property
     def personas(self) -> List[LLMPersona]:
         return self._personas
@@ -114,17 +152,70 @@ class PersonasProvider:
         return (not (self._persona_last_sync == 0 and data)
                 and int(time()) - self._persona_last_sync > self.PERSONA_STATE_TTL)
 
+    def _is_persona_state_expired(self) -> bool:
+        """
+        Checks if PERSONA_STATE_TTL has passed since personas were last synced
+        with the provider or, if they have not been synced yet, since they
+        were restored from a snapshot. Personas never expire if
+        PERSONA_SYNC_INTERVAL is disabled.
+
+        returns: True if current personas are older than PERSONA_STATE_TTL
+        """
+        if self.PERSONA_SYNC_INTERVAL <= 0:
+            return False
+        updated = self._persona_last_sync or self._persona_restore_time
+        return int(time()) - updated > self.PERSONA_STATE_TTL
+
+    @staticmethod
+    def _has_persona_data(persona_response: dict) -> bool:
+        """
+        Checks if a response came from the provider, rather than being empty
+        because the request failed or timed out
+
+        :param persona_response: response from the provider
+        """
+        return 'items' in persona_response or \
+            'deleted' in persona_response or \
+            bool(persona_response.get('delta'))
+
     def _fetch_persona_config(self):
         """
         Get personas from a provider on the MQ bus and update the internal
-        `personas` reference.
+        `personas` reference. If a previous response included a `version`,
+        only changes since that version are requested; a full snapshot is
+        requested if the provider's changes do not start at that version.
         """
-        response = send_mq_request(
+        response = self._request_persona_config(
+            since_version=self._persona_version)
+        if response.get('delta') and \
+                response.get('base_version') != self._persona_version:
+            LOG.warning(f"Persona changes start at version "
+                        f"{response.get('base_version')}, expected "
+                        f"{self._persona_version} - requesting all personas")
+            response = self._request_persona_config()
+        self.parse_persona_config_response(response)
+        if self._has_persona_data(response):
+            self._save_persona_snapshot()
+        if self._persona_sync_thread:
+            self._persona_sync_thread.interval = self._get_sync_interval()
+
+    def _request_persona_config(self, since_version=None) -> dict:
+        """
+        Request personas from a provider on the MQ bus
+
+        :param since_version: version of the last applied response, to request
+            only personas changed or deleted since then
+
+        returns: response from the provider
+        """
+        request_data = {"service_name": self.service_name}
+        if since_version is not None:
+            request_data["since_version"] = since_version
+        return send_mq_request(
             vhost=LLM_VHOST,
-            request_data={"service_name": self.service_name},
+            request_data=request_data,
             target_queue=PersonasProvider.GET_CONFIGURED_PERSONAS_QUEUE,
             timeout=60)
-        self.parse_persona_config_response(response)
 
     def parse_persona_config_response(self, persona_response: dict):
         """
@@ -134,17 +225,94 @@ class PersonasProvider:
         :param persona_response: A dictionary containing the response data with
                                  persona information.
                                  Expected to contain a key 'items' holding a list of
-                                 persona details.
+                                 persona details. If 'delta' is True, 'items'
+                                 only holds changed personas and 'deleted'
+                                 holds identities of deleted personas.
+                                 An optional 'version' identifies the state
+                                 of the provider's personas. A response
+                                 without persona data (e.g. if the request
+                                 timed out) leaves running personas
+                                 unchanged until PERSONA_STATE_TTL expires.
         """
-        if 'items' in persona_response:
+        if self._has_persona_data(persona_response):
             self._persona_last_sync = int(time())
-        response_data = persona_response.get('items', [])
-        active_personas = []
-        for persona_data in response_data:
-            applied_persona = self.apply_persona_data(persona_data=persona_data)
-            if applied_persona:
-                active_personas.append(applied_persona)
-        self.personas = active_personas
+        elif self._persona_handlers_state.has_connected_personas() and \
+                not self._is_persona_state_expired():
+            LOG.warning("No personas received - keeping current personas")
+            return self.last_sync_stats
+        return self._apply_persona_config(persona_response)
+
+    def _apply_persona_config(self, persona_response: dict) -> Dict[str, int]:
+        """
+        Applies personas from a provider response or snapshot to the current
+        personas, without counting as a sync with the provider
+
+        :param persona_response: persona data as described in
+                                 `parse_persona_config_response`
+
+        returns: counts of personas added, changed, removed and unchanged
+        """
+        previous_hashes = self._persona_handlers_state.persona_hashes
+        if persona_response.get('delta'):
+            self._apply_persona_delta(persona_response)
+        else:
+            personas = [self._validate_persona_data(persona_data)
+                        for persona_data in persona_response.get('items', [])]
+            self.personas = self._add_personas(
+                [persona for persona in personas if persona])
+        self._persona_version = persona_response.get('version')
+        self.last_sync_stats = self._get_sync_stats(
+            previous_hashes, self._persona_handlers_state.persona_hashes)
+        LOG.info(f"Synced personas: {self.last_sync_stats}")
+        return self.last_sync_stats
+
+    def _apply_persona_delta(self, persona_response: dict):
+        """
+        Applies changed and deleted personas to the current personas
+
+        :param persona_response: A dictionary containing changed personas in
+                                 'items' and identities of deleted personas
+                                 in 'deleted'
+        """
+        changed_items = persona_response.get('items', [])
+        deleted_items = persona_response.get('deleted', [])
+        if not (changed_items or deleted_items):
+            LOG.debug("No persona changes")
+            return
+        personas = {persona.id: persona for persona in self._personas}
+        for persona_data in deleted_items:
+            persona_identity = self._validate_persona_identity(persona_identity_data=persona_data)
+            if persona_identity:
+                personas.pop(persona_identity.id, None)
+        changed_personas = [self._validate_persona_data(persona_data)
+                            for persona_data in changed_items]
+        changed_personas = [persona for persona in changed_personas if persona]
+        for persona in changed_personas:
+            personas.pop(persona.id, None)
+        for persona in self._add_personas(changed_personas):
+            personas[persona.id] = persona
+        self.personas = list(personas.values())
+
+    @staticmethod
+    def _get_sync_stats(previous_hashes: Dict[str, str],
+                        current_hashes: Dict[str, str]) -> Dict[str, int]:
+        """
+        Count the personas added, changed, removed and unchanged between two
+        sets of running persona definitions
+
+        :param previous_hashes: persona ID to definition hash before a sync
+        :param current_hashes: persona ID to definition hash after a sync
+
+        returns: dict of counts for each kind of change
+        """
+        kept = set(previous_hashes) & set(current_hashes)
+        unchanged = sum(1 for persona_id in kept
+                        if previous_hashes[persona_id] ==
+                        current_hashes[persona_id])
+        return {"added": len(set(current_hashes) - set(previous_hashes)),
+                "changed": len(kept) - unchanged,
+                "removed": len(set(previous_hashes) - set(current_hashes)),
+                "unchanged": unchanged}
 
     def apply_persona_data(self, persona_data: dict) -> Optional[LLMPersona]:
         """
@@ -219,8 +387,9 @@ class PersonasProvider:
 
         new_persona = self._persona_handlers_state.add_persona_handler(persona=persona)
 
-        if new_persona:
-            LOG.info(f"Persona {persona.id} updated successfully")
+        if new_persona or self._is_assigned_elsewhere(persona):
+            if new_persona:
+                LOG.info(f"Persona {persona.id} updated successfully")
 
             # Once first manually configured persona added - pruning default personas
             if self._persona_handlers_state.default_personas_running:
@@ -238,6 +407,37 @@ class PersonasProvider:
 
         return True
 
+    def _add_personas(self, personas: List[LLMPersona]) -> List[LLMPersona]:
+        """
+        Adds incoming personas concurrently, following the same rules as
+        `_add_persona`.
+
+        :param personas: `LLMPersona` instances to add to the `PersonaHandlersState` container
+
+        :returns: personas that were added, were already running, or are
+                  run by another replica
+        """
+        state = self._persona_handlers_state
+        new_bots = state.add_persona_handlers(personas)
+        if state.default_personas_running and \
+                (any(new_bots) or any(self._is_assigned_elsewhere(persona)
+                                      for persona in personas)):
+            LOG.info("Starting to remove default personas")
+            state.clean_up_personas(ignore_items=personas)
+            state.default_personas_running = False
+            LOG.info("Completed removing of default personas")
+        connected_persona_ids = set(state.connected_persona_ids)
+        return [persona for persona in personas
+                if persona.id in connected_persona_ids or
+                self._is_assigned_elsewhere(persona)]
+
+    def _is_assigned_elsewhere(self, persona: LLMPersona) -> bool:
+        """
+        Check if an enabled persona is run by another replica of this service
+        """
+        return persona.enabled and \
+            not self._persona_handlers_state.is_assigned(persona.id)
+
     def remove_persona(self, persona_data: dict):
         """
         Removes a persona from the active persona handlers state.
@@ -260,19 +460,91 @@ class PersonasProvider:
         else:
             LOG.warning("No running personas detected - skipping persona removal")
 
+    def _save_persona_snapshot(self):
+        """
+        Write the current personas to `snapshot_path` so they can be restored
+        on the next start without waiting for the MQ bus.
+        """
+        if not self.snapshot_path:
+            return
+        snapshot = {"version": self._persona_version,
+                    "items": [persona.model_dump(mode="json")
+                              for persona in self._personas]}
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            LOG.error(f"Failed to write persona snapshot: {e}")
+
+    def _load_persona_snapshot(self) -> bool:
+        """
+        Apply personas from `snapshot_path`, if it exists.
+
+        returns: True if a snapshot was applied
+        """
+        if not (self.snapshot_path and os.path.isfile(self.snapshot_path)):
+            return False
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            LOG.error(f"Failed to read persona snapshot: {e}")
+            return False
+        LOG.info(f"Restoring {len(snapshot.get('items', []))} personas from "
+                 f"{self.snapshot_path}")
+        # Restored personas do not count as synced, so they expire
+        # PERSONA_STATE_TTL after restoring unless the provider responds
+        self._persona_restore_time = int(time())
+        self._apply_persona_config(snapshot)
+        return True
+
+    def touch_persona(self, persona_data: Optional[dict]):
+        """
+        Record use of a persona in a request to the LLM, activating its bot if
+        it is hibernated. Only applies if `lazy_personas` is enabled. Requests
+        are not routed by persona, so this only has an effect on the replica
+        that the persona is assigned to; personas are otherwise activated by
+        chat messages addressed to them.
+
+        :param persona_data: persona included in an LLM request
+        """
+        if not (persona_data and self._persona_handlers_state.lazy_personas):
+            return
+        persona_id = persona_data.get('id')
+        if not persona_id:
+            persona_identity = self._validate_persona_identity(
+                persona_identity_data=dict(persona_data))
+            if not persona_identity:
+                return
+            persona_id = persona_identity.id
+        self._persona_handlers_state.touch_persona(persona_id)
+
     def start_sync(self):
         """
-        Update personas and start thread to periodically update from a service
-        on the MQ bus.
+        Restore personas from the last snapshot, then update personas from a
+        service on the MQ bus in a background thread and start a thread to
+        periodically update them.
         """
+        self._sync_stopped.clear()
+        self._load_persona_snapshot()
+        Thread(target=self._initial_sync, daemon=True,
+               name=f"{self.service_name}_persona_sync").start()
+
+    def _initial_sync(self):
         self._fetch_persona_config()
-        if self.PERSONA_SYNC_INTERVAL > 0:
+        if self.PERSONA_SYNC_INTERVAL > 0 and not self._sync_stopped.is_set():
             self.persona_sync_thread.start()
 
     def stop_sync(self):
         """
         Stop persona updates from the MQ bus.
         """
+        self._sync_stopped.set()
+        self._persona_handlers_state.stop_idle_check()
+        self._persona_handlers_state.stop_listener()
         if self._persona_sync_thread:
             self._persona_sync_thread.cancel()
             self._persona_sync_thread = None
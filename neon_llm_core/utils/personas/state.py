@@ -26,13 +26,62 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import os
+
 from functools import cached_property
-from threading import Lock
-from typing import Dict, List, Optional
+from threading import Lock, RLock
+from time import monotonic
+from typing import Callable, Dict, List, Optional, Union
+from uuid import uuid4
 
 from neon_data_models.models.api.llm import LLMPersona
+from neon_mq_connector.utils import RepeatingTimer
 from neon_utils.logger import LOG
 from neon_llm_core.chatbot import LLMBot
+from neon_llm_core.utils.cache import make_cache_key
+from neon_llm_core.utils.executor import BoundedExecutor
+from neon_llm_core.utils.metrics import TimingStats
+from neon_llm_core.utils.personas.listener import PersonaListener
+from neon_llm_core.utils.sharding import is_assigned
+
+
+def get_persona_hash(persona: LLMPersona) -> str:
+    """
+    Get a stable hash of a persona definition. Personas with equal fields
+    have equal hashes, regardless of how the definition was received.
+    :param persona: persona definition to hash
+    """
+    return make_cache_key(persona.model_dump(mode="json"))
+
+
+class HibernatedBot:
+    """
+    Placeholder for a persona whose `LLMBot` is not running. The service's
+    shared `PersonaListener` triggers activation of the persona when a chat
+    message is addressed to it.
+    """
+
+    def __init__(self, persona: LLMPersona,
+                 listener: Optional[PersonaListener] = None):
+        self.persona = persona
+        self.listener = listener
+
+    @property
+    def conversations(self) -> dict:
+        """
+        Conversations the persona is part of, keyed by `cid`
+        """
+        return self.listener.get_conversations(self.persona.id) \
+            if self.listener else {}
+
+    def stop(self, disconnect: bool = True):
+        """
+        Stop listening for messages to the persona
+        :param disconnect: announce the persona as disconnected
+        """
+        if self.listener:
+            self.listener.remove_persona(self.persona.id,
+                                         disconnect=disconnect)
 
 
 class PersonaHandlersState:
@@ -41,23 +90,127 @@ class PersonaHandlersState:
     all configured personas.
     """
 
+    # Personas are divided among replicas of a service when REPLICA_COUNT > 1
+    REPLICA_ID = int(os.getenv("PERSONA_REPLICA_ID", 0))
+    REPLICA_COUNT = int(os.getenv("PERSONA_REPLICA_COUNT", 1))
+
     def __init__(self, service_name: str, ovos_config: dict):
-        self._created_items: Dict[str, LLMBot] = {}
+        self._created_items: Dict[str, Union[LLMBot, HibernatedBot]] = {}
+        # Guards changes to `_created_items` across personas; per-persona
+        # locks only serialize changes to the same persona
+        self._created_items_lock = Lock()
+        self._persona_hashes: Dict[str, str] = {}
+        # Bots of a persona keep one nick when hibernated and activated
+        self._service_ids: Dict[str, str] = {}
         self.service_name = service_name
         self.ovos_config = ovos_config
         self.mq_config = ovos_config.get('MQ', {})
         self.default_personas_running = False
 
         self.personas_clean_up_lock = Lock()
-        self.personas_remove_lock = Lock()
+        self._persona_locks: Dict[str, RLock] = {}
+        self._persona_locks_lock = Lock()
+        self._lifecycle_executor = BoundedExecutor(
+            max_workers=self.llm_config.get("persona_workers", 8),
+            name=f"{service_name}_personas")
+        self.start_timing = TimingStats()
+        self.stop_timing = TimingStats()
+        self._persona_timings: Dict[str, Dict[str, float]] = {}
+        self._last_used: Dict[str, float] = {}
+        # One listener consumes the queues of all hibernated personas
+        self._listener: Optional[PersonaListener] = None
+        self._listener_lock = Lock()
+        self.lazy_personas = self.llm_config.get("lazy_personas", False)
+        self.idle_timeout = self.llm_config.get("persona_idle_timeout", 0)
+        self.max_active_personas = self.llm_config.get("max_active_personas",
+                                                       0)
+        self._idle_check_thread = None
+        if self.lazy_personas and self.idle_timeout > 0:
+            self._idle_check_thread = RepeatingTimer(
+                min(self.idle_timeout, 60), self.hibernate_idle_personas)
+            self._idle_check_thread.daemon = True
+            self._idle_check_thread.start()
 
     @cached_property
     def default_personas(self):
         return self.ovos_config.get("llm_bots", {}).get(self.service_name, [])
 
+    @property
+    def llm_config(self) -> dict:
+        return self.ovos_config.get(f"LLM_{self.service_name.upper()}") or {}
+
     @property
     def connected_persona_ids(self) -> List[str]:
-        return list(self._created_items)
+        with self._created_items_lock:
+            return list(self._created_items)
+
+    @property
+    def active_persona_ids(self) -> List[str]:
+        """
+        IDs of personas with a running `LLMBot`
+        """
+        with self._created_items_lock:
+            return [persona_id for persona_id, bot
+                    in self._created_items.items()
+                    if not isinstance(bot, HibernatedBot)]
+
+    @property
+    def persona_hashes(self) -> Dict[str, str]:
+        """
+        Mapping of connected persona IDs to the hash of their definition
+        """
+        return dict(self._persona_hashes)
+
+    def get_metrics(self) -> dict:
+        """
+        Get bot start and stop durations, overall and for each persona
+        """
+        return {"start": self.start_timing.as_dict(),
+                "stop": self.stop_timing.as_dict(),
+                "personas": {persona_id: dict(timings) for persona_id, timings
+                             in self._persona_timings.items()},
+                "executor": self._lifecycle_executor.get_metrics(),
+                "active": len(self.active_persona_ids),
+                "hibernated": len(self._created_items) -
+                len(self.active_persona_ids)}
+
+    def _get_persona_lock(self, persona_id: str) -> RLock:
+        with self._persona_locks_lock:
+            return self._persona_locks.setdefault(persona_id, RLock())
+
+    def _record_timing(self, persona_id: str, operation: str,
+                       duration: float):
+        stats = self.start_timing if operation == "start" else \
+            self.stop_timing
+        stats.record(duration)
+        self._persona_timings.setdefault(persona_id, {})[operation] = \
+            round(duration, 6)
+
+    def _run_concurrently(self, fn: Callable, items: list) -> list:
+        """
+        Call `fn` with each of `items` on the lifecycle worker pool
+        :param fn: method to call
+        :param items: arguments to call `fn` with
+        :return: list of results in the order of `items`; None for any call
+                 that raised an exception
+        """
+        futures = [self._lifecycle_executor.submit(fn, item)
+                   for item in items]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception:
+                # Exception is logged by the executor
+                results.append(None)
+        return results
+
+    def is_assigned(self, persona_id: str) -> bool:
+        """
+        Check if this replica is responsible for running a persona
+        :param persona_id: ID of the persona to check
+        """
+        return is_assigned(persona_id, self.REPLICA_ID, self.REPLICA_COUNT)
 
     def has_connected_personas(self) -> bool:
         return bool(self._created_items)
@@ -69,10 +222,9 @@ class PersonaHandlersState:
         if self.default_personas and not self.default_personas_running:
             self.clean_up_personas()
             LOG.info(f"Initializing default personas for: {self.service_name}")
-            for persona in self.default_personas:
-                self.add_persona_handler(
-                    persona=LLMPersona.model_validate(obj=persona)
-                )
+            self.add_persona_handlers(
+                [LLMPersona.model_validate(obj=persona)
+                 for persona in self.default_personas])
             self.default_personas_running = True
         else:
             if self.default_personas_running:
@@ -80,17 +232,46 @@ class PersonaHandlersState:
             elif not self.default_personas:
                 LOG.warning('Default personas not configured')
 
-    def add_persona_handler(self, persona: LLMPersona) -> Optional[LLMBot]:
+    def add_persona_handlers(self, personas: List[LLMPersona]) -> \
+            List[Optional[Union[LLMBot, HibernatedBot]]]:
+        """
+        Calls `add_persona_handler` for each of `personas` concurrently
+        :param personas: Persona definitions to generate LLMBot instances of
+        :return: list of results of `add_persona_handler` for each persona
+        """
+        bots = self._run_concurrently(self.add_persona_handler, personas)
+        # Keep new bots in the requested order rather than start order
+        with self._created_items_lock:
+            for persona, bot in zip(personas, bots):
+                if bot is not None and \
+                        self._created_items.get(persona.id) is bot:
+                    self._created_items[persona.id] = \
+                        self._created_items.pop(persona.id)
+        return bots
+
+    def add_persona_handler(self, persona: LLMPersona) -> \
+            Optional[Union[LLMBot, HibernatedBot]]:
         """
         Creates an `LLMBot` instance for the given persona if the persona does
-        not yet exist AND the persona is not disabled in configuration.
+        not yet exist AND the persona is not disabled in configuration. If
+        `lazy_personas` is enabled, the persona is registered with a
+        `HibernatedBot` placeholder and its `LLMBot` is started on first use.
+        Personas assigned to other replicas are skipped.
         :param persona: Persona definition to generate an LLMBot instance of
-        :return: New or existing LLMBot instance or None if the persona is
-                 disabled
+        :return: New LLMBot instance or placeholder, or None if the persona is
+                 disabled or unchanged
         """
-        persona_dict = persona.model_dump()
-        if persona.id in list(self._created_items):
-            if self._created_items[persona.id].persona != persona_dict:
+        with self._get_persona_lock(persona.id):
+            return self._add_persona_handler(persona)
+
+    def _add_persona_handler(self, persona: LLMPersona) -> \
+            Optional[Union[LLMBot, HibernatedBot]]:
+        if not self.is_assigned(persona.id):
+            LOG.debug(f"Persona '{persona.id}' is assigned to another replica")
+            return
+        persona_hash = get_persona_hash(persona)
+        if persona.id in self.connected_persona_ids:
+            if self._persona_hashes.get(persona.id) != persona_hash:
                 LOG.info(f"Received new data for persona: '{persona.id}' - removing old instance")
                 self.remove_persona(persona_id=persona.id)
             else:
@@ -99,31 +280,250 @@ class PersonaHandlersState:
         if not persona.enabled:
             LOG.warning(f"Skipping disabled persona: '{persona.id}'")
             return
-        # Get a configured username to use for LLM submind connections
-        persona_id = f"{persona.id}_{self.service_name}"
-        self.ovos_config["MQ"]["users"][persona_id] = self.mq_config['users']['neon_llm_submind']
+        if self.lazy_personas:
+            LOG.info(f"Registered persona: '{persona.id}'")
+            placeholder = self._hibernate_bot(persona)
+            self._persona_hashes[persona.id] = persona_hash
+            return placeholder
+        return self._start_bot(persona)
+
+    def _get_bot_service_name(self, persona: LLMPersona) -> str:
+        """
+        Get the service name of the bot for `persona`, registering the
+        configured username to use for LLM submind connections
+        """
+        service_name = f"{persona.id}_{self.service_name}"
+        self.ovos_config["MQ"]["users"][service_name] = self.mq_config['users']['neon_llm_submind']
+        return service_name
+
+    def _get_listener(self) -> PersonaListener:
+        """
+        Get the listener for hibernated personas, starting it if needed
+        """
+        with self._listener_lock:
+            if self._listener is None:
+                self._listener = PersonaListener(
+                    config=self.ovos_config["MQ"], vhost="/chatbots",
+                    on_activity=self._on_persona_activity)
+            if not self._listener.is_alive:
+                try:
+                    self._listener.stop()
+                    self._listener.start()
+                except Exception as ex:
+                    LOG.error(f"Failed to start persona listener, "
+                              f"ex={str(ex)}")
+            return self._listener
+
+    def stop_listener(self):
+        """
+        Stop listening for messages to hibernated personas
+        """
+        with self._listener_lock:
+            if self._listener:
+                self._listener.stop()
+
+    def _hibernate_bot(self, persona: LLMPersona,
+                       conversations: Optional[dict] = None) -> HibernatedBot:
+        """
+        Registers a `HibernatedBot` for `persona` and listens for chat
+        messages addressed to the persona
+        :param persona: persona to register
+        :param conversations: conversations the persona is part of
+        """
+        listener = self._get_listener()
+        listener.add_persona(
+            persona.id, service_name=self._get_bot_service_name(persona),
+            service_id=self._service_ids.setdefault(persona.id, uuid4().hex),
+            conversations=conversations)
+        placeholder = HibernatedBot(persona, listener)
+        with self._created_items_lock:
+            self._created_items[persona.id] = placeholder
+        return placeholder
+
+    def _on_persona_activity(self, persona_id: str, handler_name: str,
+                             message: dict):
+        """
+        Activate a hibernated persona in the background and pass it a message
+        received for it by the `PersonaListener`
+        :param persona_id: ID of the persona the message is addressed to
+        :param handler_name: name of the `LLMBot` method to handle the message
+        :param message: message body
+        """
+        self._last_used[persona_id] = monotonic()
+        self._lifecycle_executor.submit(self._activate_and_handle, persona_id,
+                                        handler_name, message)
+
+    def _activate_and_handle(self, persona_id: str, handler_name: str,
+                             message: dict):
+        bot = self.activate_persona(persona_id)
+        if bot is None or isinstance(bot, HibernatedBot):
+            LOG.warning(f"Dropping message for inactive persona: "
+                        f"'{persona_id}'")
+            return
+        getattr(bot, handler_name)(None, None, None, message)
+
+    def _start_bot(self, persona: LLMPersona,
+                   conversations: Optional[dict] = None) -> LLMBot:
+        """
+        Creates and starts an `LLMBot` for `persona`
+        :param persona: persona to start a bot for
+        :param conversations: conversations the persona is part of
+        """
+        persona_dict = persona.model_dump()
+        persona_id = self._get_bot_service_name(persona)
         bot = LLMBot(llm_name=self.service_name, service_name=persona_id,
                      persona=persona_dict, config=self.ovos_config,
-                     vhost="/chatbots")
+                     vhost="/chatbots",
+                     stream_responses=self.llm_config.get("stream_responses",
+                                                          False),
+                     use_rpc_client=self.llm_config.get("use_rpc_client",
+                                                        True),
+                     use_local_transport=self.llm_config.get(
+                         "local_transport", False),
+                     request_timeout=self.llm_config.get("request_timeout",
+                                                         30))
+        bot._service_id = self._service_ids.setdefault(persona.id,
+                                                       bot.service_id)
+        bot.current_conversations.update(conversations or {})
+        self._track_activity(persona.id, bot)
+        started = monotonic()
         bot.run()
+        self._record_timing(persona.id, "start", monotonic() - started)
         LOG.info(f"Started chatbot: {bot.service_name}")
-        self._created_items[persona.id] = bot
+        with self._created_items_lock:
+            self._created_items[persona.id] = bot
+        self._persona_hashes[persona.id] = get_persona_hash(persona)
+        self._last_used[persona.id] = monotonic()
         return bot
 
+    def _track_activity(self, persona_id: str, bot: LLMBot):
+        """
+        Record use of a persona whenever its running bot receives a message,
+        so that bots in active conversations are not hibernated as idle
+        :param persona_id: ID of the persona
+        :param bot: running bot of the persona
+        """
+        handle_incoming_shout = bot.handle_incoming_shout
+
+        def _handle_incoming_shout(message_data: dict):
+            self._last_used[persona_id] = monotonic()
+            return handle_incoming_shout(message_data)
+
+        bot.handle_incoming_shout = _handle_incoming_shout
+
+    def touch_persona(self, persona_id: str):
+        """
+        Record use of a persona, activating it in the background if it is
+        hibernated
+        :param persona_id: ID of the persona that was used
+        """
+        if persona_id not in self._created_items:
+            return
+        self._last_used[persona_id] = monotonic()
+        if isinstance(self._created_items.get(persona_id), HibernatedBot):
+            self._lifecycle_executor.submit(self.activate_persona, persona_id)
+
+    def activate_persona(self, persona_id: str) -> Optional[LLMBot]:
+        """
+        Start the `LLMBot` for a hibernated persona. If `max_active_personas`
+        bots are already running, the least recently used one is hibernated.
+        :param persona_id: ID of the persona to activate
+        :return: running LLMBot instance or None if the persona is not
+                 registered
+        """
+        if not isinstance(self._created_items.get(persona_id), HibernatedBot):
+            return self._created_items.get(persona_id)
+        # Hibernate other personas before taking this persona's lock
+        self._enforce_active_limit()
+        with self._get_persona_lock(persona_id):
+            bot = self._created_items.get(persona_id)
+            if not isinstance(bot, HibernatedBot):
+                return bot
+            LOG.info(f"Activating persona: '{persona_id}'")
+            # The bot takes over the listener's queues and nick
+            conversations = bot.conversations
+            bot.stop(disconnect=False)
+            try:
+                return self._start_bot(bot.persona, conversations)
+            except Exception:
+                self._hibernate_bot(bot.persona, conversations)
+                raise
+
+    def hibernate_persona(self, persona_id: str):
+        """
+        Stop the `LLMBot` for a persona, keeping it registered so it can be
+        activated again
+        :param persona_id: ID of the persona to hibernate
+        """
+        with self._get_persona_lock(persona_id):
+            bot = self._created_items.get(persona_id)
+            if bot is None or isinstance(bot, HibernatedBot):
+                return
+            LOG.info(f"Hibernating persona: '{persona_id}'")
+            started = monotonic()
+            try:
+                bot.stop()
+            except Exception as ex:
+                LOG.warning(f'Failed to gracefully stop persona={persona_id!r}, ex={str(ex)}')
+            self._record_timing(persona_id, "stop", monotonic() - started)
+            self._hibernate_bot(bot.persona,
+                                dict(getattr(bot, "current_conversations",
+                                             None) or {}))
+
+    def hibernate_idle_personas(self):
+        """
+        Hibernate personas that have not been used in `persona_idle_timeout`
+        seconds
+        """
+        now = monotonic()
+        idle_persona_ids = [
+            persona_id for persona_id in self.active_persona_ids
+            if now - self._last_used.get(persona_id, now) > self.idle_timeout]
+        self._run_concurrently(self.hibernate_persona, idle_persona_ids)
+
+    def _enforce_active_limit(self):
+        """
+        Hibernate least recently used personas until a new one can be
+        activated without exceeding `max_active_personas`
+        """
+        if not self.max_active_personas:
+            return
+        active_persona_ids = sorted(
+            self.active_persona_ids,
+            key=lambda persona_id: self._last_used.get(persona_id, 0))
+        excess = len(active_persona_ids) - self.max_active_personas + 1
+        for persona_id in active_persona_ids[:max(excess, 0)]:
+            self.hibernate_persona(persona_id)
+
+    def stop_idle_check(self):
+        """
+        Stop checking for idle personas to hibernate
+        """
+        if self._idle_check_thread:
+            self._idle_check_thread.cancel()
+            self._idle_check_thread = None
+
     def clean_up_personas(self, ignore_items: List[LLMPersona] = None):
         with self.personas_clean_up_lock:
-            connected_personas = set(self._created_items)
+            connected_personas = set(self.connected_persona_ids)
             ignored_persona_ids = set(persona.id for persona in ignore_items or [])
             personas_to_remove = connected_personas - ignored_persona_ids
-            for persona_id in personas_to_remove:
-                self.remove_persona(persona_id=persona_id)
+            self._run_concurrently(self.remove_persona,
+                                   list(personas_to_remove))
 
     def remove_persona(self, persona_id: str):
-        with self.personas_remove_lock:
+        with self._get_persona_lock(persona_id):
             if persona_id in self._created_items:
                 try:
                     LOG.info(f'Removing persona_id = {persona_id}')
+                    started = monotonic()
                     self._created_items[persona_id].stop()
-                    self._created_items.pop(persona_id, None)
+                    self._record_timing(persona_id, "stop",
+                                        monotonic() - started)
+                    with self._created_items_lock:
+                        self._created_items.pop(persona_id, None)
+                    self._persona_hashes.pop(persona_id, None)
+                    self._last_used.pop(persona_id, None)
+                    self._service_ids.pop(persona_id, None)
                 except Exception as ex:
                     LOG.warning(f'Failed to gracefully stop persona={persona_id!r}, ex={str(ex)}')
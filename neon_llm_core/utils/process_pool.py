@@ -0,0 +1,309 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import multiprocessing
+
+from queue import Empty, SimpleQueue
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from neon_utils.logger import LOG
+
+from neon_llm_core.utils.cancellation import CancellationToken
+
+_RESULT = "result"
+_CHUNK = "chunk"
+_ERROR = "error"
+
+# Model attributes reported with each call result
+_STATS = ("history_token_budget", "truncated_requests", "truncated_turns")
+
+
+def _get_stats(model) -> Dict[str, Any]:
+    return {name: getattr(model, name) for name in _STATS}
+
+
+def _serve_model(conn, model_class: Type, config: dict):
+    """
+    Worker process loop: creates one model and handles calls received on
+    `conn` until the connection is closed or `None` is received
+    """
+    model = model_class(config)
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+        method, args, kwargs = request
+        try:
+            if method == "ask_stream":
+                for chunk in model.ask_stream(*args, **kwargs):
+                    conn.send((_CHUNK, chunk, None))
+                conn.send((_RESULT, None, _get_stats(model)))
+            else:
+                result = getattr(model, method)(*args, **kwargs)
+                conn.send((_RESULT, result, _get_stats(model)))
+        except Exception as e:
+            try:
+                conn.send((_ERROR, e, _get_stats(model)))
+            except Exception:
+                # Exception could not be pickled
+                conn.send((_ERROR, RuntimeError(repr(e)), _get_stats(model)))
+    conn.close()
+
+
+class ProcessModel:
+    """
+    Runs a `NeonLLM` in a separate worker process and forwards calls to it
+    over a pipe. Calls to one worker are handled one at a time; use several
+    instances in a `ReplicaPool` to use more cores. Cancellation tokens are
+    checked in this process before and after a call, and between streamed
+    chunks. History truncation stats are returned with each call result, so
+    reading them does not wait for the worker.
+    """
+
+    # Responses are cached in the worker process
+    response_cache = None
+
+    def __init__(self, model_class: Type, config: dict,
+                 start_method: str = "spawn"):
+        """
+        @param model_class: importable `NeonLLM` subclass, constructed in the
+            worker process with `config`
+        @param config: LLM configuration for the model
+        @param start_method: multiprocessing start method for the worker
+        """
+        self._model_class = model_class
+        self._config = config
+        self._context = multiprocessing.get_context(start_method)
+        self._lock = Lock()
+        self._conn = None
+        self._process = None
+        self._stats = {"history_token_budget": None, "truncated_requests": 0,
+                       "truncated_turns": 0}
+        # Truncations counted by workers that have since been restarted
+        self._restarted_stats = {"truncated_requests": 0,
+                                 "truncated_turns": 0}
+        self._invalidations = SimpleQueue()
+        self._start()
+
+    @property
+    def llm_config(self) -> dict:
+        return self._config
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process else None
+
+    def _start(self):
+        self._conn, child_conn = self._context.Pipe()
+        self._process = self._context.Process(
+            target=_serve_model, args=(child_conn, self._model_class,
+                                       self._config),
+            name=f"{self._model_class.__name__}_worker", daemon=True)
+        self._process.start()
+        child_conn.close()
+        LOG.info(f"Started model worker process pid={self._process.pid}")
+
+    def _send(self, method: str, args: tuple, kwargs: dict):
+        if self._process is None:
+            raise RuntimeError("Model worker process is stopped")
+        if not self._process.is_alive():
+            LOG.warning(f"Model worker process exited "
+                        f"(exitcode={self._process.exitcode}); restarting")
+            self._conn.close()
+            for name in self._restarted_stats:
+                self._restarted_stats[name] += self._stats[name]
+                self._stats[name] = 0
+            self._start()
+        self._conn.send((method, args, kwargs))
+
+    def _recv(self) -> Tuple[str, Any]:
+        try:
+            status, result, stats = self._conn.recv()
+        except (EOFError, OSError) as e:
+            raise RuntimeError(f"Model worker process failed: {e}") from e
+        if stats is not None:
+            self._stats = stats
+        if status == _ERROR:
+            raise result
+        return status, result
+
+    def _call(self, method: str, *args, **kwargs) -> Any:
+        with self._lock:
+            self._send_invalidations()
+            self._send(method, args, kwargs)
+            return self._recv()[1]
+
+    def _send_invalidations(self):
+        """
+        Send queued persona prefix invalidations to the worker. Must be called
+        while holding `_lock`.
+        """
+        while True:
+            try:
+                persona = self._invalidations.get_nowait()
+            except Empty:
+                return
+            try:
+                self._send("invalidate_persona_prefix", (persona,), {})
+                self._recv()
+            except Exception as e:
+                LOG.warning(f"Failed to invalidate persona prefix: {e}")
+
+    @property
+    def history_token_budget(self) -> Optional[int]:
+        """
+        History token budget of the worker's model; None until the worker
+        has handled a call
+        """
+        return self._stats["history_token_budget"]
+
+    @property
+    def truncated_requests(self) -> int:
+        return self._restarted_stats["truncated_requests"] + \
+            self._stats["truncated_requests"]
+
+    @property
+    def truncated_turns(self) -> int:
+        return self._restarted_stats["truncated_turns"] + \
+            self._stats["truncated_turns"]
+
+    def preload(self):
+        self._call("preload")
+
+    def warmup(self, prompts: List[str]):
+        self._call("warmup", prompts)
+
+    def ask(self, message: str, chat_history: List[List[str]],
+            persona: dict,
+            cancel_token: Optional[CancellationToken] = None) -> str:
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        response = self._call("ask", message=message,
+                              chat_history=chat_history, persona=persona)
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        return response
+
+    async def aask(self, message: str, chat_history: List[List[str]],
+                   persona: dict,
+                   cancel_token: Optional[CancellationToken] = None) -> str:
+        return await asyncio.to_thread(self.ask, message, chat_history,
+                                       persona, cancel_token)
+
+    def ask_stream(self, message: str, chat_history: List[List[str]],
+                   persona: dict,
+                   cancel_token: Optional[CancellationToken] = None) \
+            -> Iterator[str]:
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        with self._lock:
+            self._send_invalidations()
+            self._send("ask_stream", tuple(),
+                       {"message": message, "chat_history": chat_history,
+                        "persona": persona})
+            finished = False
+            try:
+                while not finished:
+                    try:
+                        status, chunk = self._recv()
+                    except Exception:
+                        finished = True
+                        raise
+                    if status == _CHUNK:
+                        if cancel_token is not None:
+                            cancel_token.raise_if_cancelled()
+                        yield chunk
+                    else:
+                        finished = True
+            finally:
+                # Discard the rest of a stream that was not consumed
+                while not finished:
+                    try:
+                        finished = self._recv()[0] != _CHUNK
+                    except Exception:
+                        finished = True
+
+    def ask_batch(self, requests: List[Tuple[str, List[List[str]], dict]]) \
+            -> List[str]:
+        return self._call("ask_batch", requests)
+
+    def get_sorted_answer_indexes(self, question: str, answers: List[str],
+                                  persona: dict) -> List[int]:
+        return self._call("get_sorted_answer_indexes", question=question,
+                          answers=answers, persona=persona)
+
+    async def aget_sorted_answer_indexes(self, question: str,
+                                         answers: List[str],
+                                         persona: dict) -> List[int]:
+        return await asyncio.to_thread(self.get_sorted_answer_indexes,
+                                       question, answers, persona)
+
+    def get_top_answer_indexes(self, question: str, answers: List[str],
+                               persona: dict, k: int = 1) -> List[int]:
+        return self._call("get_top_answer_indexes", question=question,
+                          answers=answers, persona=persona, k=k)
+
+    async def aget_top_answer_indexes(self, question: str,
+                                      answers: List[str], persona: dict,
+                                      k: int = 1) -> List[int]:
+        return await asyncio.to_thread(self.get_top_answer_indexes,
+                                       question, answers, persona, k)
+
+    def update_persona_prefix(self, persona: dict):
+        return self._call("update_persona_prefix", persona)
+
+    def invalidate_persona_prefix(self, persona: dict):
+        # The caller does not wait for a request in progress to complete;
+        # queued invalidations are sent before the next call to the worker
+        self._invalidations.put(persona)
+        if self._lock.acquire(blocking=False):
+            try:
+                self._send_invalidations()
+            finally:
+                self._lock.release()
+
+    def shutdown(self, timeout: float = 5):
+        """
+        Stop the worker process
+        @param timeout: seconds to wait for the worker to exit
+        """
+        with self._lock:
+            if self._process is None:
+                return
+            try:
+                self._conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._conn.close()
+            self._process = None
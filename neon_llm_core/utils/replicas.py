@@ -0,0 +1,108 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from contextlib import contextmanager
+from threading import Lock
+from time import monotonic
+from typing import Any, Iterator, List, Optional
+
+from neon_llm_core.utils.metrics import TimingStats
+
+
+class ReplicaPool:
+    """
+    Dispatches calls across interchangeable model replicas, choosing the
+    replica with the fewest outstanding calls
+    """
+
+    def __init__(self, replicas: List[Any]):
+        """
+        @param replicas: Model instances to dispatch calls to
+        """
+        if not replicas:
+            raise ValueError("At least one replica is required")
+        self._replicas = list(replicas)
+        self._lock = Lock()
+        self._outstanding = [0] * len(self._replicas)
+        self._busy_since: List[Optional[float]] = [None] * len(self._replicas)
+        self._busy_time = [0.0] * len(self._replicas)
+        self._calls = [TimingStats() for _ in self._replicas]
+        self._created = monotonic()
+
+    def __len__(self) -> int:
+        return len(self._replicas)
+
+    @property
+    def replicas(self) -> List[Any]:
+        return list(self._replicas)
+
+    def _acquire(self) -> int:
+        with self._lock:
+            idx = min(range(len(self._replicas)),
+                      key=lambda i: (self._outstanding[i],
+                                     self._calls[i].count))
+            if self._outstanding[idx] == 0:
+                self._busy_since[idx] = monotonic()
+            self._outstanding[idx] += 1
+            return idx
+
+    def _release(self, idx: int):
+        with self._lock:
+            self._outstanding[idx] -= 1
+            if self._outstanding[idx] == 0:
+                self._busy_time[idx] += monotonic() - self._busy_since[idx]
+                self._busy_since[idx] = None
+
+    @contextmanager
+    def acquire(self) -> Iterator[Any]:
+        """
+        Use the least loaded replica for the duration of the context
+        """
+        idx = self._acquire()
+        started = monotonic()
+        try:
+            yield self._replicas[idx]
+        finally:
+            self._calls[idx].record(monotonic() - started)
+            self._release(idx)
+
+    def get_metrics(self) -> List[dict]:
+        """
+        Get the outstanding calls, call durations, and the fraction of time
+        each replica has been busy since the pool was created
+        """
+        now = monotonic()
+        elapsed = max(now - self._created, 1e-9)
+        metrics = list()
+        with self._lock:
+            for idx in range(len(self._replicas)):
+                busy_time = self._busy_time[idx]
+                if self._busy_since[idx] is not None:
+                    busy_time += now - self._busy_since[idx]
+                metrics.append({"outstanding": self._outstanding[idx],
+                                "calls": self._calls[idx].as_dict(),
+                                "utilization": round(busy_time / elapsed, 6)})
+        return metrics
@@ -0,0 +1,239 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import atexit
+
+from functools import partial
+from queue import Queue, Empty
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, Optional, Set
+from uuid import uuid4
+
+import pika
+
+from neon_mq_connector.utils.client_utils import NeonMQHandler
+from neon_mq_connector.utils.network_utils import b64_to_dict, dict_to_b64
+from neon_utils.logger import LOG
+
+from neon_llm_core.utils.config import load_mq_handler_config
+from neon_llm_core.utils.streaming import STREAM_REQUEST_KEY, StreamAssembler
+
+
+class MQRPCClient:
+    """
+    Long-lived client for MQ request/response calls. All requests share one
+    connection and one reply queue; responses are routed back to callers by
+    `message_id`. The connection is only used by this client's I/O thread,
+    other threads hand it work with `add_callback_threadsafe`. Services
+    declare the reply queue again from their own connection when they respond,
+    so it is declared the same way they declare it and deleted on `stop`.
+    """
+
+    def __init__(self, vhost: str, config: Optional[dict] = None):
+        """
+        @param vhost: MQ vhost to send requests to
+        @param config: MQ configuration; defaults to `load_mq_handler_config`
+        """
+        self.vhost = vhost
+        self.reply_queue = f"neon_llm_rpc.{uuid4().hex}"
+        self._config = config
+        self._handler: Optional[NeonMQHandler] = None
+        self._channel = None
+        self._thread: Optional[Thread] = None
+        self._stopping = Event()
+        self._pending: Dict[str, Queue] = dict()
+        self._pending_lock = Lock()
+        self._declared_queues: Set[str] = set()
+
+    @property
+    def is_alive(self) -> bool:
+        return bool(self._thread and self._thread.is_alive() and
+                    not self._stopping.is_set())
+
+    def start(self):
+        """
+        Connect to MQ, declare the reply queue and start the I/O thread
+        """
+        self._handler = NeonMQHandler(
+            config=self._config or load_mq_handler_config(),
+            service_name='mq_handler', vhost=self.vhost)
+        self._channel = self._handler.connection.channel()
+        self._channel.queue_declare(queue=self.reply_queue, auto_delete=False)
+        self._channel.basic_consume(queue=self.reply_queue,
+                                    on_message_callback=self._on_response,
+                                    auto_ack=True)
+        self._thread = Thread(target=self._run, daemon=True,
+                              name=f"rpc_client_{self.reply_queue}")
+        self._thread.start()
+        LOG.info(f"Started RPC client on {self.vhost}/{self.reply_queue}")
+
+    def stop(self):
+        """
+        Stop the I/O thread, delete the reply queue and close the connection
+        """
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._handler:
+            try:
+                self._channel.queue_delete(self.reply_queue)
+                self._handler.shutdown()
+            except Exception as e:
+                LOG.warning(f"Failed to cleanly stop RPC client: {e}")
+            self._handler = None
+
+    def request(self, target_queue: str, request_data: dict,
+                timeout: int = 30) -> dict:
+        """
+        Send a request and wait for its response
+        :param target_queue: queue to post the request to
+        :param request_data: data to post
+        :param timeout: seconds to wait for a response
+        :returns: response data, or an empty dict on timeout
+        """
+        message_id, responses = self._send(target_queue, request_data,
+                                           timeout)
+        try:
+            return responses.get(timeout=timeout)
+        except Empty:
+            LOG.error(f"Timeout waiting for response to: {message_id} on "
+                      f"{self.reply_queue}")
+            return dict()
+        finally:
+            self._release(message_id)
+
+    def stream_request(self, target_queue: str, request_data: dict,
+                       on_chunk: Optional[Callable[[str], None]] = None,
+                       timeout: int = 30) -> Optional[dict]:
+        """
+        Send a request for a streamed response and collect all chunks
+        :param target_queue: queue to post the request to
+        :param request_data: data to post
+        :param on_chunk: optional callback for each chunk as it arrives
+        :param timeout: seconds to wait for the next message
+        :returns: final response message, or None if incomplete
+        """
+        request_data = dict(request_data)
+        request_data[STREAM_REQUEST_KEY] = True
+        message_id, responses = self._send(target_queue, request_data,
+                                           timeout)
+        assembler = StreamAssembler()
+        try:
+            while not assembler.complete:
+                for chunk in assembler.add(responses.get(timeout=timeout)):
+                    if on_chunk:
+                        on_chunk(chunk)
+            return assembler.final_message
+        except Empty:
+            LOG.error(f"Timeout waiting for stream: {message_id} on "
+                      f"{self.reply_queue}")
+            return None
+        finally:
+            self._release(message_id)
+
+    def _send(self, target_queue: str, request_data: dict, timeout: int):
+        if not self.is_alive:
+            raise ConnectionError("RPC client is not running")
+        request_data = dict(request_data)
+        request_data['message_id'] = request_data.get('message_id') or \
+            uuid4().hex
+        request_data['routing_key'] = self.reply_queue
+        message_id = request_data['message_id']
+        responses = Queue()
+        with self._pending_lock:
+            self._pending[message_id] = responses
+        # Requests are useless once the caller stops waiting for them
+        self._handler.connection.add_callback_threadsafe(
+            partial(self._publish, target_queue, request_data,
+                    int(timeout * 1000)))
+        return message_id, responses
+
+    def _release(self, message_id: str):
+        with self._pending_lock:
+            self._pending.pop(message_id, None)
+
+    def _publish(self, target_queue: str, request_data: dict,
+                 expiration: int):
+        if target_queue not in self._declared_queues:
+            self._channel.queue_declare(queue=target_queue, auto_delete=False)
+            self._declared_queues.add(target_queue)
+        self._channel.basic_publish(
+            exchange='', routing_key=target_queue,
+            body=dict_to_b64(request_data),
+            properties=pika.BasicProperties(expiration=str(expiration)))
+
+    def _on_response(self, _channel, _method, _properties, body: bytes):
+        response = b64_to_dict(body)
+        message_id = response.get('context', response).get(
+            'mq', response).get('message_id')
+        with self._pending_lock:
+            responses = self._pending.get(message_id)
+        if responses is None:
+            LOG.debug(f"Ignoring response for {message_id}")
+            return
+        responses.put(response)
+
+    def _run(self):
+        try:
+            while not self._stopping.is_set():
+                self._handler.connection.process_data_events(time_limit=0.5)
+        except Exception as e:
+            LOG.error(f"RPC client connection failed: {e}")
+            self._stopping.set()
+
+
+_rpc_clients: Dict[str, MQRPCClient] = dict()
+_rpc_clients_lock = Lock()
+
+
+def get_rpc_client(vhost: str) -> MQRPCClient:
+    """
+    Get the running RPC client for `vhost` in this process, starting a new
+    one if needed
+    :param vhost: MQ vhost to send requests to
+    """
+    with _rpc_clients_lock:
+        client = _rpc_clients.get(vhost)
+        if client is None or not client.is_alive:
+            if client:
+                LOG.warning(f"Restarting RPC client for {vhost}")
+                client.stop()
+            client = MQRPCClient(vhost=vhost)
+            client.start()
+            _rpc_clients[vhost] = client
+        return client
+
+
+@atexit.register
+def stop_rpc_clients():
+    """
+    Stop all RPC clients started in this process
+    """
+    with _rpc_clients_lock:
+        clients = list(_rpc_clients.values())
+        _rpc_clients.clear()
+    for client in clients:
+        client.stop()
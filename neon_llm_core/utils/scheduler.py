@@ -0,0 +1,203 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from threading import Event, Lock
+from time import monotonic
+from typing import Callable, Deque, Dict, Optional
+
+from neon_llm_core.utils.metrics import LatencyHistogram
+
+
+@dataclass
+class _Waiter:
+    request_class: str
+    enqueued: float
+    notify: Optional[Callable[[], None]] = None
+    granted: bool = False
+
+
+class PriorityScheduler:
+    """
+    Limits the number of requests using a shared resource at once. When
+    requests are waiting, slots are given to request classes in proportion
+    to their weights, except that a request that has waited `max_wait`
+    seconds is served first.
+    """
+
+    def __init__(self, max_concurrent: int, weights: Dict[str, float],
+                 max_wait: float = 5.0):
+        """
+        @param max_concurrent: Maximum number of requests holding a slot
+        @param weights: Relative share of slots for each request class
+        @param max_wait: Seconds after which a waiting request is served
+            before any other class, regardless of weight
+        """
+        if any(weight <= 0 for weight in weights.values()):
+            raise ValueError(f"Weights must be positive: {weights}")
+        self.max_concurrent = max(int(max_concurrent), 1)
+        self.weights = dict(weights)
+        self.max_wait = max_wait
+        self._lock = Lock()
+        self._active = 0
+        self._waiting: Dict[str, Deque[_Waiter]] = \
+            {request_class: deque() for request_class in self.weights}
+        self._credit = {request_class: 0.0 for request_class in self.weights}
+        self.promoted = 0
+        self.wait_times = {request_class: LatencyHistogram()
+                           for request_class in self.weights}
+        self.latencies = {request_class: LatencyHistogram()
+                          for request_class in self.weights}
+
+    @property
+    def active(self) -> int:
+        """Number of requests holding a slot"""
+        return self._active
+
+    def _enqueue(self, waiter: _Waiter):
+        with self._lock:
+            if self._active < self.max_concurrent and \
+                    not any(self._waiting.values()):
+                self._active += 1
+                waiter.granted = True
+            else:
+                self._waiting[waiter.request_class].append(waiter)
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        classes = [request_class for request_class, waiting
+                   in self._waiting.items() if waiting]
+        if not classes:
+            return None
+        now = monotonic()
+        starved = [request_class for request_class in classes if
+                   now - self._waiting[request_class][0].enqueued >=
+                   self.max_wait]
+        if starved:
+            request_class = min(starved, key=lambda c:
+                                self._waiting[c][0].enqueued)
+            self.promoted += 1
+        else:
+            # Smooth weighted round-robin among classes with waiting requests
+            total = sum(self.weights[c] for c in classes)
+            for c in classes:
+                self._credit[c] += self.weights[c]
+            request_class = max(classes, key=lambda c: self._credit[c])
+            self._credit[request_class] -= total
+        return self._waiting[request_class].popleft()
+
+    def _dispatch(self):
+        with self._lock:
+            granted = list()
+            while self._active < self.max_concurrent:
+                waiter = self._next_waiter()
+                if waiter is None:
+                    break
+                self._active += 1
+                waiter.granted = True
+                granted.append(waiter)
+        for waiter in granted:
+            waiter.notify()
+
+    def _release(self, waiter: _Waiter):
+        self.latencies[waiter.request_class].record(
+            monotonic() - waiter.enqueued)
+        with self._lock:
+            self._active -= 1
+        self._dispatch()
+
+    def _record_wait(self, waiter: _Waiter):
+        self.wait_times[waiter.request_class].record(
+            monotonic() - waiter.enqueued)
+
+    @contextmanager
+    def slot(self, request_class: str):
+        """
+        Hold a slot for the duration of the context, blocking until one is
+        available
+        @param request_class: One of the classes in `weights`
+        """
+        event = Event()
+        waiter = _Waiter(request_class=request_class, enqueued=monotonic(),
+                         notify=event.set)
+        self._enqueue(waiter)
+        if not waiter.granted:
+            event.wait()
+        self._record_wait(waiter)
+        try:
+            yield
+        finally:
+            self._release(waiter)
+
+    @asynccontextmanager
+    async def aslot(self, request_class: str):
+        """
+        Coroutine equivalent of `slot`, waiting without blocking the event
+        loop
+        @param request_class: One of the classes in `weights`
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def _notify():
+            loop.call_soon_threadsafe(
+                lambda: future.done() or future.set_result(None))
+
+        waiter = _Waiter(request_class=request_class, enqueued=monotonic(),
+                         notify=_notify)
+        self._enqueue(waiter)
+        if not waiter.granted:
+            try:
+                await future
+            except asyncio.CancelledError:
+                with self._lock:
+                    granted = waiter.granted
+                    if not granted:
+                        self._waiting[request_class].remove(waiter)
+                if granted:
+                    self._release(waiter)
+                raise
+        self._record_wait(waiter)
+        try:
+            yield
+        finally:
+            self._release(waiter)
+
+    def get_metrics(self) -> dict:
+        return {"max_concurrent": self.max_concurrent,
+                "active": self._active,
+                "waiting": {request_class: len(waiting) for
+                            request_class, waiting in self._waiting.items()},
+                "promoted": self.promoted,
+                "wait_time": {request_class: histogram.as_dict() for
+                              request_class, histogram
+                              in self.wait_times.items()},
+                "latency": {request_class: histogram.as_dict() for
+                            request_class, histogram
+                            in self.latencies.items()}}
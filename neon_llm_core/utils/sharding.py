@@ -0,0 +1,59 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from hashlib import sha256
+from typing import Iterable
+
+
+def _get_weight(key: str, node: str) -> int:
+    return int.from_bytes(sha256(f"{node}:{key}".encode()).digest()[:8],
+                          "big")
+
+
+def get_shard_owner(key: str, nodes: Iterable[str]) -> str:
+    """
+    Get the node responsible for `key` using rendezvous (highest random
+    weight) hashing. Adding or removing a node only moves the keys assigned
+    to that node.
+    @param key: key to assign, e.g. a persona ID
+    @param nodes: IDs of all nodes keys may be assigned to
+    @returns: ID of the node `key` is assigned to
+    """
+    return max(nodes, key=lambda node: _get_weight(key, node))
+
+
+def is_assigned(key: str, replica_id: int, replica_count: int) -> bool:
+    """
+    Check if `key` is assigned to this replica
+    @param key: key to check
+    @param replica_id: index of this replica, from 0 to `replica_count - 1`
+    @param replica_count: total number of replicas
+    @returns: True if this replica is responsible for `key`
+    """
+    if replica_count <= 1:
+        return True
+    return get_shard_owner(key, (str(idx) for idx in
+                                 range(replica_count))) == str(replica_id)
@@ -0,0 +1,147 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from typing import Callable, Dict, List, Optional
+from uuid import uuid4
+
+from neon_mq_connector.utils.client_utils import NeonMQHandler
+from neon_mq_connector.utils.network_utils import b64_to_dict
+from neon_utils.logger import LOG
+
+from neon_llm_core.utils.config import load_mq_handler_config
+
+STREAM_REQUEST_KEY = "stream_response"
+
+
+def build_stream_message(message_id: str, routing_key: str, response: str,
+                         seq: int, final: bool) -> dict:
+    """
+    Build one message of a streamed response. Intermediate messages contain
+    one chunk of the response; the final message contains the complete
+    response and `seq` equal to the number of chunks sent before it.
+    :param message_id: `message_id` of the request being responded to
+    :param routing_key: queue the response is sent to
+    :param response: response chunk, or complete response if `final`
+    :param seq: sequence number of this message, starting at 0
+    :param final: True if this is the last message of the response
+    """
+    return {"message_id": message_id,
+            "routing_key": routing_key,
+            "response": response,
+            "seq": seq,
+            "final": final}
+
+
+class StreamAssembler:
+    """
+    Reassembles streamed response messages into ordered chunks
+    """
+
+    def __init__(self):
+        self._chunks: Dict[int, str] = dict()
+        self._received: List[str] = list()
+        self.final_message: Optional[dict] = None
+
+    @property
+    def complete(self) -> bool:
+        return self.final_message is not None and \
+            len(self._received) >= self.final_message.get("seq", 0)
+
+    @property
+    def response(self) -> str:
+        if self.final_message is not None:
+            return self.final_message.get("response", "")
+        return "".join(self._received)
+
+    def add(self, message: dict) -> List[str]:
+        """
+        Add a received message
+        :param message: message built by `build_stream_message`
+        :returns: list of chunks that are now available in order
+        """
+        if message.get("final", True):
+            self.final_message = message
+            return []
+        self._chunks[int(message.get("seq", 0))] = message.get("response", "")
+        ready = []
+        while len(self._received) in self._chunks:
+            chunk = self._chunks.pop(len(self._received))
+            self._received.append(chunk)
+            ready.append(chunk)
+        return ready
+
+
+def send_mq_stream_request(vhost: str, request_data: dict, target_queue: str,
+                           on_chunk: Optional[Callable[[str], None]] = None,
+                           timeout: int = 30) -> Optional[dict]:
+    """
+    Sends a request for a streamed response and collects all response
+    messages.
+    :param vhost: vhost to target
+    :param request_data: data to post to target_queue
+    :param target_queue: queue to post request to
+    :param on_chunk: optional callback for each response chunk as it arrives
+    :param timeout: seconds to wait for the next message before giving up
+    :returns: final response message, or None if the response did not complete
+    """
+    request_data = dict(request_data)
+    request_data[STREAM_REQUEST_KEY] = True
+    request_data['message_id'] = request_data.get('message_id') or \
+        uuid4().hex
+    response_queue = f"{target_queue}.stream.{uuid4().hex}"
+    request_data['routing_key'] = response_queue
+    assembler = StreamAssembler()
+    handler = None
+    try:
+        handler = NeonMQHandler(config=load_mq_handler_config(),
+                                service_name='mq_handler', vhost=vhost)
+        channel = handler.connection.channel()
+        channel.queue_declare(queue=response_queue, auto_delete=False)
+        handler.emit_mq_message(connection=handler.connection,
+                                queue=target_queue, request_data=request_data,
+                                exchange='')
+        for method, _, body in channel.consume(response_queue, auto_ack=True,
+                                               inactivity_timeout=timeout):
+            if method is None:
+                LOG.error(f"Timeout waiting for stream on {response_queue}")
+                break
+            message = b64_to_dict(body)
+            if message.get('message_id') != request_data['message_id']:
+                LOG.debug(f"Ignoring message for {message.get('message_id')}")
+                continue
+            for chunk in assembler.add(message):
+                if on_chunk:
+                    on_chunk(chunk)
+            if assembler.complete:
+                break
+        channel.cancel()
+        channel.queue_delete(response_queue)
+    except Exception as e:
+        LOG.exception(f"Failed to get streamed response: {e}")
+    finally:
+        if handler:
+            handler.shutdown()
+    return assembler.final_message if assembler.complete else None
@@ -24,8 +24,9 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 from datetime import datetime
+from time import time
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 from neon_data_models.models.api import (
     LLMPersona,
@@ -45,7 +46,8 @@ class MockChatbot(LLMBot):
     def __init__(self):
         LLMBot.__init__(self, llm_name="mock_chatbot",
                         persona={"name": "test_persona",
-                                 "system_prompt": "Test Prompt"})
+                                 "system_prompt": "Test Prompt"},
+                        use_rpc_client=False)
 
 
 class TestChatbot(TestCase):
@@ -104,6 +106,43 @@ class TestChatbot(TestCase):
                          DEFAULT_RESPONSE)
         get_api_response.assert_called_with(shout=valid_shout)
 
+    @patch.object(mock_chatbot, '_get_llm_api_response_stream')
+    @patch.object(mock_chatbot, '_get_llm_api_response')
+    def test_ask_chatbot_stream(self, get_api_response, get_api_stream):
+        get_api_stream.return_value = LLMProposeResponse(message_id="",
+                                                         response="streamed")
+        self.mock_chatbot.stream_responses = True
+        try:
+            resp = self.mock_chatbot.ask_chatbot("user", "shout",
+                                                 datetime.now().isoformat(),
+                                                 {"prompt_id": "stream_id"})
+        finally:
+            self.mock_chatbot.stream_responses = False
+        self.assertEqual(resp, "streamed")
+        get_api_stream.assert_called_once_with(shout="shout",
+                                               prompt_id="stream_id")
+        get_api_response.assert_not_called()
+
+    @patch('neon_llm_core.chatbot.send_mq_stream_request')
+    def test_get_llm_api_response_stream(self, mq_request):
+        mq_request.return_value = {"response": "one two", "message_id": "id",
+                                   "seq": 2, "final": True}
+        with patch.object(self.mock_chatbot, 'on_response_chunk') as on_chunk:
+            resp = self.mock_chatbot._get_llm_api_response_stream("input",
+                                                                  "prompt")
+            mq_request.call_args.kwargs['on_chunk']("one ")
+            on_chunk.assert_called_once_with("one ", prompt_id="prompt")
+        req = LLMProposeRequest(**mq_request.call_args.kwargs['request_data'])
+        self.assertEqual(req.query, "input")
+        self.assertEqual(req.persona, self.mock_chatbot.persona)
+        self.assertIsInstance(resp, LLMProposeResponse)
+        self.assertEqual(resp.response, "one two")
+
+        # Incomplete response
+        mq_request.return_value = None
+        self.assertIsNone(
+            self.mock_chatbot._get_llm_api_response_stream("input"))
+
     @patch.object(mock_chatbot, '_get_llm_api_opinion')
     def test_ask_discusser(self, get_api_opinion):
         get_api_opinion.return_value = LLMDiscussResponse(message_id="",
@@ -165,6 +204,21 @@ class TestChatbot(TestCase):
                                           responses=valid_options)
         self.assertIn("abstain", resp.lower())
 
+        # Top choice only
+        get_api_choice.return_value = LLMVoteResponse(
+            message_id="", sorted_answer_indexes=[1])
+        self.assertEqual(self.mock_chatbot.ask_appraiser(options,
+                                                         valid_context),
+                         "bot 1")
+
+        # Single option is selected without a request
+        get_api_choice.reset_mock()
+        resp = self.mock_chatbot.ask_appraiser(
+            {"bot 0": "response 0",
+             self.mock_chatbot.service_name: "Self response"}, valid_context)
+        self.assertEqual(resp, "bot 0")
+        get_api_choice.assert_not_called()
+
     @patch('neon_llm_core.chatbot.send_mq_request')
     def test_get_llm_api_response(self, mq_request):
         mq_request.return_value = {"response": "test",
@@ -188,6 +242,67 @@ class TestChatbot(TestCase):
         mq_request.return_value = {}
         self.assertIsNone(self.mock_chatbot._get_llm_api_response("input"))
 
+    @patch('neon_llm_core.chatbot.send_mq_request')
+    @patch('neon_llm_core.chatbot.get_rpc_client')
+    def test_send_request(self, get_rpc_client, mq_request):
+        rpc_client = get_rpc_client.return_value
+        rpc_client.request.return_value = {"response": "test",
+                                           "message_id": ""}
+        self.mock_chatbot.use_rpc_client = True
+        try:
+            resp = self.mock_chatbot._get_llm_api_response("input")
+        finally:
+            self.mock_chatbot.use_rpc_client = False
+        mq_request.assert_not_called()
+        get_rpc_client.assert_called_once_with(
+            self.mock_chatbot.mq_queue_config.vhost)
+        rpc_client.request.assert_called_once()
+        kwargs = rpc_client.request.call_args.kwargs
+        self.assertEqual(kwargs['target_queue'],
+                         self.mock_chatbot.mq_queue_config.ask_response_queue)
+        self.assertEqual(LLMProposeRequest(**kwargs['request_data']).query,
+                         "input")
+        self.assertEqual(resp.response, "test")
+
+        # Per-request connection
+        mq_request.return_value = {"response": "test", "message_id": ""}
+        self.mock_chatbot._get_llm_api_response("input")
+        rpc_client.request.assert_called_once()
+        mq_request.assert_called_once()
+
+        # Requests carry the deadline they are waited on until
+        self.assertEqual(kwargs['timeout'], self.mock_chatbot.request_timeout)
+        self.assertAlmostEqual(kwargs['request_data']['deadline'],
+                               time() + self.mock_chatbot.request_timeout,
+                               delta=5)
+        self.assertEqual(mq_request.call_args.kwargs['timeout'],
+                         self.mock_chatbot.request_timeout)
+        self.assertIn('deadline', mq_request.call_args.kwargs['request_data'])
+
+    @patch('neon_llm_core.chatbot.send_mq_request')
+    def test_send_request_local(self, mq_request):
+        from neon_llm_core.utils.local_transport import local_transport
+        queue = self.mock_chatbot.mq_queue_config.ask_response_queue
+        handler = Mock(side_effect=lambda request: local_transport.deliver(
+            request["routing_key"], {"response": request["query"],
+                                     "message_id": request["message_id"]}))
+        local_transport.register_handler(queue, handler)
+        try:
+            # Local transport not enabled
+            mq_request.return_value = {"response": "mq", "message_id": ""}
+            resp = self.mock_chatbot._get_llm_api_response("input")
+            self.assertEqual(resp.response, "mq")
+            handler.assert_not_called()
+
+            self.mock_chatbot.use_local_transport = True
+            resp = self.mock_chatbot._get_llm_api_response("input")
+            self.assertEqual(resp.response, "input")
+            handler.assert_called_once()
+            mq_request.assert_called_once()
+        finally:
+            self.mock_chatbot.use_local_transport = False
+            local_transport.unregister_handler(queue)
+
     @patch('neon_llm_core.chatbot.send_mq_request')
     def test_get_llm_api_opinion(self, mq_request):
         mq_request.return_value = {"opinion": "test",
@@ -233,6 +348,7 @@ class TestChatbot(TestCase):
         self.assertEqual(req.responses, responses)
         self.assertEqual(req.model, self.mock_chatbot.base_llm)
         self.assertEqual(req.persona, self.mock_chatbot.persona)
+        self.assertEqual(request_data["k"], 1)
         self.assertIsInstance(resp, LLMVoteResponse)
         self.assertEqual(resp.sorted_answer_indexes,
                          mq_request.return_value['sorted_answer_indexes'])
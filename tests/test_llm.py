@@ -24,9 +24,354 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import asyncio
+
+from typing import List
 from unittest import TestCase
+from unittest.mock import Mock
+
+from neon_llm_core.llm import NeonLLM
+
+
+class MockLLM(NeonLLM):
+    mq_to_llm_role = {"user": "user", "llm": "assistant"}
+
+    def __init__(self, config: dict = None):
+        NeonLLM.__init__(self, config or {})
+        self.call_model = Mock(side_effect=lambda prompt: f"resp: {prompt}")
+
+    @property
+    def tokenizer(self):
+        return None
+
+    @property
+    def tokenizer_model_name(self) -> str:
+        return "mock_tokenizer"
+
+    @property
+    def model(self):
+        return None
+
+    @property
+    def llm_model_name(self) -> str:
+        return "mock_model"
+
+    @property
+    def _system_prompt(self) -> str:
+        return "Mock system prompt"
+
+    def get_sorted_answer_indexes(self, question: str, answers: List[str],
+                                  persona: dict) -> List[int]:
+        return list(range(len(answers)))
+
+    def _call_model(self, prompt: str) -> str:
+        return self.call_model(prompt)
+
+    def _assemble_prompt(self, message: str, chat_history: List[List[str]],
+                         persona: dict) -> str:
+        history = "|".join(f"{role}:{text}" for role, text in chat_history)
+        return f"{persona.get('name')}|{history}|{message}"
+
+    def _tokenize(self, prompt: str) -> List[str]:
+        return prompt.split()
 
 
 class TestNeonLLM(TestCase):
-    # TODO
-    pass
+    def test_ask(self):
+        llm = MockLLM()
+        resp = llm.ask("hello", [["user", "hi"], ["llm", "hey"]],
+                       {"name": "test"})
+        self.assertEqual(resp, "resp: test|user:hi|llm:hey|hello")
+        llm.call_model.assert_called_once_with("test|user:hi|llm:hey|hello")
+
+    def test_ask_batch(self):
+        llm = MockLLM()
+        llm._call_model_batch = Mock(side_effect=lambda prompts:
+                                     [p.upper() for p in prompts])
+        resp = llm.ask_batch([("one", [], {"name": "a"}),
+                              ("two", [["user", "hi"]], {"name": "b"})])
+        self.assertEqual(resp, ["A||ONE", "B|USER:HI|TWO"])
+        llm._call_model_batch.assert_called_once_with(["a||one",
+                                                       "b|user:hi|two"])
+
+    def test_aask(self):
+        llm = MockLLM({"response_cache": {"enabled": True}})
+        resp = asyncio.run(llm.aask("hello", [["user", "hi"]],
+                                    {"name": "test"}))
+        self.assertEqual(resp, "resp: test|user:hi|hello")
+        llm.call_model.assert_called_once_with("test|user:hi|hello")
+        # Responses are shared with the synchronous cache
+        self.assertEqual(llm.ask("hello", [["user", "hi"]], {"name": "test"}),
+                         resp)
+        llm.call_model.assert_called_once()
+
+    def test_ask_cancelled(self):
+        from neon_llm_core.utils.cancellation import (CancellationToken,
+                                                      RequestCancelled)
+        llm = MockLLM()
+        token = CancellationToken()
+        # Models that do not accept a token are called without one
+        self.assertEqual(llm.ask("hello", [], {"name": "test"},
+                                 cancel_token=token), "resp: test||hello")
+        llm.call_model.assert_called_once_with("test||hello")
+
+        # Cancelled during generation
+        llm.call_model.side_effect = lambda prompt: token.cancel("test")
+        with self.assertRaises(RequestCancelled):
+            llm.ask("hi", [], {}, cancel_token=token)
+        # Cancelled before generation
+        llm.call_model.reset_mock()
+        with self.assertRaises(RequestCancelled):
+            asyncio.run(llm.aask("hi", [], {}, cancel_token=token))
+        llm.call_model.assert_not_called()
+
+        class CancellableLLM(MockLLM):
+            def _call_model(self, prompt: str, cancel_token=None) -> str:
+                return self.call_model(prompt, cancel_token)
+
+        llm = CancellableLLM()
+        llm.call_model.side_effect = lambda prompt, _: f"resp: {prompt}"
+        token = CancellationToken()
+        llm.ask("hello", [], {}, cancel_token=token)
+        llm.call_model.assert_called_once_with("None||hello", token)
+        self.assertEqual(list(llm.ask_stream("hi", [], {},
+                                             cancel_token=token)),
+                         ["resp: None||hi"])
+        llm._call_model_stream = Mock(return_value=iter(["one", "two"]))
+        stream = llm.ask_stream("hi", [], {}, cancel_token=token)
+        self.assertEqual(next(stream), "one")
+        token.cancel()
+        with self.assertRaises(RequestCancelled):
+            next(stream)
+
+    def test_warmup(self):
+        llm = MockLLM({"response_cache": {"enabled": True}})
+        llm.preload()
+        llm.warmup(["hello", "hi"])
+        self.assertEqual(llm.call_model.call_count, 2)
+        llm.call_model.assert_called_with("None||hi")
+        # Warmup responses are not cached
+        self.assertEqual(len(llm.response_cache), 0)
+
+    def test_aget_sorted_answer_indexes(self):
+        llm = MockLLM()
+        self.assertEqual(asyncio.run(llm.aget_sorted_answer_indexes(
+            "question", ["one", "two"], {})), [0, 1])
+
+    def test_ask_stream(self):
+        llm = MockLLM({"response_cache": {"enabled": True}})
+        llm._call_model_stream = Mock(return_value=iter(["one ", "two"]))
+        persona = {"name": "test"}
+        self.assertEqual(list(llm.ask_stream("hello", [], persona)),
+                         ["one ", "two"])
+        llm._call_model_stream.assert_called_once_with("test||hello")
+        # Complete response is cached
+        self.assertEqual(list(llm.ask_stream("hello", [], persona)),
+                         ["one two"])
+        self.assertEqual(llm.ask("hello", [], persona), "one two")
+        llm._call_model_stream.assert_called_once()
+        llm.call_model.assert_not_called()
+
+    def test_call_model_stream_default(self):
+        llm = MockLLM()
+        self.assertEqual(list(llm._call_model_stream("prompt")),
+                         ["resp: prompt"])
+
+    def test_call_model_batch_default(self):
+        llm = MockLLM()
+        self.assertEqual(llm._call_model_batch(["one", "two"]),
+                         ["resp: one", "resp: two"])
+        self.assertEqual(llm.call_model.call_count, 2)
+
+    def test_response_cache_disabled(self):
+        llm = MockLLM()
+        self.assertIsNone(llm.response_cache)
+        llm.ask("hello", [], {"name": "test"})
+        llm.ask("hello", [], {"name": "test"})
+        self.assertEqual(llm.call_model.call_count, 2)
+
+    def test_response_cache(self):
+        llm = MockLLM({"response_cache": {"enabled": True, "max_size": 2,
+                                          "ttl": 60,
+                                          "excluded_personas": ["random"]}})
+        persona = {"name": "test", "description": "test persona"}
+        resp = llm.ask("hello", [["user", "hi"]], persona)
+        self.assertEqual(llm.ask("hello", [["user", "hi"]], dict(persona)),
+                         resp)
+        self.assertEqual(llm.call_model.call_count, 1)
+        self.assertEqual(llm.response_cache.hits, 1)
+        self.assertEqual(llm.response_cache.misses, 1)
+
+        # Different history is a different request
+        llm.ask("hello", [], persona)
+        self.assertEqual(llm.call_model.call_count, 2)
+
+        # Excluded personas are never cached
+        self.assertTrue(llm.is_response_cache_excluded({"name": "random"}))
+        self.assertFalse(llm.is_response_cache_excluded(persona))
+        llm.ask("hello", [], {"name": "random"})
+        llm.ask("hello", [], {"name": "random"})
+        self.assertEqual(llm.call_model.call_count, 4)
+        self.assertEqual(len(llm.response_cache), 2)
+
+        # Batch requests use cached responses
+        llm.call_model.reset_mock()
+        resp = llm.ask_batch([("hello", [], persona), ("new", [], persona)])
+        self.assertEqual(resp, ["resp: test||hello", "resp: test||new"])
+        llm.call_model.assert_called_once_with("test||new")
+
+    def test_convert_role(self):
+        self.assertEqual(MockLLM.convert_role("llm"), "assistant")
+        with self.assertRaises(ValueError):
+            MockLLM.convert_role("invalid")
+
+    def test_persona_prefix(self):
+        llm = MockLLM()
+        llm._tokenize = Mock(side_effect=lambda prompt: prompt.split())
+        llm._pin_persona_prefix = Mock()
+        llm._unpin_persona_prefix = Mock()
+        persona = {"name": "test", "user_id": "user",
+                   "system_prompt": "You are a test"}
+        prefix = llm.get_persona_prefix(persona)
+        self.assertEqual(prefix.text, "You are a test")
+        self.assertEqual(prefix.tokens, ["You", "are", "a", "test"])
+        llm._pin_persona_prefix.assert_called_once_with(prefix)
+
+        # Computed once per persona definition
+        self.assertIs(llm.get_persona_prefix(dict(persona)), prefix)
+        llm._tokenize.assert_called_once()
+
+        # Updates replace prefixes for the same persona ID
+        updated = dict(persona, system_prompt="You are updated")
+        new_prefix = llm.update_persona_prefix(updated)
+        self.assertEqual(new_prefix.text, "You are updated")
+        llm._unpin_persona_prefix.assert_called_once_with(prefix)
+        self.assertIsNot(llm.get_persona_prefix(persona), prefix)
+
+        llm.invalidate_persona_prefix({"persona_name": "test",
+                                       "user_id": "user"})
+        self.assertEqual(len(llm._persona_prefixes), 0)
+
+        # Default prefix
+        self.assertEqual(llm.get_persona_prefix({}).text,
+                         "Mock system prompt")
+
+    def test_persona_prefix_evicted(self):
+        llm = MockLLM({"persona_prefix_cache_size": 1})
+        llm._tokenize = Mock(side_effect=lambda prompt: prompt.split())
+        llm._unpin_persona_prefix = Mock()
+        first = llm.get_persona_prefix({"name": "first",
+                                        "system_prompt": "First"})
+        llm.get_persona_prefix({"name": "second", "system_prompt": "Second"})
+        # Prefixes dropped to make room are unpinned and forgotten
+        llm._unpin_persona_prefix.assert_called_once_with(first)
+        self.assertEqual(set(llm._persona_prefix_keys), {"second"})
+        llm.invalidate_persona_prefix({"name": "first"})
+        llm._unpin_persona_prefix.assert_called_once()
+
+    def test_fit_history(self):
+        llm = MockLLM({"context_window": 12, "max_output_tokens": 2})
+        llm._tokenize = Mock(side_effect=lambda prompt: prompt.split())
+        self.assertEqual(llm.history_token_budget, 10)
+        persona = {"name": "test", "system_prompt": "one two"}
+        history = [["user", "a b c"], ["llm", "d e"], ["user", "f g"],
+                   ["llm", "h i"]]
+        # 2 prefix + 2 message tokens leave 6 for history
+        fitted = llm._fit_history("j k", history, persona)
+        self.assertEqual(fitted, history[-3:])
+        self.assertEqual(llm.truncated_requests, 1)
+        self.assertEqual(llm.truncated_turns, 1)
+
+        # Turn token counts are cached
+        llm._tokenize.reset_mock()
+        self.assertEqual(llm._fit_history("j k", history + [["user", "l"]],
+                                          persona), history[-2:] +
+                         [["user", "l"]])
+        llm._tokenize.assert_called_once_with("l")
+
+        # History is only truncated when configured
+        self.assertIs(MockLLM()._fit_history("j k", history, persona),
+                      history)
+
+    def test_ask_truncated_history(self):
+        llm = MockLLM({"context_window": 3})
+        llm._tokenize = Mock(side_effect=lambda prompt: prompt.split())
+        resp = llm.ask("hello", [["user", "hi"], ["llm", "hey"]],
+                       {"name": "test", "system_prompt": "prompt"})
+        self.assertEqual(resp, "resp: test|llm:hey|hello")
+
+    def test_get_sorted_answer_indexes(self):
+        import numpy as np
+
+        class ScoringLLM(MockLLM):
+            get_sorted_answer_indexes = NeonLLM.get_sorted_answer_indexes
+
+            def _score_answers_batch(self, question, answers, persona):
+                return np.zeros(len(answers))
+
+        llm = ScoringLLM()
+        llm._score_answers_batch = Mock(
+            return_value=np.array([0.1, 0.9, np.nan, 0.9, 0.5]))
+        answers = ["a", "b", "c", "d", "e"]
+        # Ties keep answer order, missing scores are last
+        self.assertEqual(llm.get_sorted_answer_indexes("q", answers, {}),
+                         [1, 3, 4, 0, 2])
+        llm._score_answers_batch.assert_called_once_with("q", answers, {})
+        self.assertEqual(llm.get_sorted_answer_indexes("q", [], {}), [])
+
+        llm._score_answers_batch.return_value = [1.0, 2.0]
+        with self.assertRaises(ValueError):
+            llm.get_sorted_answer_indexes("q", answers, {})
+
+        # Backends must implement one of the ranking methods
+        with self.assertRaises(TypeError):
+            class UnrankedLLM(MockLLM):
+                get_sorted_answer_indexes = NeonLLM.get_sorted_answer_indexes
+
+        # Abstract backends may leave ranking to their subclasses
+        class AbstractLLM(NeonLLM):
+            pass
+
+        class RankingLLM(AbstractLLM, ScoringLLM):
+            pass
+
+        self.assertEqual(RankingLLM().get_sorted_answer_indexes("q", ["a"],
+                                                                {}), [0])
+
+    def test_get_top_answer_indexes(self):
+        def _rank(question, answers, persona):
+            return sorted(range(len(answers)), key=lambda i: -int(answers[i]))
+
+        llm = MockLLM({"max_answers_per_ranking": 3})
+        llm.get_sorted_answer_indexes = Mock(side_effect=_rank)
+        answers = ["4", "9", "1", "7", "3", "8", "2"]
+        self.assertEqual(llm._chunk_answers("q", answers),
+                         [[0, 1, 2], [3, 4, 5], [6]])
+
+        # Chunk winners advance until they can be ranked together
+        self.assertEqual(llm.get_top_answer_indexes("q", answers, {}, k=2),
+                         [1, 5])
+        for call in llm.get_sorted_answer_indexes.call_args_list:
+            self.assertLessEqual(len(call.args[1]), 3)
+        self.assertEqual(llm.get_sorted_answer_indexes.call_count, 5)
+
+        # Chunks no larger than k are merged within the limit
+        for max_answers, k, expected in ((2, 2, [1, 5]), (2, 3, [1, 5, 3]),
+                                         (3, 3, [1, 5, 3]), (1, 1, [1])):
+            llm = MockLLM({"max_answers_per_ranking": max_answers})
+            llm.get_sorted_answer_indexes = Mock(side_effect=_rank)
+            self.assertEqual(llm.get_top_answer_indexes("q", answers, {}, k=k),
+                             expected)
+            for call in llm.get_sorted_answer_indexes.call_args_list:
+                self.assertLessEqual(len(call.args[1]), max(max_answers, 2))
+
+        # A single answer is not ranked
+        llm.get_sorted_answer_indexes.reset_mock()
+        self.assertEqual(llm.get_top_answer_indexes("q", ["1"], {}), [0])
+        llm.get_sorted_answer_indexes.assert_not_called()
+
+        # Answers are also split by the token budget
+        llm = MockLLM({"context_window": 5})
+        llm._tokenize = Mock(side_effect=lambda prompt: prompt.split())
+        self.assertEqual(llm._chunk_answers("q", ["a b", "c d", "e"]),
+                         [[0, 1], [2]])
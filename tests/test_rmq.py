@@ -27,7 +27,7 @@
 import pytest
 
 from unittest import TestCase
-from unittest.mock import Mock
+from unittest.mock import ANY, Mock, patch
 
 from mirakuru import ProcessExitedWithError
 from neon_mq_connector.consumers import SelectConsumerThread
@@ -52,6 +52,8 @@ class NeonMockLlm(NeonLLMMQConnector):
         self._model = Mock()
         self._model.ask.return_value = "Mock response"
         self._model.get_sorted_answer_indexes.return_value = [0, 1]
+        self._model.get_top_answer_indexes.return_value = [0]
+        self._model.is_response_cache_excluded.return_value = False
         self.send_message = Mock()
         self._compose_opinion_prompt = Mock(return_value="Mock opinion prompt")
 
@@ -152,10 +154,11 @@ class TestNeonLLMMQConnector(TestCase):
                                     routing_key="mock_routing_key",
                                     query="Mock Query", history=[])
         self.mq_llm.handle_request(None, None, None,
-                                   dict_to_b64(request.model_dump())).join()
+                                   dict_to_b64(request.model_dump())).result()
         self.mq_llm.model.ask.assert_called_with(message=request.query,
                                                  chat_history=request.history,
-                                                 persona=request.persona)
+                                                 persona=request.persona,
+                                                 cancel_token=ANY)
         response = self.mq_llm.send_message.call_args.kwargs
         self.assertEqual(response['queue'], request.routing_key)
         response = LLMProposeResponse(**response['request_data'])
@@ -165,6 +168,63 @@ class TestNeonLLMMQConnector(TestCase):
 
         self.assertEqual(response.response, self.mq_llm.model.ask())
 
+    def test_handle_stream_request(self):
+        from neon_data_models.models.api.mq import (LLMProposeRequest,
+                                                    LLMProposeResponse)
+        from neon_llm_core.utils.streaming import STREAM_REQUEST_KEY
+        request = LLMProposeRequest(message_id="mock_message_id",
+                                    routing_key="mock_routing_key",
+                                    query="Mock Query", history=[])
+        request_data = request.model_dump()
+        request_data[STREAM_REQUEST_KEY] = True
+        self.mq_llm.model.ask_stream.return_value = iter(["one ", "", "two"])
+        self.mq_llm.send_message.reset_mock()
+        with patch.object(self.mq_llm, "create_mq_connection"), \
+                patch.object(self.mq_llm, "emit_mq_message") as emit:
+            self.mq_llm.handle_request(None, None, None,
+                                       dict_to_b64(request_data)).result()
+        self.mq_llm.send_message.assert_not_called()
+        messages = [c.kwargs["request_data"] for c in emit.call_args_list]
+        self.assertEqual([m["response"] for m in messages],
+                         ["one ", "two", "one two"])
+        self.assertEqual([m["seq"] for m in messages], [0, 1, 2])
+        self.assertEqual([m["final"] for m in messages], [False, False, True])
+        for call in emit.call_args_list:
+            self.assertEqual(call.kwargs["queue"], request.routing_key)
+        response = LLMProposeResponse(**messages[-1])
+        self.assertEqual(response.message_id, request.message_id)
+
+    def test_stream_past_deadline(self):
+        from time import sleep, time
+        from neon_data_models.models.api.mq import LLMProposeRequest
+        from neon_llm_core.utils.deadline import DEADLINE_KEY
+        from neon_llm_core.utils.streaming import STREAM_REQUEST_KEY
+
+        def _stream(cancel_token, **_):
+            yield "one "
+            sleep(0.5)
+            cancel_token.raise_if_cancelled()
+            yield "two"
+
+        request = LLMProposeRequest(message_id="mock_stream_deadline",
+                                    routing_key="mock_routing_key",
+                                    query="Mock Query", history=[])
+        request_data = request.model_dump()
+        request_data[STREAM_REQUEST_KEY] = True
+        request_data[DEADLINE_KEY] = time() + 0.2
+        self.mq_llm.model.ask_stream.side_effect = _stream
+        try:
+            with patch.object(self.mq_llm, "create_mq_connection"), \
+                    patch.object(self.mq_llm, "emit_mq_message") as emit:
+                self.mq_llm.handle_request(None, None, None,
+                                           dict_to_b64(request_data)).result()
+        finally:
+            self.mq_llm.model.ask_stream.side_effect = None
+        # A stream that started before its deadline is completed
+        final = emit.call_args.kwargs["request_data"]
+        self.assertTrue(final["final"])
+        self.assertEqual(final["response"], "one two")
+
     def test_handle_opinion_request(self):
         from neon_data_models.models.api.mq import (LLMDiscussRequest,
                                                     LLMDiscussResponse)
@@ -175,7 +235,7 @@ class TestNeonLLMMQConnector(TestCase):
                                     options={"bot 1": "resp 1",
                                              "bot 2": "resp 2"})
         self.mq_llm.handle_opinion_request(None, None, None,
-                                           dict_to_b64(request.model_dump())).join()
+                                           dict_to_b64(request.model_dump())).result()
 
         self.mq_llm._compose_opinion_prompt.assert_called_with(
             list(request.options.keys())[0], request.query,
@@ -196,7 +256,7 @@ class TestNeonLLMMQConnector(TestCase):
                                     query="Mock Discuss 1", history=[],
                                     options={})
         self.mq_llm.handle_opinion_request(None, None, None,
-                                           dict_to_b64(request.model_dump())).join()
+                                           dict_to_b64(request.model_dump())).result()
         response = self.mq_llm.send_message.call_args.kwargs
         self.assertEqual(response['queue'], request.routing_key)
         response = LLMDiscussResponse(**response['request_data'])
@@ -217,7 +277,7 @@ class TestNeonLLMMQConnector(TestCase):
                                  query="Mock Score", history=[],
                                  responses=["one", "two"])
         self.mq_llm.handle_score_request(None, None, None,
-                                         dict_to_b64(request.model_dump())).join()
+                                         dict_to_b64(request.model_dump())).result()
 
         response = self.mq_llm.send_message.call_args.kwargs
         self.assertEqual(response['queue'], request.routing_key)
@@ -234,7 +294,7 @@ class TestNeonLLMMQConnector(TestCase):
                                  routing_key="mock_routing_key",
                                  query="Mock Score", history=[], responses=[])
         self.mq_llm.handle_score_request(None, None, None,
-                                         dict_to_b64(request.model_dump())).join()
+                                         dict_to_b64(request.model_dump())).result()
 
         response = self.mq_llm.send_message.call_args.kwargs
         self.assertEqual(response['queue'], request.routing_key)
@@ -244,3 +304,526 @@ class TestNeonLLMMQConnector(TestCase):
         self.assertEqual(request.message_id, response.message_id)
 
         self.assertEqual(response.sorted_answer_indexes, [])
+
+    def test_request_acked_on_start(self):
+        from neon_data_models.models.api.mq import LLMProposeRequest
+        request = LLMProposeRequest(message_id="mock_message_id",
+                                    routing_key="mock_routing_key",
+                                    query="Mock Query", history=[])
+        channel = Mock()
+        del channel.connection.ioloop
+        method = Mock(delivery_tag=42)
+        self.mq_llm.handle_request(channel, method, None,
+                                   dict_to_b64(request.model_dump())).result()
+        channel.connection.add_callback_threadsafe.assert_called_once()
+        ack = channel.connection.add_callback_threadsafe.call_args.args[0]
+        ack()
+        channel.basic_ack.assert_called_once_with(delivery_tag=42)
+
+        # Messages that cannot be parsed or queued are rejected
+        channel.reset_mock()
+        self.assertIsNone(self.mq_llm.handle_request(channel, method, None,
+                                                     b"not a message"))
+        with patch.object(self.mq_llm._executors["score"], "submit",
+                          side_effect=RuntimeError("shut down")):
+            self.assertIsNone(self.mq_llm.handle_score_request(
+                channel, method, None, dict_to_b64(request.model_dump())))
+        self.assertEqual(
+            channel.connection.add_callback_threadsafe.call_count, 2)
+        for call in channel.connection.add_callback_threadsafe.call_args_list:
+            call.args[0]()
+        channel.basic_ack.assert_not_called()
+        self.assertEqual(channel.basic_nack.call_count, 2)
+        channel.basic_nack.assert_called_with(delivery_tag=42, requeue=False)
+
+        metrics = self.mq_llm.get_metrics()["executors"]
+        self.assertEqual(set(metrics), {"ask", "score", "discussion"})
+        self.assertGreaterEqual(metrics["ask"]["execution"]["count"], 1)
+        self.assertEqual(metrics["ask"]["max_workers"],
+                         self.mq_llm.default_num_workers)
+
+    def test_ranking_cache_shared(self):
+        from neon_data_models.models.api.mq import (LLMVoteRequest,
+                                                    LLMDiscussRequest)
+        self.mq_llm.model.get_sorted_answer_indexes.reset_mock()
+        vote = LLMVoteRequest(message_id="mock_vote_id",
+                              routing_key="mock_routing_key",
+                              query="Mock Ranking", history=[],
+                              responses=["resp 1", "resp 2"])
+        self.mq_llm.handle_score_request(None, None, None,
+                                         dict_to_b64(vote.model_dump())).result()
+        discuss = LLMDiscussRequest(message_id="mock_discuss_id",
+                                    routing_key="mock_routing_key",
+                                    query="Mock Ranking", history=[],
+                                    options={"bot 1": "resp 1",
+                                             "bot 2": "resp 2"})
+        self.mq_llm.handle_opinion_request(
+            None, None, None, dict_to_b64(discuss.model_dump())).result()
+        self.mq_llm.model.get_sorted_answer_indexes.assert_called_once()
+        self.assertGreaterEqual(self.mq_llm._ranking_cache.hits, 1)
+
+        # Different answers are ranked again
+        vote.responses = ["resp 2", "resp 3"]
+        self.mq_llm.handle_score_request(None, None, None,
+                                         dict_to_b64(vote.model_dump())).result()
+        self.assertEqual(
+            self.mq_llm.model.get_sorted_answer_indexes.call_count, 2)
+
+    def test_top_k_ranking(self):
+        from neon_data_models.models.api.mq import (LLMVoteRequest,
+                                                    LLMVoteResponse)
+        self.mq_llm.model.get_sorted_answer_indexes.reset_mock()
+        self.mq_llm.model.get_top_answer_indexes.reset_mock()
+        vote = LLMVoteRequest(message_id="mock_vote_id",
+                              routing_key="mock_routing_key",
+                              query="Mock Top K", history=[],
+                              responses=["resp 1", "resp 2", "resp 3"])
+        request = vote.model_dump()
+        request["k"] = 1
+        self.mq_llm.handle_score_request(None, None, None,
+                                         dict_to_b64(request)).result()
+        self.mq_llm.model.get_top_answer_indexes.assert_called_once_with(
+            question=vote.query, answers=vote.responses,
+            persona=request["persona"], k=1)
+        self.mq_llm.model.get_sorted_answer_indexes.assert_not_called()
+        response = LLMVoteResponse(
+            **self.mq_llm.send_message.call_args.kwargs['request_data'])
+        self.assertEqual(response.sorted_answer_indexes, [0])
+
+        # Top-k selection is cached separately from full rankings
+        self.mq_llm.handle_score_request(None, None, None,
+                                         dict_to_b64(request)).result()
+        self.mq_llm.model.get_top_answer_indexes.assert_called_once()
+        self.mq_llm.handle_score_request(None, None, None,
+                                         dict_to_b64(vote.model_dump())
+                                         ).result()
+        self.mq_llm.model.get_sorted_answer_indexes.assert_called_once()
+
+        # A cached full ranking satisfies a top-k request
+        request["k"] = 2
+        self.mq_llm.handle_score_request(None, None, None,
+                                         dict_to_b64(request)).result()
+        self.mq_llm.model.get_top_answer_indexes.assert_called_once()
+        response = LLMVoteResponse(
+            **self.mq_llm.send_message.call_args.kwargs['request_data'])
+        self.assertEqual(response.sorted_answer_indexes, [0, 1])
+
+    def test_identical_requests_coalesced(self):
+        from threading import Event
+        release = Event()
+        self.mq_llm.model.ask.reset_mock()
+        self.mq_llm.model.ask.side_effect = \
+            lambda *_, **__: release.wait(5) and "Coalesced response"
+        try:
+            futures = [self.mq_llm._executors["ask"].submit(
+                self.mq_llm._ask_model, message="Same query",
+                chat_history=[], persona={}) for _ in range(3)]
+            while self.mq_llm._ask_flights.collapsed < 2:
+                release.wait(0.01)
+            release.set()
+            self.assertEqual([f.result(timeout=5) for f in futures],
+                             ["Coalesced response"] * 3)
+            self.mq_llm.model.ask.assert_called_once()
+            self.assertEqual(self.mq_llm.get_metrics()["coalesced"]["ask"],
+                             {"executed": 1, "collapsed": 2, "in_flight": 0})
+        finally:
+            self.mq_llm.model.ask.side_effect = None
+
+    def test_excluded_persona_not_coalesced(self):
+        from threading import Event
+        release = Event()
+        self.mq_llm.model.ask.reset_mock()
+        self.mq_llm.model.ask.side_effect = \
+            lambda *_, **__: release.wait(5) and "Random response"
+        try:
+            with patch.object(self.mq_llm.model, "is_response_cache_excluded",
+                              return_value=True):
+                futures = [self.mq_llm._executors["ask"].submit(
+                    self.mq_llm._ask_model, message="Same query",
+                    chat_history=[], persona={"name": "random"})
+                    for _ in range(2)]
+                while self.mq_llm.model.ask.call_count < 2:
+                    release.wait(0.01)
+                release.set()
+                self.assertEqual([f.result(timeout=5) for f in futures],
+                                 ["Random response"] * 2)
+            self.assertEqual(self.mq_llm.model.ask.call_count, 2)
+        finally:
+            self.mq_llm.model.ask.side_effect = None
+
+    def test_async_handlers(self):
+        import asyncio
+        from threading import Thread
+        from unittest.mock import AsyncMock
+        from neon_data_models.models.api.mq import (LLMProposeRequest,
+                                                    LLMProposeResponse,
+                                                    LLMVoteRequest,
+                                                    LLMVoteResponse,
+                                                    LLMDiscussRequest,
+                                                    LLMDiscussResponse)
+        self.assertIsNone(self.mq_llm._event_loop)
+        loop = asyncio.new_event_loop()
+        Thread(target=loop.run_forever, daemon=True).start()
+        self.mq_llm._event_loop = loop
+        self.mq_llm.model.aask = AsyncMock(return_value="Async response")
+        self.mq_llm.model.aget_sorted_answer_indexes = \
+            AsyncMock(return_value=[1, 0])
+        self.mq_llm.model.aget_top_answer_indexes = \
+            AsyncMock(return_value=[1])
+        try:
+            request = LLMProposeRequest(message_id="mock_async_id",
+                                        routing_key="mock_routing_key",
+                                        query="Async Query", history=[])
+            self.mq_llm.handle_request(None, None, None,
+                                       dict_to_b64(request.model_dump())
+                                       ).result(timeout=5)
+            self.mq_llm.model.aask.assert_awaited_once_with(
+                message=request.query, chat_history=request.history,
+                persona=request.persona, cancel_token=ANY)
+            response = LLMProposeResponse(
+                **self.mq_llm.send_message.call_args.kwargs['request_data'])
+            self.assertEqual(response.response, "Async response")
+            self.assertEqual(response.message_id, request.message_id)
+            # Concurrency limits are created on the loop when first needed
+            self.assertEqual(set(self.mq_llm._async_limits), {"ask"})
+            self.assertEqual(self.mq_llm._async_limits["ask"]._value,
+                             self.mq_llm._executors["ask"].max_workers)
+
+            request = LLMVoteRequest(message_id="mock_async_id",
+                                     routing_key="mock_routing_key",
+                                     query="Async Score", history=[],
+                                     responses=["one", "two"])
+            self.mq_llm.handle_score_request(None, None, None,
+                                             dict_to_b64(request.model_dump())
+                                             ).result(timeout=5)
+            response = LLMVoteResponse(
+                **self.mq_llm.send_message.call_args.kwargs['request_data'])
+            self.assertEqual(response.sorted_answer_indexes, [1, 0])
+
+            request = LLMDiscussRequest(message_id="mock_async_id",
+                                        routing_key="mock_routing_key",
+                                        query="Async Discuss", history=[],
+                                        options={"bot 1": "resp 1",
+                                                 "bot 2": "resp 2"})
+            self.mq_llm.handle_opinion_request(
+                None, None, None, dict_to_b64(request.model_dump())
+            ).result(timeout=5)
+            self.mq_llm._compose_opinion_prompt.assert_called_with(
+                "bot 2", request.query, "resp 2")
+            response = LLMDiscussResponse(
+                **self.mq_llm.send_message.call_args.kwargs['request_data'])
+            self.assertEqual(response.opinion, "Async response")
+        finally:
+            self.mq_llm._event_loop = None
+            self.mq_llm._async_limits.clear()
+            loop.call_soon_threadsafe(loop.stop)
+
+    def test_load_model(self):
+        self.mq_llm.model.preload.reset_mock()
+        self.mq_llm.model.warmup.reset_mock()
+        self.mq_llm._model_ready.clear()
+        self.mq_llm._model_load_stats.clear()
+        self.assertFalse(self.mq_llm.check_health())
+        names = tuple(self.mq_llm.request_consumer_names)
+        self.assertEqual(len(names), 3)
+        with patch.object(self.mq_llm, "run_consumers") as run_consumers, \
+                patch.object(self.mq_llm, "_register_local_handlers"):
+            # Consumers are not started after the connector is stopped
+            self.mq_llm._load_model(consumer_names=names)
+            run_consumers.assert_not_called()
+            self.mq_llm.model.preload.assert_called_once()
+            self.mq_llm.model.warmup.assert_called_once_with([])
+
+            self.mq_llm._consumers_started = True
+            try:
+                self.mq_llm._load_model(consumer_names=names)
+            finally:
+                self.mq_llm._consumers_started = False
+            run_consumers.assert_called_once_with(names=names, daemon=False)
+        self.assertTrue(self.mq_llm.model_ready)
+        metrics = self.mq_llm.get_metrics()["model"]
+        self.assertTrue(metrics["ready"])
+        self.assertIsInstance(metrics["load_time"], float)
+        self.assertIsInstance(metrics["warmup_time"], float)
+
+    def test_model_replicas(self):
+        from neon_data_models.models.api.mq import LLMProposeRequest
+        replica = Mock()
+        replica.ask.return_value = "Replica response"
+        with patch.object(NeonMockLlm, "model_config",
+                          new={"model_replicas": 2}), \
+                patch.object(self.mq_llm, "create_model",
+                             return_value=replica):
+            self.mq_llm._model_pool = None
+            try:
+                pool = self.mq_llm.model_pool
+                self.assertEqual(pool.replicas, [self.mq_llm.model, replica])
+                self.assertIs(replica.response_cache,
+                              self.mq_llm.model.response_cache)
+                with pool.acquire() as model:
+                    self.assertIs(model, self.mq_llm.model)
+                    # Requests go to the idle replica
+                    request = LLMProposeRequest(message_id="mock_replica_id",
+                                                routing_key="mock_routing_key",
+                                                query="Replica Query",
+                                                history=[])
+                    self.mq_llm.handle_request(
+                        None, None, None,
+                        dict_to_b64(request.model_dump())).result()
+                replica.ask.assert_called_once()
+                metrics = pool.get_metrics()
+                self.assertEqual([m["calls"]["count"] for m in metrics],
+                                 [1, 1])
+            finally:
+                self.mq_llm._model_pool = None
+
+    def test_model_processes(self):
+        with patch.object(NeonMockLlm, "model_config",
+                          new={"model_processes": 2}), \
+                patch("neon_llm_core.rmq.ProcessModel") as process_model:
+            self.mq_llm._model_pool = None
+            try:
+                pool = self.mq_llm.model_pool
+                self.assertEqual(len(pool), 2)
+                self.assertEqual(process_model.call_count, 2)
+                process_model.assert_called_with(
+                    model_class=type(self.mq_llm.model),
+                    config=self.mq_llm.model.llm_config)
+                self.assertNotIn(self.mq_llm.model, pool.replicas)
+            finally:
+                self.mq_llm._model_pool = None
+
+    def test_expired_requests_dropped(self):
+        from time import time
+        from neon_data_models.models.api.mq import (LLMProposeRequest,
+                                                    LLMVoteRequest,
+                                                    LLMDiscussRequest)
+        from neon_llm_core.utils.deadline import DEADLINE_KEY
+        self.mq_llm.model.ask.reset_mock()
+        self.mq_llm.model.get_sorted_answer_indexes.reset_mock()
+        self.mq_llm.send_message.reset_mock()
+        expired = self.mq_llm.get_metrics()["expired"]
+        requests = ((self.mq_llm.handle_request,
+                     LLMProposeRequest(message_id="mock_expired_id",
+                                       routing_key="mock_routing_key",
+                                       query="Expired Query", history=[])),
+                    (self.mq_llm.handle_score_request,
+                     LLMVoteRequest(message_id="mock_expired_id",
+                                    routing_key="mock_routing_key",
+                                    query="Expired Score", history=[],
+                                    responses=["one", "two"])),
+                    (self.mq_llm.handle_opinion_request,
+                     LLMDiscussRequest(message_id="mock_expired_id",
+                                       routing_key="mock_routing_key",
+                                       query="Expired Discuss", history=[],
+                                       options={"bot 1": "resp 1"})))
+        for handler, request in requests:
+            request_data = request.model_dump()
+            request_data[DEADLINE_KEY] = time() - 1
+            handler(None, None, None, dict_to_b64(request_data)).result()
+        self.mq_llm.model.ask.assert_not_called()
+        self.mq_llm.model.get_sorted_answer_indexes.assert_not_called()
+        self.mq_llm.send_message.assert_not_called()
+        metrics = self.mq_llm.get_metrics()["expired"]
+        for request_type in ("ask", "score", "discussion"):
+            self.assertEqual(metrics[request_type],
+                             expired[request_type] + 1)
+
+        # Requests before their deadline are handled
+        handler, request = requests[0]
+        request_data = request.model_dump()
+        request_data[DEADLINE_KEY] = time() + 30
+        handler(None, None, None, dict_to_b64(request_data)).result()
+        self.mq_llm.model.ask.assert_called_once()
+        self.mq_llm.send_message.assert_called_once()
+        self.assertEqual(self.mq_llm.get_metrics()["expired"], metrics)
+
+    def test_cancel_request(self):
+        from threading import Event
+        from time import time
+        from neon_data_models.models.api.mq import LLMProposeRequest
+        from neon_llm_core.utils.cancellation import CancellationToken
+        from neon_llm_core.utils.deadline import DEADLINE_KEY
+        started = Event()
+
+        def _ask(cancel_token, **_):
+            self.assertIsInstance(cancel_token, CancellationToken)
+            started.set()
+            cancel_token.wait(5)
+            cancel_token.raise_if_cancelled()
+            return "Not cancelled"
+
+        self.mq_llm.model.ask.side_effect = _ask
+        self.mq_llm.send_message.reset_mock()
+        try:
+            request = LLMProposeRequest(message_id="mock_cancel_id",
+                                        routing_key="mock_routing_key",
+                                        query="Cancel Query", history=[])
+            future = self.mq_llm.handle_request(
+                None, None, None, dict_to_b64(request.model_dump()))
+            self.assertTrue(started.wait(5))
+            self.mq_llm.handle_cancel_request(
+                None, None, None, dict_to_b64({"message_id":
+                                               request.message_id}))
+            future.result(timeout=5)
+            self.mq_llm.send_message.assert_not_called()
+            metrics = self.mq_llm.get_metrics()["cancellation"]
+            self.assertEqual(metrics["in_flight"], 0)
+            self.assertGreaterEqual(metrics["cancelled"], 1)
+
+            # Requests are cancelled at their deadline
+            started.clear()
+            request_data = request.model_dump()
+            request_data["query"] = "Deadline Query"
+            request_data[DEADLINE_KEY] = time() + 0.5
+            self.mq_llm.handle_request(
+                None, None, None, dict_to_b64(request_data)).result(timeout=5)
+            self.assertTrue(started.is_set())
+            self.mq_llm.send_message.assert_not_called()
+            self.assertGreaterEqual(
+                self.mq_llm.get_metrics()["cancellation"]["expired"], 1)
+        finally:
+            self.mq_llm.model.ask.side_effect = None
+
+    def test_priority_scheduling(self):
+        from neon_data_models.models.api.mq import LLMVoteRequest
+        self.assertIsNone(self.mq_llm._scheduler)
+        self.assertNotIn("scheduler", self.mq_llm.get_metrics())
+        with patch.object(NeonMockLlm, "model_config",
+                          new={"priority_scheduling": {
+                              "enabled": True, "weights": {"ask": 2}}}):
+            scheduler = self.mq_llm._init_scheduler()
+        self.assertEqual(scheduler.max_concurrent, 1)
+        self.assertEqual(scheduler.weights,
+                         {"ask": 2, "score": 4, "discussion": 2})
+
+        # Slots are scaled so that ask batches can fill up
+        with patch.object(NeonMockLlm, "model_config",
+                          new={"priority_scheduling": {"enabled": True},
+                               "model_replicas": 2, "max_batch_size": 4}):
+            self.assertEqual(self.mq_llm._init_scheduler().max_concurrent, 8)
+        with patch.object(NeonMockLlm, "model_config",
+                          new={"priority_scheduling": {"enabled": True,
+                                                       "max_concurrent": 2},
+                               "max_batch_size": 4}):
+            self.assertEqual(self.mq_llm._init_scheduler().max_concurrent, 2)
+        self.mq_llm._scheduler = scheduler
+        try:
+            request = LLMVoteRequest(message_id="mock_scheduled_id",
+                                     routing_key="mock_routing_key",
+                                     query="Scheduled Score", history=[],
+                                     responses=["one", "two"])
+            self.mq_llm.handle_score_request(
+                None, None, None, dict_to_b64(request.model_dump())).result()
+            metrics = self.mq_llm.get_metrics()["scheduler"]
+            self.assertEqual(metrics["latency"]["score"]["count"], 1)
+            self.assertEqual(metrics["latency"]["ask"]["count"], 0)
+            self.assertEqual(metrics["active"], 0)
+        finally:
+            self.mq_llm._scheduler = None
+
+    def test_handle_persona_update(self):
+        from neon_llm_core.utils.personas.provider import PersonasProvider
+        persona = {"name": "test_persona", "user_id": None,
+                   "description": "Test persona", "enabled": True}
+        with patch.object(PersonasProvider, "apply_persona_data") as apply, \
+                patch.object(PersonasProvider, "remove_persona"):
+            from neon_data_models.models.api.llm import LLMPersona
+            apply.return_value = LLMPersona(**persona)
+            self.mq_llm.handle_persona_update(None, None, None,
+                                              dict_to_b64(persona))
+            # Prefixes are not recomputed until the persona is used
+            self.mq_llm.model.update_persona_prefix.assert_not_called()
+            self.mq_llm.model.invalidate_persona_prefix.assert_called_once()
+
+            self.mq_llm.handle_persona_delete(None, None, None,
+                                              dict_to_b64(persona))
+            self.assertEqual(
+                self.mq_llm.model.invalidate_persona_prefix.call_count, 2)
+
+    def test_ask_model_batched(self):
+        from neon_llm_core.utils.batching import BatchCollector
+        self.assertIsNone(self.mq_llm._ask_batcher)
+        self.mq_llm.model.ask_batch.return_value = ["batched response"]
+        self.mq_llm._ask_batcher = BatchCollector(
+            batch_handler=self.mq_llm._ask_model_batch, max_wait_ms=0)
+        try:
+            response = self.mq_llm._ask_model(message="query",
+                                              chat_history=[],
+                                              persona={})
+            self.assertEqual(response, "batched response")
+            self.mq_llm.model.ask_batch.assert_called_once_with(
+                [("query", [], {})])
+        finally:
+            self.mq_llm._ask_batcher.shutdown()
+            self.mq_llm._ask_batcher = None
+
+    def test_local_transport(self):
+        from neon_data_models.models.api.mq import (LLMProposeRequest,
+                                                    LLMVoteRequest)
+        from neon_llm_core.utils.local_transport import local_transport
+        self.assertFalse(local_transport.has_handler(self.mq_llm.queue_ask))
+        self.mq_llm.ovos_config["LLM_MOCK_MQ"] = {"local_transport": True}
+        self.mq_llm.send_message.reset_mock()
+        try:
+            self.mq_llm._register_local_handlers()
+            for queue in (self.mq_llm.queue_ask, self.mq_llm.queue_score,
+                          self.mq_llm.queue_opinion):
+                self.assertTrue(local_transport.has_handler(queue))
+
+            request = LLMProposeRequest(message_id="", query="Local Query",
+                                        history=[])
+            response = local_transport.request(self.mq_llm.queue_ask,
+                                               request.model_dump())
+            self.assertEqual(response["response"], "Mock response")
+            self.assertTrue(response["message_id"])
+
+            request = LLMVoteRequest(message_id="", query="Local Score",
+                                     history=[], responses=["one", "two"])
+            response = local_transport.request(self.mq_llm.queue_score,
+                                               request.model_dump())
+            self.assertEqual(response["sorted_answer_indexes"], [0, 1])
+
+            self.mq_llm.model.ask_stream.return_value = iter(["one ", "two"])
+            chunks = []
+            request = LLMProposeRequest(message_id="", query="Local Stream",
+                                        history=[])
+            response = local_transport.stream_request(
+                self.mq_llm.queue_ask, request.model_dump(),
+                on_chunk=chunks.append)
+            self.assertEqual(chunks, ["one ", "two"])
+            self.assertEqual(response["response"], "one two")
+            self.mq_llm.send_message.assert_not_called()
+        finally:
+            self.mq_llm._unregister_local_handlers()
+            self.mq_llm.ovos_config.pop("LLM_MOCK_MQ")
+        self.assertFalse(local_transport.has_handler(self.mq_llm.queue_ask))
+
+    def test_rpc_bot_request(self):
+        from neon_llm_core.chatbot import LLMBot
+        from neon_llm_core.utils.rpc import stop_rpc_clients
+        mq_config = {"server": "127.0.0.1", "port": self.rmq_instance.port,
+                     "users": {"mq_handler": {"user": "test_llm_user",
+                                              "password": "test_llm_password"}}}
+        # Respond through MQ, declaring the bot's reply queue from the
+        # service connection
+        connector = NeonMockLlm(self.rmq_instance.port)
+        del connector.send_message
+        connector.run(run_sync=False)
+        bot = LLMBot(llm_name=connector.name,
+                     persona={"name": "test_persona",
+                              "system_prompt": "Test Prompt"},
+                     use_rpc_client=True, request_timeout=10)
+        try:
+            with patch("neon_llm_core.utils.rpc.load_mq_handler_config",
+                       return_value=mq_config):
+                for query in ("First Query", "Second Query"):
+                    response = bot._get_llm_api_response(shout=query)
+                    self.assertEqual(response.response, "Mock response")
+                    connector.model.ask.assert_called_with(
+                        message=query, chat_history=[], persona=ANY,
+                        cancel_token=ANY)
+        finally:
+            stop_rpc_clients()
+            bot.shutdown()
+            connector.stop()
@@ -0,0 +1,85 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 NeonGecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+
+from threading import Thread
+from unittest.mock import Mock
+
+from neon_llm_core.utils.batching import BatchCollector
+
+
+class TestBatchCollector(unittest.TestCase):
+    def test_single_item_dispatched_after_wait(self):
+        handler = Mock(side_effect=lambda items: [i * 2 for i in items])
+        collector = BatchCollector(handler, max_batch_size=4, max_wait_ms=10)
+        self.assertEqual(collector.submit(2).result(timeout=2), 4)
+        handler.assert_called_once_with([2])
+        collector.shutdown()
+        self.assertFalse(collector.is_running)
+
+    def test_concurrent_items_are_batched(self):
+        batches = []
+
+        def _handler(items):
+            batches.append(list(items))
+            return [i + 1 for i in items]
+
+        collector = BatchCollector(_handler, max_batch_size=3,
+                                   max_wait_ms=500)
+        results = {}
+
+        def _submit(value):
+            results[value] = collector.submit(value).result(timeout=5)
+
+        threads = [Thread(target=_submit, args=(i,)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        collector.shutdown()
+
+        self.assertEqual(results, {i: i + 1 for i in range(6)})
+        self.assertTrue(all(len(batch) <= 3 for batch in batches))
+        self.assertLess(len(batches), 6)
+
+    def test_handler_exception_propagates(self):
+        collector = BatchCollector(Mock(side_effect=ValueError("fail")),
+                                   max_wait_ms=0)
+        with self.assertRaises(ValueError):
+            collector.submit("item").result(timeout=2)
+
+        collector.batch_handler = Mock(return_value=[])
+        with self.assertRaises(ValueError):
+            collector.submit("item").result(timeout=2)
+        collector.shutdown()
+
+    def test_submit_after_shutdown(self):
+        collector = BatchCollector(Mock(), max_wait_ms=0)
+        collector.shutdown()
+        with self.assertRaises(RuntimeError):
+            collector.submit("item").result(timeout=1)
+        self.assertFalse(collector.is_running)
@@ -0,0 +1,97 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 NeonGecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+
+from time import sleep
+from unittest.mock import Mock
+
+from neon_llm_core.utils.cache import ResponseCache, make_cache_key
+
+
+class TestCacheUtils(unittest.TestCase):
+    def test_make_cache_key(self):
+        key = make_cache_key({"name": "test", "description": "desc"}, "query",
+                             [["user", "hi"]])
+        self.assertIsInstance(key, str)
+        self.assertEqual(key, make_cache_key({"description": "desc",
+                                              "name": "test"}, "query",
+                                             [["user", "hi"]]))
+        self.assertNotEqual(key, make_cache_key({"name": "test"}, "query",
+                                                [["user", "hi"]]))
+        self.assertNotEqual(key, make_cache_key({"name": "test",
+                                                 "description": "desc"},
+                                                "query", []))
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_get_put(self):
+        cache = ResponseCache(max_size=2, ttl=None)
+        self.assertIsNone(cache.get("missing"))
+        self.assertEqual(cache.get("missing", "default"), "default")
+        cache.put("key", "value")
+        self.assertEqual(cache.get("key"), "value")
+        self.assertEqual(cache.pop("key"), "value")
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.get_metrics(), {"size": 0, "max_size": 2,
+                                               "hits": 1, "misses": 2,
+                                               "evictions": 0})
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_size=2, ttl=None)
+        cache.put("one", 1)
+        cache.put("two", 2)
+        cache.get("one")
+        cache.put("three", 3)
+        self.assertEqual(cache.get("one"), 1)
+        self.assertIsNone(cache.get("two"))
+        self.assertEqual(cache.get("three"), 3)
+        self.assertEqual(cache.evictions, 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_on_evict(self):
+        on_evict = Mock()
+        cache = ResponseCache(max_size=1, ttl=0.05, on_evict=on_evict)
+        cache.put("one", 1)
+        cache.put("two", 2)
+        on_evict.assert_called_once_with("one", 1)
+        # Removed entries are not evicted
+        cache.pop("two")
+        on_evict.assert_called_once()
+        cache.put("three", 3)
+        sleep(0.1)
+        self.assertIsNone(cache.get("three"))
+        on_evict.assert_called_with("three", 3)
+        self.assertEqual(on_evict.call_count, 2)
+
+    def test_ttl(self):
+        cache = ResponseCache(max_size=2, ttl=0.05)
+        cache.put("key", "value")
+        self.assertEqual(cache.get("key"), "value")
+        sleep(0.1)
+        self.assertIsNone(cache.get("key"))
+        self.assertEqual(len(cache), 0)
@@ -0,0 +1,105 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 NeonGecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import unittest
+
+from time import sleep, time
+from unittest.mock import Mock
+
+from neon_llm_core.utils.cancellation import (
+    CancellationRegistry,
+    CancellationToken,
+    RequestCancelled,
+)
+
+
+class TestCancellationToken(unittest.TestCase):
+    def test_cancel(self):
+        token = CancellationToken()
+        callback = Mock()
+        token.add_callback(callback)
+        self.assertFalse(token.cancelled)
+        token.raise_if_cancelled()
+        self.assertFalse(token.wait(0.01))
+
+        token.cancel("test")
+        token.cancel("again")
+        self.assertTrue(token.cancelled)
+        self.assertEqual(token.reason, "test")
+        callback.assert_called_once_with()
+        with self.assertRaises(RequestCancelled):
+            token.raise_if_cancelled()
+
+        # Callbacks added after cancellation run immediately
+        late_callback = Mock()
+        token.add_callback(late_callback)
+        late_callback.assert_called_once_with()
+
+    def test_callback_error(self):
+        token = CancellationToken()
+        token.add_callback(Mock(side_effect=RuntimeError("abort failed")))
+        callback = Mock()
+        token.add_callback(callback)
+        token.cancel()
+        callback.assert_called_once_with()
+
+
+class TestCancellationRegistry(unittest.TestCase):
+    def test_cancel(self):
+        registry = CancellationRegistry()
+        token = registry.register("request")
+        self.assertEqual(registry.in_flight, 1)
+        self.assertTrue(registry.cancel("request", "test"))
+        self.assertTrue(token.cancelled)
+        self.assertFalse(registry.cancel("request"))
+        self.assertFalse(registry.cancel("unknown"))
+        self.assertEqual(registry.get_metrics(),
+                         {"in_flight": 0, "cancelled": 1, "expired": 0})
+
+    def test_deadline(self):
+        registry = CancellationRegistry()
+        later = registry.register("later", deadline=time() + 30)
+        token = registry.register("request", deadline=time() + 0.1)
+        completed = registry.register("completed", deadline=time() + 0.1)
+        registry.unregister("completed")
+        self.assertTrue(token.wait(5))
+        self.assertEqual(token.reason, "deadline exceeded")
+        self.assertFalse(completed.cancelled)
+        self.assertFalse(later.cancelled)
+        self.assertEqual(registry.in_flight, 1)
+        self.assertEqual(registry.expired, 1)
+
+    def test_deadline_after_completed_requests(self):
+        registry = CancellationRegistry()
+        registry.register("completed", deadline=time() + 0.1)
+        registry.unregister("completed")
+        sleep(0.3)
+        # The deadline thread keeps running once no deadlines are left
+        token = registry.register("request", deadline=time() + 0.1)
+        self.assertTrue(token.wait(5))
+        self.assertTrue(registry._thread.is_alive())
+        self.assertEqual(registry.expired, 1)
@@ -0,0 +1,79 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 NeonGecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+
+from threading import Event
+from time import sleep
+from unittest.mock import Mock
+
+from neon_llm_core.utils.executor import BoundedExecutor
+
+
+class TestBoundedExecutor(unittest.TestCase):
+    def setUp(self):
+        self.executor = BoundedExecutor(max_workers=2, name="test_executor")
+
+    def tearDown(self):
+        self.executor.shutdown(wait=True)
+
+    def test_submit(self):
+        on_start = Mock()
+        future = self.executor.submit(lambda x, y: x + y, 1, y=2,
+                                      on_start=on_start)
+        self.assertEqual(future.result(timeout=2), 3)
+        on_start.assert_called_once_with()
+        metrics = self.executor.get_metrics()
+        self.assertEqual(metrics["max_workers"], 2)
+        self.assertEqual(metrics["queue_wait"]["count"], 1)
+        self.assertEqual(metrics["execution"]["count"], 1)
+
+    def test_concurrency_is_bounded(self):
+        release = Event()
+        started = []
+
+        def _task(idx):
+            started.append(idx)
+            release.wait(5)
+            return idx
+
+        futures = [self.executor.submit(_task, i) for i in range(4)]
+        while self.executor.active < 2:
+            sleep(0.01)
+        self.assertEqual(self.executor.active, 2)
+        self.assertEqual(self.executor.pending, 2)
+        self.assertEqual(len(started), 2)
+        release.set()
+        self.assertEqual([f.result(timeout=2) for f in futures],
+                         [0, 1, 2, 3])
+        self.assertEqual(self.executor.active, 0)
+        self.assertEqual(self.executor.pending, 0)
+
+    def test_task_exception(self):
+        future = self.executor.submit(Mock(side_effect=ValueError("fail")))
+        with self.assertRaises(ValueError):
+            future.result(timeout=2)
+        self.assertEqual(self.executor.execution.count, 1)
@@ -0,0 +1,148 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 NeonGecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from time import sleep
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from neon_mq_connector.utils.network_utils import b64_to_dict, dict_to_b64
+
+from neon_llm_core.utils.personas.listener import PersonaListener
+
+
+def _mock_handler():
+    handler = Mock()
+    handler.connection.add_callback_threadsafe.side_effect = lambda cb: cb()
+    handler.connection.process_data_events.side_effect = \
+        lambda time_limit: sleep(0.01)
+    return handler
+
+
+class TestPersonaListener(TestCase):
+    def setUp(self):
+        self.on_activity = Mock()
+        self.handler = _mock_handler()
+        self.channel = self.handler.connection.channel.return_value
+        self.channel.basic_consume.side_effect = \
+            lambda queue, **_: f"tag_{queue}"
+        self.channel.queue_declare.return_value.method.queue = "subscriber"
+        self.listener = PersonaListener(config={}, vhost="/chatbots",
+                                        on_activity=self.on_activity)
+        with patch("neon_llm_core.utils.personas.listener.NeonMQHandler",
+                   return_value=self.handler) as handler_cls:
+            self.listener.start()
+        self.assertEqual(handler_cls.call_args.kwargs["service_name"],
+                         "neon_llm_submind")
+
+    def tearDown(self):
+        self.listener.stop()
+
+    def _announcements(self) -> list:
+        return [(call.kwargs["exchange"], b64_to_dict(call.kwargs["body"]))
+                for call in self.channel.basic_publish.call_args_list]
+
+    def test_start_stop(self):
+        self.assertTrue(self.listener.is_alive)
+        # One connection subscribes to conversation messages for all personas
+        self.handler.connection.channel.assert_called_once()
+        self.assertEqual({call.kwargs["exchange"] for call
+                          in self.channel.queue_bind.call_args_list},
+                         {"proctor_shout", "proctor_ping"})
+        self.listener.stop()
+        self.assertFalse(self.listener.is_alive)
+        self.handler.shutdown.assert_called_once()
+
+    def test_add_remove_persona(self):
+        self.listener.add_persona("persona", service_name="persona_llm",
+                                  service_id="abc")
+        self.listener.add_persona("other", service_name="other_llm",
+                                  service_id="def")
+        self.assertEqual(self.listener.persona_ids, ["persona", "other"])
+        # Each persona's bot queues are consumed under its nick
+        self.assertEqual({call.kwargs["queue"] for call
+                          in self.channel.basic_consume.call_args_list},
+                         {"persona_llm-abc_invite", "persona_llm-abc_kick_out",
+                          "persona_llm-abc_shout", "other_llm-def_invite",
+                          "other_llm-def_kick_out", "other_llm-def_shout",
+                          "subscriber"})
+        self.handler.connection.channel.assert_called_once()
+        self.assertEqual([(exchange, body["nick"]) for exchange, body
+                          in self._announcements()],
+                         [("connection", "persona_llm-abc"),
+                          ("connection", "other_llm-def")])
+
+        # A persona's bot takes over its queues without disconnecting
+        self.listener.remove_persona("persona", disconnect=False)
+        self.assertEqual({call.args[0] for call
+                          in self.channel.basic_cancel.call_args_list},
+                         {"tag_persona_llm-abc_invite",
+                          "tag_persona_llm-abc_kick_out",
+                          "tag_persona_llm-abc_shout"})
+        self.assertEqual(len(self._announcements()), 2)
+        self.listener.remove_persona("other")
+        self.assertEqual(self._announcements()[-1][0], "disconnection")
+        self.assertEqual(self.listener.persona_ids, [])
+
+    def test_restart(self):
+        self.listener.add_persona("persona", service_name="persona_llm",
+                                  service_id="abc")
+        self.listener.stop()
+        self.channel.basic_consume.reset_mock()
+        with patch("neon_llm_core.utils.personas.listener.NeonMQHandler",
+                   return_value=self.handler):
+            self.listener.start()
+        # Registered personas are consumed again on the new connection
+        self.assertIn("persona_llm-abc_shout",
+                      {call.kwargs["queue"] for call
+                       in self.channel.basic_consume.call_args_list})
+
+    def test_on_message(self):
+        self.listener.add_persona("persona", service_name="persona_llm",
+                                  service_id="abc", conversations={"cid": {}})
+        self.listener.add_persona("other", service_name="other_llm",
+                                  service_id="def")
+        invite = {"cid": "new_cid"}
+        self.listener._on_persona_message("persona", "handle_invite", None,
+                                          None, None, dict_to_b64(invite))
+        self.on_activity.assert_called_once_with("persona", "handle_invite",
+                                                 invite)
+
+        # Conversation messages only apply to personas in the conversation
+        self.listener._on_conversation_message(
+            "handle_proctor_ping", None, None, None,
+            dict_to_b64({"cid": "other_cid"}))
+        self.on_activity.assert_called_once()
+        self.listener._on_conversation_message(
+            "handle_proctor_ping", None, None, None,
+            dict_to_b64({"cid": "cid"}))
+        self.on_activity.assert_called_with("persona", "handle_proctor_ping",
+                                            {"cid": "cid"})
+        self.assertEqual(self.on_activity.call_count, 2)
+
+        self.listener._on_persona_message("persona", None, None, None, None,
+                                          dict_to_b64({"cid": "cid"}))
+        self.assertEqual(self.listener.get_conversations("persona"), {})
+        self.assertEqual(self.on_activity.call_count, 2)
@@ -0,0 +1,98 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 NeonGecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from concurrent.futures import Future
+from unittest import TestCase
+from unittest.mock import Mock
+
+from neon_llm_core.utils.local_transport import LocalTransport
+
+
+class TestLocalTransport(TestCase):
+    def test_register_handler(self):
+        transport = LocalTransport()
+        self.assertFalse(transport.has_handler("test_queue"))
+        transport.register_handler("test_queue", Mock())
+        self.assertTrue(transport.has_handler("test_queue"))
+        transport.unregister_handler("test_queue")
+        self.assertFalse(transport.has_handler("test_queue"))
+        with self.assertRaises(KeyError):
+            transport.request("test_queue", {})
+
+    def test_request(self):
+        transport = LocalTransport()
+
+        def _handler(request: dict) -> Future:
+            self.assertTrue(transport.is_local_routing_key(
+                request["routing_key"]))
+            transport.deliver(request["routing_key"],
+                              {"message_id": request["message_id"],
+                               "response": request["query"].upper()})
+            return Future()
+
+        transport.register_handler("test_queue", _handler)
+        response = transport.request("test_queue", {"query": "test"})
+        self.assertEqual(response["response"], "TEST")
+        self.assertTrue(response["message_id"])
+        self.assertEqual(transport._responses, dict())
+
+        # Responses to unknown requests are not delivered
+        self.assertFalse(transport.deliver("unknown", {}))
+
+    def test_request_timeout(self):
+        transport = LocalTransport()
+        transport.register_handler("test_queue", Mock())
+        self.assertEqual(transport.request("test_queue", {}, timeout=0.1),
+                         dict())
+        self.assertEqual(transport._responses, dict())
+
+    def test_handler_error(self):
+        transport = LocalTransport()
+        transport.register_handler("test_queue",
+                                   Mock(side_effect=RuntimeError))
+        with self.assertRaises(RuntimeError):
+            transport.request("test_queue", {})
+        self.assertEqual(transport._responses, dict())
+
+    def test_stream_request(self):
+        transport = LocalTransport()
+
+        def _handler(request: dict):
+            self.assertTrue(request["stream_response"])
+            for seq, (resp, final) in enumerate((("one ", False),
+                                                 ("two", False),
+                                                 ("one two", True))):
+                transport.deliver(request["routing_key"],
+                                  {"message_id": request["message_id"],
+                                   "response": resp, "seq": seq,
+                                   "final": final})
+
+        transport.register_handler("test_queue", _handler)
+        chunks = []
+        response = transport.stream_request("test_queue", {"query": "q"},
+                                            on_chunk=chunks.append)
+        self.assertEqual(chunks, ["one ", "two"])
+        self.assertEqual(response["response"], "one two")
@@ -0,0 +1,64 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 NeonGecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+
+from neon_llm_core.utils.metrics import LatencyHistogram, TimingStats
+
+
+class TestTimingStats(unittest.TestCase):
+    def test_record(self):
+        stats = TimingStats()
+        self.assertEqual(stats.mean, 0.0)
+        stats.record(1.0)
+        stats.record(3.0)
+        self.assertEqual(stats.count, 2)
+        self.assertEqual(stats.mean, 2.0)
+        self.assertEqual(stats.as_dict(), {"count": 2, "total": 4.0,
+                                           "mean": 2.0, "max": 3.0})
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_record(self):
+        histogram = LatencyHistogram(buckets=(0.1, 1.0))
+        self.assertEqual(histogram.quantile(0.5), 0.0)
+        for duration in [0.05] * 98 + [0.5, 2.0]:
+            histogram.record(duration)
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(0.99), 1.0)
+        self.assertEqual(histogram.quantile(1.0), 2.0)
+        metrics = histogram.as_dict()
+        self.assertEqual(metrics["buckets"],
+                         {"0.1": 98, "1.0": 99, "+Inf": 100})
+        self.assertEqual(metrics["count"], 100)
+        self.assertEqual(metrics["max"], 2.0)
+        self.assertEqual(metrics["p50"], 0.1)
+        self.assertEqual(metrics["p99"], 1.0)
+
+    def test_quantile_below_bucket_bound(self):
+        histogram = LatencyHistogram()
+        histogram.record(0.3)
+        self.assertEqual(histogram.quantile(0.99), 0.3)
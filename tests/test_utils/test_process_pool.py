@@ -0,0 +1,175 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 NeonGecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import asyncio
+import os
+import unittest
+
+from typing import Iterator, List
+
+from neon_llm_core.llm import NeonLLM
+from neon_llm_core.utils.cancellation import (CancellationToken,
+                                              RequestCancelled)
+from neon_llm_core.utils.process_pool import ProcessModel
+
+
+class ProcessLLM(NeonLLM):
+    @property
+    def tokenizer(self):
+        return None
+
+    @property
+    def tokenizer_model_name(self) -> str:
+        return "mock_tokenizer"
+
+    @property
+    def model(self):
+        return None
+
+    @property
+    def llm_model_name(self) -> str:
+        return "mock_model"
+
+    @property
+    def _system_prompt(self) -> str:
+        return "Mock system prompt"
+
+    def get_sorted_answer_indexes(self, question: str, answers: List[str],
+                                  persona: dict) -> List[int]:
+        return sorted(range(len(answers)), key=lambda i: answers[i])
+
+    def _call_model(self, prompt: str) -> str:
+        if prompt.endswith("fail"):
+            raise ValueError("Model failed")
+        return f"{os.getpid()}: {prompt}"
+
+    def _call_model_stream(self, prompt: str) -> Iterator[str]:
+        yield from prompt.split()
+
+    def _assemble_prompt(self, message: str, chat_history: List[List[str]],
+                         persona: dict) -> str:
+        return f"{persona.get('name')}|{message}"
+
+    def _tokenize(self, prompt: str) -> List[str]:
+        return prompt.split()
+
+
+class TestProcessModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.model = ProcessModel(model_class=ProcessLLM,
+                                 config={"context_window": 100})
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.model.shutdown()
+
+    def test_ask(self):
+        self.model.preload()
+        response = self.model.ask("hello", [], {"name": "test"})
+        self.assertEqual(response, f"{self.model.pid}: test|hello")
+        self.assertNotEqual(self.model.pid, os.getpid())
+        self.assertEqual(asyncio.run(self.model.aask("hi", [], {})),
+                         f"{self.model.pid}: None|hi")
+        self.assertEqual(self.model.ask_batch([("a", [], {}), ("b", [], {})]),
+                         [f"{self.model.pid}: None|a",
+                          f"{self.model.pid}: None|b"])
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            self.model.ask("fail", [], {})
+        # Worker keeps handling requests
+        self.assertTrue(self.model.ask("ok", [], {}).endswith("None|ok"))
+
+        token = CancellationToken()
+        token.cancel()
+        with self.assertRaises(RequestCancelled):
+            self.model.ask("ok", [], {}, cancel_token=token)
+        with self.assertRaises(RequestCancelled):
+            list(self.model.ask_stream("ok", [], {}, cancel_token=token))
+
+    def test_ask_stream(self):
+        self.assertEqual(list(self.model.ask_stream("one two", [], {})),
+                         ["None|one", "two"])
+        # Unconsumed chunks are discarded
+        stream = self.model.ask_stream("three four five", [], {})
+        self.assertEqual(next(stream), "None|three")
+        stream.close()
+        self.assertTrue(self.model.ask("six", [], {}).endswith("None|six"))
+
+    def test_ranking(self):
+        answers = ["b", "c", "a"]
+        self.assertEqual(self.model.get_sorted_answer_indexes("q", answers,
+                                                              {}), [2, 0, 1])
+        self.assertEqual(self.model.get_top_answer_indexes("q", answers, {},
+                                                           k=1), [2])
+        self.assertEqual(self.model.history_token_budget, 100)
+        self.assertEqual(self.model.truncated_requests, 0)
+
+    def test_invalidate_persona_prefix(self):
+        persona = {"name": "test", "description": "Test persona"}
+        self.model.update_persona_prefix(persona)
+        # Invalidation does not wait for a request in progress
+        with self.model._lock:
+            self.model.invalidate_persona_prefix(persona)
+            self.model.invalidate_persona_prefix(persona)
+        self.assertFalse(self.model._invalidations.empty())
+        # Queued invalidations are sent before the next call
+        self.assertTrue(self.model.ask("hi", [], persona).endswith("test|hi"))
+        self.assertTrue(self.model._invalidations.empty())
+        self.model.invalidate_persona_prefix(persona)
+        self.assertTrue(self.model._invalidations.empty())
+
+    def test_truncation_stats(self):
+        history = [["user", "one two three four"]] * 30
+        requests = self.model.truncated_requests
+        self.model.ask("hi", history, {})
+        # Stats are returned with each result and read without the worker
+        with self.model._lock:
+            self.assertEqual(self.model.history_token_budget, 100)
+            self.assertEqual(self.model.truncated_requests, requests + 1)
+            self.assertGreater(self.model.truncated_turns, 0)
+
+    def test_restart(self):
+        model = ProcessModel(model_class=ProcessLLM, config={})
+        try:
+            pid = model.pid
+            model._process.terminate()
+            model._process.join(5)
+            self.assertTrue(model.ask("hi", [], {}).endswith("None|hi"))
+            self.assertNotEqual(model.pid, pid)
+
+            # Truncations counted by a previous worker are kept
+            model._stats["truncated_requests"] = 2
+            model._process.terminate()
+            model._process.join(5)
+            model.ask("hi", [], {})
+            self.assertEqual(model.truncated_requests, 2)
+        finally:
+            model.shutdown()
+        with self.assertRaises(RuntimeError):
+            model.ask("hi", [], {})
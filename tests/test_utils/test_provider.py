@@ -25,6 +25,8 @@
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import unittest
+
+from tempfile import TemporaryDirectory
 from unittest.mock import patch, Mock, MagicMock
 
 from neon_llm_core.utils.personas.provider import PersonasProvider
@@ -45,6 +47,9 @@ class TestPersonasProvider(unittest.TestCase):
             "MQ": {"users": {"neon_llm_submind": {"user": "test", "password": "test"}}}
         }
         self.provider = PersonasProvider(service_name=self.mock_service_name, ovos_config=self.mock_config)
+        snapshot_dir = TemporaryDirectory()
+        self.addCleanup(snapshot_dir.cleanup)
+        self.provider.PERSONA_SNAPSHOT_DIR = snapshot_dir.name
 
     @patch("neon_llm_core.utils.personas.provider.send_mq_request")
     @patch("neon_llm_core.utils.personas.state.LLMBot")
@@ -67,6 +72,238 @@ class TestPersonasProvider(unittest.TestCase):
 
         self.assertEqual(len(self.provider.personas), 0)
 
+    @patch("neon_llm_core.utils.personas.state.LLMBot")
+    def test_parse_persona_config_response_stats(self, mock_bot):
+        personas = [PersonaFactory.create_mock_llm_persona(enabled=True)
+                    for _ in range(3)]
+        stats = self.provider.parse_persona_config_response(
+            {"items": [p.model_dump() for p in personas]})
+        self.assertEqual(stats, {"added": 3, "changed": 0, "removed": 0,
+                                 "unchanged": 0})
+        self.assertEqual(mock_bot.call_count, 3)
+
+        changed = personas[0].model_copy(update={"description": "changed"})
+        stats = self.provider.parse_persona_config_response(
+            {"items": [changed.model_dump(), personas[1].model_dump()]})
+        self.assertEqual(stats, {"added": 0, "changed": 1, "removed": 1,
+                                 "unchanged": 1})
+        self.assertEqual(self.provider.last_sync_stats, stats)
+        self.assertEqual(mock_bot.call_count, 4)
+
+    @patch("neon_llm_core.utils.personas.provider.send_mq_request")
+    @patch("neon_llm_core.utils.personas.state.LLMBot")
+    def test_fetch_persona_config_delta(self, mock_bot, mock_send_mq_request):
+        personas = [PersonaFactory.create_mock_llm_persona(enabled=True)
+                    for _ in range(3)]
+        mock_send_mq_request.return_value = {
+            "items": [p.model_dump() for p in personas], "version": 1}
+        self.provider._fetch_persona_config()
+        self.assertNotIn("since_version",
+                         mock_send_mq_request.call_args.kwargs["request_data"])
+        self.assertEqual(len(self.provider.personas), 3)
+
+        # Changes since the last version are applied
+        changed = personas[0].model_copy(update={"description": "changed"})
+        added = PersonaFactory.create_mock_llm_persona(enabled=True)
+        deleted = {"persona_name": personas[1].name, "user_id": None}
+        mock_send_mq_request.return_value = {
+            "delta": True, "base_version": 1, "version": 2,
+            "items": [changed.model_dump(), added.model_dump()],
+            "deleted": [deleted]}
+        self.provider._fetch_persona_config()
+        self.assertEqual(
+            mock_send_mq_request.call_args.kwargs["request_data"]
+            ["since_version"], 1)
+        self.assertEqual({p.id for p in self.provider.personas},
+                         {personas[0].id, personas[2].id, added.id})
+        self.assertEqual(self.provider.last_sync_stats,
+                         {"added": 1, "changed": 1, "removed": 1,
+                          "unchanged": 1})
+
+        # No changes
+        mock_send_mq_request.return_value = {
+            "delta": True, "base_version": 2, "version": 3, "items": []}
+        self.provider._fetch_persona_config()
+        self.assertEqual(len(self.provider.personas), 3)
+        self.assertEqual(self.provider._persona_version, 3)
+
+    @patch("neon_llm_core.utils.personas.provider.send_mq_request")
+    @patch("neon_llm_core.utils.personas.state.LLMBot")
+    def test_fetch_persona_config_delta_gap(self, mock_bot,
+                                            mock_send_mq_request):
+        persona = PersonaFactory.create_mock_llm_persona(enabled=True)
+        self.provider._persona_version = 1
+        mock_send_mq_request.side_effect = [
+            {"delta": True, "base_version": 5, "version": 6, "items": []},
+            {"items": [persona.model_dump()], "version": 6}]
+        self.provider._fetch_persona_config()
+        self.assertEqual(mock_send_mq_request.call_count, 2)
+        self.assertNotIn("since_version",
+                         mock_send_mq_request.call_args.kwargs["request_data"])
+        self.assertEqual([p.id for p in self.provider.personas], [persona.id])
+        self.assertEqual(self.provider._persona_version, 6)
+
+    def test_get_sync_interval(self):
+        with patch.object(PersonasProvider, "PERSONA_SYNC_INTERVAL", 100):
+            intervals = {self.provider._get_sync_interval()
+                         for _ in range(10)}
+        self.assertTrue(all(90 <= interval <= 110 for interval in intervals))
+        self.assertGreater(len(intervals), 1)
+
+    @patch("neon_llm_core.utils.personas.provider.send_mq_request")
+    @patch("neon_llm_core.utils.personas.state.LLMBot")
+    def test_persona_snapshot(self, mock_bot, mock_send_mq_request):
+        personas = [PersonaFactory.create_mock_llm_persona(enabled=True)
+                    for _ in range(2)]
+        self.assertFalse(self.provider._load_persona_snapshot())
+
+        # Failed requests do not replace the snapshot
+        mock_send_mq_request.return_value = {}
+        self.provider._fetch_persona_config()
+        self.assertFalse(self.provider._load_persona_snapshot())
+
+        mock_send_mq_request.return_value = {
+            "items": [p.model_dump() for p in personas], "version": 4}
+        self.provider._fetch_persona_config()
+
+        restarted = PersonasProvider(service_name=self.mock_service_name,
+                                     ovos_config=self.mock_config)
+        restarted.PERSONA_SNAPSHOT_DIR = self.provider.PERSONA_SNAPSHOT_DIR
+        self.assertTrue(restarted._load_persona_snapshot())
+        self.assertEqual([p.id for p in restarted.personas],
+                         [p.id for p in personas])
+        self.assertEqual(restarted._persona_version, 4)
+        self.assertEqual(restarted._persona_last_sync, 0)
+
+        # A failed sync keeps the restored personas
+        mock_send_mq_request.return_value = {}
+        restarted._fetch_persona_config()
+        self.assertEqual([p.id for p in restarted.personas],
+                         [p.id for p in personas])
+        self.assertEqual(
+            restarted._persona_handlers_state.connected_persona_ids,
+            [p.id for p in personas])
+        self.assertEqual(restarted._persona_last_sync, 0)
+
+        # Restored personas are replaced by defaults once they expire
+        default_ids = [persona.id for persona in
+                       self.mock_config['llm_bots'][self.mock_service_name]]
+        with patch.object(PersonasProvider, "PERSONA_SYNC_INTERVAL", 60):
+            restarted._fetch_persona_config()
+            self.assertEqual(len(restarted.personas), 2)
+            restarted._persona_restore_time -= restarted.PERSONA_STATE_TTL + 1
+            restarted._fetch_persona_config()
+        self.assertEqual(restarted.personas, [])
+        self.assertEqual(
+            restarted._persona_handlers_state.connected_persona_ids,
+            default_ids)
+
+    @patch("neon_llm_core.utils.personas.provider.send_mq_request")
+    @patch("neon_llm_core.utils.personas.state.LLMBot")
+    def test_failed_sync_after_ttl(self, mock_bot, mock_send_mq_request):
+        persona = PersonaFactory.create_mock_llm_persona(enabled=True)
+        mock_send_mq_request.return_value = {"items": [persona.model_dump()],
+                                             "version": 1}
+        with patch.object(PersonasProvider, "PERSONA_SYNC_INTERVAL", 60):
+            self.provider._fetch_persona_config()
+            last_sync = self.provider._persona_last_sync
+
+            # Failed syncs keep personas until PERSONA_STATE_TTL expires
+            mock_send_mq_request.return_value = {}
+            self.provider._fetch_persona_config()
+            self.assertEqual([p.id for p in self.provider.personas],
+                             [persona.id])
+            self.assertEqual(self.provider._persona_last_sync, last_sync)
+
+            self.provider._persona_last_sync -= \
+                self.provider.PERSONA_STATE_TTL + 1
+            self.provider._fetch_persona_config()
+        self.assertEqual(self.provider.personas, [])
+        self.assertNotIn(persona.id, self.provider._persona_handlers_state
+                         .connected_persona_ids)
+
+    @patch("neon_llm_core.utils.personas.provider.send_mq_request")
+    @patch("neon_llm_core.utils.personas.state.LLMBot")
+    def test_fetch_persona_config_delta_deleted_only(self, mock_bot,
+                                                     mock_send_mq_request):
+        personas = [PersonaFactory.create_mock_llm_persona(enabled=True)
+                    for _ in range(2)]
+        mock_send_mq_request.return_value = {
+            "items": [p.model_dump() for p in personas], "version": 1}
+        self.provider._fetch_persona_config()
+
+        mock_send_mq_request.return_value = {
+            "delta": True, "base_version": 1, "version": 2,
+            "deleted": [{"persona_name": personas[0].name, "user_id": None}]}
+        self.provider._fetch_persona_config()
+        self.assertEqual([p.id for p in self.provider.personas],
+                         [personas[1].id])
+        self.assertEqual(self.provider._persona_version, 2)
+        self.assertEqual(self.provider.last_sync_stats,
+                         {"added": 0, "changed": 0, "removed": 1,
+                          "unchanged": 1})
+
+    @patch("neon_llm_core.utils.personas.state.LLMBot")
+    def test_start_sync_from_snapshot(self, mock_bot):
+        from threading import Event
+        persona = PersonaFactory.create_mock_llm_persona(enabled=True)
+        self.provider._personas = [persona]
+        self.provider._save_persona_snapshot()
+        self.provider._personas = []
+
+        fetched = Event()
+        request_received = Event()
+
+        def _slow_provider(**_):
+            request_received.set()
+            fetched.wait(5)
+            return {"items": [persona.model_dump()]}
+
+        with patch("neon_llm_core.utils.personas.provider.send_mq_request",
+                   side_effect=_slow_provider):
+            self.provider.start_sync()
+            # Personas are restored before the provider responds
+            self.assertEqual([p.id for p in self.provider.personas],
+                             [persona.id])
+            self.assertTrue(request_received.wait(5))
+            fetched.set()
+        self.provider.stop_sync()
+
+    @patch("neon_llm_core.utils.personas.state.LLMBot")
+    def test_add_persona_assigned_elsewhere(self, mock_llm_bot):
+        state = self.provider._persona_handlers_state
+        state.init_default_personas()
+        persona = PersonaFactory.create_mock_llm_persona(enabled=True)
+        with patch.object(state, "is_assigned", return_value=False):
+            self.assertTrue(self.provider._add_persona(persona))
+            # Persona is run by another replica; defaults are removed here
+            self.assertEqual(state.connected_persona_ids, [])
+            self.assertFalse(state.default_personas_running)
+
+            self.assertEqual(self.provider._add_personas([persona]),
+                             [persona])
+            self.assertEqual(state.connected_persona_ids, [])
+
+    def test_touch_persona(self):
+        state = self.provider._persona_handlers_state
+        with patch.object(state, "touch_persona") as touch:
+            self.provider.touch_persona({"name": "test", "user_id": "user"})
+            touch.assert_not_called()
+            state.lazy_personas = True
+            self.provider.touch_persona(None)
+            self.provider.touch_persona({})
+            touch.assert_not_called()
+            self.provider.touch_persona({"name": "test", "user_id": "user"})
+            touch.assert_called_once_with("test_user")
+            self.provider.touch_persona({"name": "test", "user_id": None})
+            touch.assert_called_with("test")
+            self.provider.touch_persona({"persona_name": "test",
+                                         "user_id": "user"})
+            touch.assert_called_with("test_user")
+            persona = PersonaFactory.create_mock_llm_persona(enabled=True)
+            self.provider.touch_persona(persona.model_dump())
+            touch.assert_called_with(persona.id)
+
     def test__validate_persona_data_success(self):
         persona_data = PersonaFactory.create_mock_llm_persona().model_dump()
         persona = self.provider._validate_persona_data(persona_data)
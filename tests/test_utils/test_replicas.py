@@ -0,0 +1,66 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 NeonGecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import unittest
+
+from neon_llm_core.utils.replicas import ReplicaPool
+
+
+class TestReplicaPool(unittest.TestCase):
+    def test_least_loaded_dispatch(self):
+        pool = ReplicaPool(["a", "b", "c"])
+        self.assertEqual(len(pool), 3)
+        with pool.acquire() as first, pool.acquire() as second:
+            self.assertEqual((first, second), ("a", "b"))
+            with pool.acquire() as third:
+                self.assertEqual(third, "c")
+            # Idle replica is preferred over busy ones
+            with pool.acquire() as replica:
+                self.assertEqual(replica, "c")
+            metrics = pool.get_metrics()
+            self.assertEqual([m["outstanding"] for m in metrics], [1, 1, 0])
+        # Replicas with fewer calls are preferred when equally loaded
+        with pool.acquire() as replica:
+            self.assertEqual(replica, "a")
+
+        metrics = pool.get_metrics()
+        self.assertEqual([m["outstanding"] for m in metrics], [0, 0, 0])
+        self.assertEqual([m["calls"]["count"] for m in metrics], [2, 1, 2])
+        for m in metrics:
+            self.assertGreaterEqual(m["utilization"], 0.0)
+            self.assertLessEqual(m["utilization"], 1.0)
+
+    def test_release_on_error(self):
+        pool = ReplicaPool(["a"])
+        with self.assertRaises(RuntimeError):
+            with pool.acquire():
+                raise RuntimeError("Model failed")
+        self.assertEqual(pool.get_metrics()[0]["outstanding"], 0)
+
+    def test_no_replicas(self):
+        with self.assertRaises(ValueError):
+            ReplicaPool([])
@@ -0,0 +1,136 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 NeonGecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from time import sleep
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from neon_mq_connector.utils.network_utils import b64_to_dict, dict_to_b64
+
+
+def _mock_handler():
+    handler = Mock()
+    handler.connection.add_callback_threadsafe.side_effect = lambda cb: cb()
+    handler.connection.process_data_events.side_effect = \
+        lambda time_limit: sleep(0.01)
+    return handler
+
+
+class TestMQRPCClient(TestCase):
+    def setUp(self):
+        from neon_llm_core.utils.rpc import MQRPCClient
+        self.handler = _mock_handler()
+        with patch("neon_llm_core.utils.rpc.NeonMQHandler",
+                   return_value=self.handler):
+            self.client = MQRPCClient("/test", config={})
+            self.client.start()
+        self.channel = self.handler.connection.channel.return_value
+
+    def tearDown(self):
+        self.client.stop()
+
+    def _respond_with(self, *responses):
+        def _publish(exchange, routing_key, body, properties):
+            request = b64_to_dict(body)
+            for resp in responses:
+                resp = dict(resp, message_id=request['message_id'])
+                self.client._on_response(None, None, None, dict_to_b64(resp))
+        self.channel.basic_publish.side_effect = _publish
+
+    def test_start_stop(self):
+        self.assertTrue(self.client.is_alive)
+        self.channel.queue_declare.assert_called_once_with(
+            queue=self.client.reply_queue, auto_delete=False)
+        self.client.stop()
+        self.assertFalse(self.client.is_alive)
+        self.channel.queue_delete.assert_called_once_with(
+            self.client.reply_queue)
+        self.handler.shutdown.assert_called_once()
+
+    def test_request(self):
+        self._respond_with({"response": "resp"})
+        resp = self.client.request("test_queue", {"query": "q"})
+        self.assertEqual(resp["response"], "resp")
+        request = b64_to_dict(
+            self.channel.basic_publish.call_args.kwargs['body'])
+        self.assertEqual(request["routing_key"], self.client.reply_queue)
+        self.assertEqual(request["query"], "q")
+        self.assertEqual(self.client._pending, dict())
+
+        # Target queue is only declared once
+        self.client.request("test_queue", {"query": "q"})
+        declared = [c for c in self.channel.queue_declare.call_args_list
+                    if c.kwargs['queue'] == "test_queue"]
+        self.assertEqual(len(declared), 1)
+
+    def test_request_timeout(self):
+        resp = self.client.request("test_queue", {"query": "q"}, timeout=0.1)
+        self.assertEqual(resp, dict())
+        self.assertEqual(self.client._pending, dict())
+
+    def test_unknown_response_ignored(self):
+        self.client._on_response(None, None, None,
+                                 dict_to_b64({"message_id": "unknown"}))
+        self.assertEqual(self.client._pending, dict())
+
+    def test_stream_request(self):
+        self._respond_with({"response": "one ", "seq": 0, "final": False},
+                           {"response": "two", "seq": 1, "final": False},
+                           {"response": "one two", "seq": 2, "final": True})
+        chunks = []
+        resp = self.client.stream_request("test_queue", {"query": "q"},
+                                          on_chunk=chunks.append)
+        self.assertEqual(chunks, ["one ", "two"])
+        self.assertEqual(resp["response"], "one two")
+        request = b64_to_dict(
+            self.channel.basic_publish.call_args.kwargs['body'])
+        self.assertTrue(request["stream_response"])
+
+    def test_not_running(self):
+        self.client.stop()
+        with self.assertRaises(ConnectionError):
+            self.client.request("test_queue", {})
+
+
+class TestGetRPCClient(TestCase):
+    @patch("neon_llm_core.utils.rpc.load_mq_handler_config", Mock())
+    def test_get_rpc_client(self):
+        from neon_llm_core.utils.rpc import get_rpc_client, stop_rpc_clients
+        with patch("neon_llm_core.utils.rpc.NeonMQHandler",
+                   side_effect=lambda **_: _mock_handler()):
+            client = get_rpc_client("/test_vhost")
+            self.assertTrue(client.is_alive)
+            self.assertIs(get_rpc_client("/test_vhost"), client)
+
+            client.stop()
+            restarted = get_rpc_client("/test_vhost")
+            self.assertIsNot(restarted, client)
+            self.assertTrue(restarted.is_alive)
+
+            stop_rpc_clients()
+            self.assertFalse(restarted.is_alive)
+            self.assertIsNot(get_rpc_client("/test_vhost"), restarted)
+            stop_rpc_clients()
@@ -0,0 +1,125 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 NeonGecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import asyncio
+import unittest
+
+from threading import Thread
+from time import sleep
+
+from neon_llm_core.utils.scheduler import PriorityScheduler
+
+
+class TestPriorityScheduler(unittest.TestCase):
+    def _wait_for(self, scheduler, request_class, count):
+        for _ in range(500):
+            if scheduler.get_metrics()["waiting"][request_class] == count:
+                return
+            sleep(0.01)
+        self.fail(f"{request_class} requests not queued")
+
+    def _run_queued(self, scheduler, request_classes):
+        """
+        Queue requests behind a held slot and return the order they are run
+        """
+        order = list()
+
+        def _request(request_class):
+            with scheduler.slot(request_class):
+                order.append(request_class)
+
+        threads = list()
+        with scheduler.slot("ask"):
+            for request_class in request_classes:
+                queued = scheduler.get_metrics()["waiting"][request_class]
+                thread = Thread(target=_request, args=(request_class,))
+                thread.start()
+                threads.append(thread)
+                self._wait_for(scheduler, request_class, queued + 1)
+        for thread in threads:
+            thread.join(5)
+        return order
+
+    def test_weighted_order(self):
+        scheduler = PriorityScheduler(max_concurrent=1,
+                                      weights={"ask": 1, "score": 3},
+                                      max_wait=60)
+        order = self._run_queued(scheduler, ["ask", "ask", "ask",
+                                             "score", "score", "score"])
+        self.assertEqual(order, ["score", "ask", "score", "score",
+                                 "ask", "ask"])
+        metrics = scheduler.get_metrics()
+        self.assertEqual(metrics["active"], 0)
+        self.assertEqual(metrics["promoted"], 0)
+        self.assertEqual(metrics["wait_time"]["ask"]["count"], 4)
+        self.assertEqual(metrics["latency"]["score"]["count"], 3)
+
+    def test_starvation_protection(self):
+        scheduler = PriorityScheduler(max_concurrent=1,
+                                      weights={"ask": 1, "score": 100},
+                                      max_wait=0)
+        order = self._run_queued(scheduler, ["ask", "score", "ask", "score"])
+        # Requests that waited too long are served oldest first
+        self.assertEqual(order, ["ask", "score", "ask", "score"])
+        self.assertEqual(scheduler.promoted, 4)
+
+    def test_concurrency(self):
+        scheduler = PriorityScheduler(max_concurrent=2,
+                                      weights={"ask": 1})
+        with scheduler.slot("ask"), scheduler.slot("ask"):
+            self.assertEqual(scheduler.active, 2)
+        self.assertEqual(scheduler.active, 0)
+
+    def test_async_slot(self):
+        scheduler = PriorityScheduler(max_concurrent=1,
+                                      weights={"ask": 1, "score": 2})
+
+        async def _test():
+            order = list()
+
+            async def _request(request_class):
+                async with scheduler.aslot(request_class):
+                    order.append(request_class)
+
+            async with scheduler.aslot("ask"):
+                tasks = [asyncio.create_task(_request(request_class))
+                         for request_class in ("ask", "score")]
+                cancelled = asyncio.create_task(_request("ask"))
+                await asyncio.sleep(0.05)
+                cancelled.cancel()
+                await asyncio.sleep(0.05)
+                self.assertEqual(scheduler.get_metrics()["waiting"],
+                                 {"ask": 1, "score": 1})
+            await asyncio.gather(*tasks)
+            return order
+
+        self.assertEqual(asyncio.run(_test()), ["score", "ask"])
+        self.assertEqual(scheduler.active, 0)
+
+    def test_invalid_weights(self):
+        with self.assertRaises(ValueError):
+            PriorityScheduler(max_concurrent=1, weights={"ask": 0})
@@ -0,0 +1,65 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 NeonGecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from unittest import TestCase
+
+from neon_llm_core.utils.sharding import get_shard_owner, is_assigned
+
+
+class TestSharding(TestCase):
+    keys = [f"persona_{idx}" for idx in range(1000)]
+
+    def test_get_shard_owner(self):
+        nodes = ["0", "1", "2", "3"]
+        owners = [get_shard_owner(key, nodes) for key in self.keys]
+        # Stable regardless of node order
+        self.assertEqual(owners, [get_shard_owner(key, reversed(nodes))
+                                  for key in self.keys])
+        # Keys are spread over all nodes
+        for node in nodes:
+            self.assertGreater(owners.count(node), len(self.keys) / 8)
+
+    def test_membership_change(self):
+        nodes = ["0", "1", "2", "3"]
+        before = {key: get_shard_owner(key, nodes) for key in self.keys}
+        after = {key: get_shard_owner(key, nodes + ["4"])
+                 for key in self.keys}
+        # Only keys assigned to the new node move
+        for key in self.keys:
+            if before[key] != after[key]:
+                self.assertEqual(after[key], "4")
+
+        after = {key: get_shard_owner(key, nodes[:3]) for key in self.keys}
+        # Only keys assigned to the removed node move
+        for key in self.keys:
+            if before[key] != after[key]:
+                self.assertEqual(before[key], "3")
+
+    def test_is_assigned(self):
+        self.assertTrue(all(is_assigned(key, 0, 1) for key in self.keys))
+        for key in self.keys:
+            self.assertEqual(sum(is_assigned(key, replica_id, 3)
+                                 for replica_id in range(3)), 1)
@@ -0,0 +1,83 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 NeonGecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from unittest.mock import Mock
+
+from neon_llm_core.utils.singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_sequential_calls_are_not_collapsed(self):
+        flights = SingleFlight()
+        fn = Mock(return_value="result")
+        self.assertEqual(flights.do("key", fn, 1, kwarg=2), "result")
+        self.assertEqual(flights.do("key", fn, 1, kwarg=2), "result")
+        self.assertEqual(fn.call_count, 2)
+        fn.assert_called_with(1, kwarg=2)
+        self.assertEqual(flights.get_metrics(), {"executed": 2,
+                                                 "collapsed": 0,
+                                                 "in_flight": 0})
+
+    def test_concurrent_calls_are_collapsed(self):
+        flights = SingleFlight()
+        release = Event()
+        fn = Mock(side_effect=lambda: release.wait(5) and "result")
+        with ThreadPoolExecutor(4) as executor:
+            futures = [executor.submit(flights.do, "key", fn)
+                       for _ in range(3)]
+            other = executor.submit(flights.do, "other", Mock(return_value=1))
+            self.assertEqual(other.result(timeout=2), 1)
+            while flights.collapsed < 2:
+                release.wait(0.01)
+            release.set()
+            self.assertEqual([f.result(timeout=2) for f in futures],
+                             ["result"] * 3)
+        fn.assert_called_once()
+        self.assertEqual(flights.executed, 2)
+        self.assertEqual(flights.in_flight, 0)
+
+    def test_exception_shared(self):
+        flights = SingleFlight()
+        release = Event()
+
+        def _fail():
+            release.wait(5)
+            raise ValueError("fail")
+
+        with ThreadPoolExecutor(2) as executor:
+            futures = [executor.submit(flights.do, "key", _fail)
+                       for _ in range(2)]
+            while flights.collapsed < 1:
+                release.wait(0.01)
+            release.set()
+            for future in futures:
+                with self.assertRaises(ValueError):
+                    future.result(timeout=2)
+        self.assertEqual(flights.in_flight, 0)
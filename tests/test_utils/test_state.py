@@ -27,7 +27,9 @@
 import unittest
 from unittest.mock import MagicMock, patch
 
-from neon_llm_core.utils.personas.state import PersonaHandlersState
+from neon_llm_core.utils.personas.state import (HibernatedBot,
+                                                PersonaHandlersState,
+                                                get_persona_hash)
 from .utils.factory import PersonaFactory
 
 
@@ -100,3 +102,245 @@ class TestPersonaHandlersState(unittest.TestCase):
         self.persona_handlers_state.remove_persona("persona_1")
         mock_item.stop.assert_called_once()
         self.assertNotIn("persona_1", self.persona_handlers_state._created_items)
+
+    @patch("neon_llm_core.utils.personas.state.LLMBot")
+    def test_add_persona_handler_unchanged(self, mock_bot):
+        persona = PersonaFactory.create_mock_llm_persona(enabled=True)
+        self.persona_handlers_state.add_persona_handler(persona)
+        mock_bot.assert_called_once()
+
+        # Equivalent definition does not restart the bot
+        same_persona = type(persona).model_validate(persona.model_dump())
+        self.assertIsNone(
+            self.persona_handlers_state.add_persona_handler(same_persona))
+        mock_bot.assert_called_once()
+        mock_bot.return_value.stop.assert_not_called()
+
+        # Changed definition replaces the bot
+        changed_persona = persona.model_copy(
+            update={"system_prompt": "Changed prompt"})
+        self.assertIsNotNone(
+            self.persona_handlers_state.add_persona_handler(changed_persona))
+        self.assertEqual(mock_bot.call_count, 2)
+        mock_bot.return_value.stop.assert_called_once()
+        self.assertEqual(
+            self.persona_handlers_state.persona_hashes[persona.id],
+            get_persona_hash(changed_persona))
+
+        self.persona_handlers_state.remove_persona(persona.id)
+        self.assertEqual(self.persona_handlers_state.persona_hashes, {})
+
+    def test_get_persona_hash(self):
+        persona = PersonaFactory.create_mock_llm_persona(enabled=True)
+        self.assertEqual(get_persona_hash(persona), get_persona_hash(
+            type(persona).model_validate(persona.model_dump())))
+        self.assertNotEqual(get_persona_hash(persona), get_persona_hash(
+            persona.model_copy(update={"description": "changed"})))
+
+    @patch("neon_llm_core.utils.personas.state.LLMBot")
+    def test_add_persona_handlers_concurrent(self, mock_bot):
+        from threading import Barrier
+        personas = [PersonaFactory.create_mock_llm_persona(enabled=True)
+                    for _ in range(4)]
+        # Each bot only finishes starting once all four are starting
+        barrier = Barrier(len(personas), timeout=5)
+        mock_bot.return_value.run.side_effect = lambda: barrier.wait()
+        bots = self.persona_handlers_state.add_persona_handlers(personas)
+        self.assertEqual(len(bots), len(personas))
+        self.assertEqual(self.persona_handlers_state.connected_persona_ids,
+                         [persona.id for persona in personas])
+
+        metrics = self.persona_handlers_state.get_metrics()
+        self.assertEqual(metrics["start"]["count"], len(personas))
+        for persona in personas:
+            self.assertIn("start", metrics["personas"][persona.id])
+
+        mock_bot.return_value.stop.side_effect = lambda: barrier.wait()
+        self.persona_handlers_state.clean_up_personas()
+        self.assertFalse(self.persona_handlers_state.has_connected_personas())
+        metrics = self.persona_handlers_state.get_metrics()
+        self.assertEqual(metrics["stop"]["count"], len(personas))
+        for persona in personas:
+            self.assertIn("stop", metrics["personas"][persona.id])
+
+    @patch("neon_llm_core.utils.personas.state.LLMBot")
+    def test_add_persona_handlers_locked(self, mock_bot):
+        from threading import Thread
+        state = self.persona_handlers_state
+        personas = [PersonaFactory.create_mock_llm_persona(enabled=True)
+                    for _ in range(2)]
+        # Bots are not added or reordered while the persona map is in use
+        with state._created_items_lock:
+            thread = Thread(target=state.add_persona_handlers,
+                            args=(personas,), daemon=True)
+            thread.start()
+            thread.join(0.5)
+            self.assertTrue(thread.is_alive())
+            self.assertEqual(state._created_items, {})
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(state.connected_persona_ids,
+                         [persona.id for persona in personas])
+
+    @patch("neon_llm_core.utils.personas.state.LLMBot")
+    def test_add_persona_handlers_failure(self, mock_bot):
+        personas = [PersonaFactory.create_mock_llm_persona(enabled=True)
+                    for _ in range(2)]
+        mock_bot.return_value.run.side_effect = [RuntimeError("failed"),
+                                                 None]
+        bots = self.persona_handlers_state.add_persona_handlers(personas)
+        self.assertEqual(bots.count(None), 1)
+        self.assertEqual(len(self.persona_handlers_state.connected_persona_ids),
+                         1)
+
+    def _lazy_state(self, **llm_config) -> PersonaHandlersState:
+        config = dict(self.mock_config)
+        config["LLM_TEST_SERVICE"] = {"lazy_personas": True, **llm_config}
+        state = PersonaHandlersState(service_name=self.mock_service_name,
+                                     ovos_config=config)
+        self.addCleanup(state.stop_idle_check)
+        listener_patch = patch(
+            "neon_llm_core.utils.personas.state.PersonaListener")
+        self.mock_listener = listener_patch.start()
+        self.mock_listener.return_value.is_alive = False
+        self.addCleanup(listener_patch.stop)
+        return state
+
+    @patch("neon_llm_core.utils.personas.state.LLMBot")
+    def test_lazy_personas(self, mock_bot):
+        state = self._lazy_state()
+        persona = PersonaFactory.create_mock_llm_persona(enabled=True)
+        placeholder = state.add_persona_handler(persona)
+        self.assertIsInstance(placeholder, HibernatedBot)
+        mock_bot.assert_not_called()
+        self.assertEqual(state.connected_persona_ids, [persona.id])
+        self.assertEqual(state.active_persona_ids, [])
+
+        # One listener is shared by all hibernated personas
+        listener = self.mock_listener.return_value
+        self.mock_listener.assert_called_once()
+        listener.start.assert_called_once()
+        self.assertEqual(listener.add_persona.call_args.args, (persona.id,))
+        self.assertEqual(listener.add_persona.call_args.kwargs["service_name"],
+                         f"{persona.id}_{self.mock_service_name}")
+        service_id = listener.add_persona.call_args.kwargs["service_id"]
+        listener.is_alive = True
+        other = PersonaFactory.create_mock_llm_persona(enabled=True)
+        state.add_persona_handler(other)
+        self.mock_listener.assert_called_once()
+        listener.start.assert_called_once()
+        self.assertEqual(listener.add_persona.call_count, 2)
+        state.remove_persona(other.id)
+        listener.remove_persona.assert_called_once_with(other.id,
+                                                        disconnect=True)
+        listener.remove_persona.reset_mock()
+
+        bot = state.activate_persona(persona.id)
+        self.assertEqual(bot, mock_bot.return_value)
+        bot.run.assert_called_once()
+        # The bot takes over from the listener with the same nick
+        listener.remove_persona.assert_called_once_with(persona.id,
+                                                        disconnect=False)
+        self.assertEqual(bot._service_id, service_id)
+        self.assertEqual(state.active_persona_ids, [persona.id])
+        self.assertIs(state.activate_persona(persona.id), bot)
+        mock_bot.assert_called_once()
+
+        mock_bot.return_value.persona = persona
+        state.hibernate_persona(persona.id)
+        bot.stop.assert_called_once()
+        self.assertEqual(state.connected_persona_ids, [persona.id])
+        self.assertEqual(state.active_persona_ids, [])
+        self.assertEqual(state.get_metrics()["hibernated"], 1)
+
+        # Unchanged persona stays registered without a bot
+        self.assertIsNone(state.add_persona_handler(persona))
+        self.assertEqual(mock_bot.call_count, 1)
+
+        state.remove_persona(persona.id)
+        self.assertFalse(state.has_connected_personas())
+        self.assertIsNone(state.activate_persona(persona.id))
+
+    @patch("neon_llm_core.utils.personas.state.LLMBot")
+    def test_persona_activity(self, mock_bot):
+        state = self._lazy_state()
+        persona = PersonaFactory.create_mock_llm_persona(enabled=True)
+        mock_bot.return_value.persona = persona
+        mock_bot.return_value.current_conversations = {}
+        handle_incoming_shout = mock_bot.return_value.handle_incoming_shout
+        state.add_persona_handler(persona)
+        listener = self.mock_listener.return_value
+        on_activity = self.mock_listener.call_args.kwargs["on_activity"]
+        listener.get_conversations.return_value = {"cid": {}}
+
+        # A chat message to a hibernated persona starts its bot
+        message = {"cid": "cid", "shout": "hello"}
+        on_activity(persona.id, "_on_mentioned_user_message", message)
+        state._lifecycle_executor.shutdown(wait=True)
+        self.assertEqual(state.active_persona_ids, [persona.id])
+        bot = mock_bot.return_value
+        self.assertEqual(bot.current_conversations, {"cid": {}})
+        bot._on_mentioned_user_message.assert_called_once_with(
+            None, None, None, message)
+
+        # Messages handled by the running bot count as use of the persona
+        state._last_used[persona.id] = 0
+        bot.handle_incoming_shout(message)
+        handle_incoming_shout.assert_called_once_with(message)
+        self.assertGreater(state._last_used[persona.id], 0)
+
+        # Conversations are kept while hibernated
+        state.hibernate_persona(persona.id)
+        self.assertEqual(listener.add_persona.call_args.kwargs["conversations"],
+                         {"cid": {}})
+
+    @patch("neon_llm_core.utils.personas.state.LLMBot")
+    def test_touch_persona(self, mock_bot):
+        from time import sleep
+        state = self._lazy_state(persona_idle_timeout=0.1)
+        persona = PersonaFactory.create_mock_llm_persona(enabled=True)
+        mock_bot.return_value.persona = persona
+        state.add_persona_handler(persona)
+        state.touch_persona("unknown")
+        with patch.object(state._lifecycle_executor, "submit") as submit:
+            state.touch_persona(persona.id)
+            submit.assert_called_once_with(state.activate_persona,
+                                           persona.id)
+        state.activate_persona(persona.id)
+        self.assertEqual(state.active_persona_ids, [persona.id])
+
+        # Idle bots are hibernated
+        sleep(0.2)
+        state.hibernate_idle_personas()
+        self.assertEqual(state.active_persona_ids, [])
+
+    @patch("neon_llm_core.utils.personas.state.LLMBot")
+    def test_max_active_personas(self, mock_bot):
+        from unittest.mock import Mock
+        state = self._lazy_state(max_active_personas=2)
+        personas = [PersonaFactory.create_mock_llm_persona(enabled=True)
+                    for _ in range(3)]
+        mock_bot.side_effect = lambda **kwargs: Mock(
+            persona=type(personas[0]).model_validate(kwargs["persona"]),
+            current_conversations={})
+        for persona in personas:
+            state.add_persona_handler(persona)
+        state.activate_persona(personas[0].id)
+        state.activate_persona(personas[1].id)
+        state.touch_persona(personas[0].id)
+        state.activate_persona(personas[2].id)
+        # Least recently used persona is hibernated
+        self.assertEqual(set(state.active_persona_ids),
+                         {personas[0].id, personas[2].id})
+
+    @patch("neon_llm_core.utils.personas.state.LLMBot")
+    def test_add_persona_handler_sharded(self, mock_bot):
+        from neon_llm_core.utils.sharding import is_assigned
+        personas = [PersonaFactory.create_mock_llm_persona(enabled=True)
+                    for _ in range(10)]
+        with patch.object(PersonaHandlersState, "REPLICA_COUNT", 2), \
+                patch.object(PersonaHandlersState, "REPLICA_ID", 1):
+            self.persona_handlers_state.add_persona_handlers(personas)
+        self.assertEqual(self.persona_handlers_state.connected_persona_ids,
+                         [persona.id for persona in personas
+                          if is_assigned(persona.id, 1, 2)])
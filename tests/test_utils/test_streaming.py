@@ -0,0 +1,105 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 NeonGecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+
+from unittest.mock import Mock, patch
+
+from neon_mq_connector.utils.network_utils import dict_to_b64
+
+from neon_llm_core.utils.streaming import (
+    STREAM_REQUEST_KEY,
+    StreamAssembler,
+    build_stream_message,
+    send_mq_stream_request,
+)
+
+
+class TestStreamAssembler(unittest.TestCase):
+    def test_in_order(self):
+        assembler = StreamAssembler()
+        self.assertEqual(assembler.add(build_stream_message(
+            "id", "key", "Hello", 0, False)), ["Hello"])
+        self.assertEqual(assembler.add(build_stream_message(
+            "id", "key", " world", 1, False)), [" world"])
+        self.assertFalse(assembler.complete)
+        self.assertEqual(assembler.response, "Hello world")
+        self.assertEqual(assembler.add(build_stream_message(
+            "id", "key", "Hello world", 2, True)), [])
+        self.assertTrue(assembler.complete)
+        self.assertEqual(assembler.response, "Hello world")
+
+    def test_out_of_order(self):
+        assembler = StreamAssembler()
+        self.assertEqual(assembler.add(build_stream_message(
+            "id", "key", "b", 1, False)), [])
+        assembler.add(build_stream_message("id", "key", "abc", 3, True))
+        self.assertFalse(assembler.complete)
+        self.assertEqual(assembler.add(build_stream_message(
+            "id", "key", "a", 0, False)), ["a", "b"])
+        self.assertFalse(assembler.complete)
+        self.assertEqual(assembler.add(build_stream_message(
+            "id", "key", "c", 2, False)), ["c"])
+        self.assertTrue(assembler.complete)
+
+
+class TestSendMQStreamRequest(unittest.TestCase):
+    @patch("neon_llm_core.utils.streaming.load_mq_handler_config")
+    @patch("neon_llm_core.utils.streaming.NeonMQHandler")
+    def test_send_mq_stream_request(self, handler_cls, _):
+        handler = handler_cls.return_value
+        channel = handler.connection.channel.return_value
+
+        def _consume(queue, **_):
+            request = handler.emit_mq_message.call_args.kwargs["request_data"]
+            self.assertEqual(request["routing_key"], queue)
+            self.assertTrue(request[STREAM_REQUEST_KEY])
+            message_id = request["message_id"]
+            messages = [build_stream_message("other", queue, "x", 0, False),
+                        build_stream_message(message_id, queue, "one ", 0,
+                                             False),
+                        build_stream_message(message_id, queue, "two", 1,
+                                             False),
+                        build_stream_message(message_id, queue, "one two",
+                                             2, True)]
+            for message in messages:
+                yield Mock(), None, dict_to_b64(message)
+
+        channel.consume.side_effect = _consume
+        on_chunk = Mock()
+        response = send_mq_stream_request("/llm", {"query": "test"},
+                                          "test_input", on_chunk=on_chunk)
+        self.assertEqual(response["response"], "one two")
+        self.assertEqual([c.args[0] for c in on_chunk.call_args_list],
+                         ["one ", "two"])
+        channel.queue_delete.assert_called_once()
+        handler.shutdown.assert_called_once()
+
+        # Timeout before the final message
+        channel.consume.side_effect = lambda *_, **__: iter([(None, None,
+                                                              None)])
+        self.assertIsNone(send_mq_stream_request("/llm", {"query": "test"},
+                                                 "test_input"))